@@ -13,15 +13,45 @@ import random
 import statistics
 import psutil
 import gc
-from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Tuple, Set
+import os
+import queue
+import multiprocessing
+import array
+import itertools
+import tracemalloc
+import struct
+import gzip
+import zlib
+import io
+from dataclasses import dataclass, field, fields, replace, asdict
+from typing import List, Dict, Any, Optional, Tuple, Set, Callable
 from datetime import datetime, timedelta
+from aiohttp import web
 import uuid
 import logging
 from concurrent.futures import ThreadPoolExecutor
 import threading
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
 import hashlib
+import hmac
+import math
+import bisect
+import heapq
+import re
+import platform
+import contextlib
+import email.utils
+import sys
+
+try:
+    import zstandard  # Optional: zstd compression for result streams
+except ImportError:
+    zstandard = None
+
+try:
+    import httpx  # Optional: HTTP/2 transport (needs the 'httpx[http2]' extra)
+except ImportError:
+    httpx = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -33,9 +63,11 @@ class APITestResult:
     timestamp: float
     request_id: str
     user_id: int
+    endpoint: str = ""  # API path the request targeted
+    endpoint_index: int = -1  # Row in the run's EndpointTable (method, path, model)
     
     # Core API metrics
-    total_latency: float  # End-to-end API response time
+    total_latency: float = 0.0  # End-to-end API response time
     connection_time: float = 0.0  # Time to establish connection
     first_byte_time: float = 0.0  # TTFB
     download_time: float = 0.0  # Time to download response
@@ -56,14 +88,32 @@ class APITestResult:
     connection_reused: bool = False
     ssl_handshake_time: float = 0.0
     dns_resolution_time: float = 0.0
+    pool_wait_time: float = 0.0  # Time queued waiting for a pooled connection
+    request_send_time: float = 0.0  # Connection ready -> request body fully sent
+    
+    # Streaming response metrics (SSE / chunked bodies)
+    time_to_first_chunk: float = 0.0
+    stream_chunks: int = 0
+    stream_duration: float = 0.0  # First chunk -> last chunk
+    max_inter_chunk_gap: float = 0.0
+    mean_inter_chunk_gap: float = 0.0
+    stream_stalls: int = 0  # Gaps longer than stream_stall_threshold_ms
+    # Every inter-chunk gap of the response; folded into RunStatistics, never stored or streamed
+    chunk_gaps: Optional["LatencyHistogram"] = field(default=None, repr=False, compare=False,
+                                                     metadata={"transient": True})
     
     # Error tracking
     error_type: str = ""  # connection, timeout, validation, processing, etc.
     error_message: str = ""
     retry_count: int = 0
+    attempt_latency: float = 0.0  # Final attempt alone (total_latency includes earlier attempts and backoff)
+    retry_after: float = 0.0  # Retry-After (seconds) sent with a 429/503
+    tenant: str = ""  # TenantProfile name ("" = single-key run)
+    throttle_wait: float = 0.0  # Held back by the tenant's rate limiter (before the first send: not in total_latency)
     
     # Business logic metrics
     cache_hit: bool = False
+    cache_key: int = -1  # Key from the cache-validation key space (-1 = unique/unkeyed prompt)
     rate_limited: bool = False
     circuit_breaker_open: bool = False
     
@@ -72,6 +122,138 @@ class APITestResult:
     load_balancer_route: str = ""
     api_version: str = ""
 
+# APITestResult fields kept in ResultStore and result streams
+STORED_RESULT_FIELDS = tuple(f for f in fields(APITestResult) if not f.metadata.get("transient"))
+
+class StringInterner:
+    """Map repeated strings to small integer ids"""
+    
+    def __init__(self):
+        self.ids: Dict[str, int] = {"": 0}
+        self.values: List[str] = [""]
+    
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = len(self.values)
+            self.ids[value] = index
+            self.values.append(value)
+        return index
+    
+    def lookup(self, index: int) -> str:
+        return self.values[index]
+
+class ResultStore:
+    """Columnar, chunked storage for APITestResult rows
+    
+    Numeric fields live in fixed-width typed arrays, low-cardinality strings
+    (error_type, server_id, api_version, ...) are interned to integer ids and
+    unique strings (request_id, error_message) are packed into a byte buffer.
+    Columns grow one fixed-size chunk at a time so large runs never copy
+    the whole column. Rows are materialized as APITestResult on access.
+    """
+    
+    CHUNK_SIZE = 65536
+    TEXT_FIELDS = ("request_id", "error_message")  # High-cardinality strings
+    DOUBLE_FIELDS = ("timestamp",)  # Durations fit in float32, absolute times do not
+    TYPECODES = {float: 'f', int: 'i', bool: 'b', str: 'I'}
+    
+    def __init__(self):
+        self.field_names = [f.name for f in STORED_RESULT_FIELDS]
+        self.typecodes = {f.name: 'd' if f.name in self.DOUBLE_FIELDS else self.TYPECODES[f.type]
+                          for f in STORED_RESULT_FIELDS if f.name not in self.TEXT_FIELDS}
+        self.interners = {name: StringInterner() for name in self.field_names
+                          if self.typecodes.get(name) == 'I'}
+        self._chunks: List[Dict[str, Any]] = []
+        self._length = 0
+    
+    def _new_chunk(self) -> Dict[str, Any]:
+        chunk = {name: array.array(typecode) for name, typecode in self.typecodes.items()}
+        for name in self.TEXT_FIELDS:
+            chunk[name] = (bytearray(), array.array('I'))  # Packed UTF-8 data, end offsets
+        self._chunks.append(chunk)
+        return chunk
+    
+    def append(self, result: APITestResult):
+        if self._length % self.CHUNK_SIZE == 0:
+            chunk = self._new_chunk()
+        else:
+            chunk = self._chunks[-1]
+        
+        for name, typecode in self.typecodes.items():
+            value = getattr(result, name)
+            if typecode == 'I':
+                value = self.interners[name].intern(value)
+            chunk[name].append(value)
+        
+        for name in self.TEXT_FIELDS:
+            data, offsets = chunk[name]
+            data += getattr(result, name).encode()
+            offsets.append(len(data))
+        
+        self._length += 1
+    
+    def extend(self, results):
+        for result in results:
+            self.append(result)
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def _text_value(self, chunk: Dict[str, Any], name: str, offset: int) -> str:
+        data, offsets = chunk[name]
+        start = offsets[offset - 1] if offset else 0
+        return data[start:offsets[offset]].decode()
+    
+    def row(self, index: int) -> APITestResult:
+        chunk = self._chunks[index // self.CHUNK_SIZE]
+        offset = index % self.CHUNK_SIZE
+        values = {}
+        for name, typecode in self.typecodes.items():
+            value = chunk[name][offset]
+            if typecode == 'I':
+                value = self.interners[name].lookup(value)
+            elif typecode == 'b':
+                value = bool(value)
+            values[name] = value
+        for name in self.TEXT_FIELDS:
+            values[name] = self._text_value(chunk, name, offset)
+        return APITestResult(**values)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(self._length)[index]]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("result index out of range")
+        return self.row(index)
+    
+    def __iter__(self):
+        for index in range(self._length):
+            yield self.row(index)
+    
+    def column(self, name: str):
+        """Iterate one field's values without materializing rows"""
+        if name in self.TEXT_FIELDS:
+            return (self._text_value(chunk, name, offset)
+                    for chunk in self._chunks for offset in range(len(chunk[name][1])))
+        values = itertools.chain.from_iterable(chunk[name] for chunk in self._chunks)
+        if name in self.interners:
+            return map(self.interners[name].lookup, values)
+        return values
+    
+    def nbytes(self) -> int:
+        """Approximate memory held by the column buffers"""
+        total = 0
+        for chunk in self._chunks:
+            for name, column in chunk.items():
+                if name in self.TEXT_FIELDS:
+                    total += len(column[0]) + column[1].itemsize * len(column[1])
+                else:
+                    total += column.itemsize * len(column)
+        return total
+
 @dataclass 
 class LoadTestConfig:
     """Configuration focused on API infrastructure testing"""
@@ -96,12 +278,79 @@ class LoadTestConfig:
         "/metrics"
     ])
     
+    # Traffic mix: relative weights (endpoint_weights replaces endpoints_to_test when set;
+    # payload_size_weights maps body KB -> weight and replaces the uniform min/max range)
+    endpoint_weights: Dict[str, float] = field(default_factory=dict)
+    payload_size_weights: Dict[int, float] = field(default_factory=dict)
+    random_seed: Optional[int] = None  # Seeds per-user RNG streams for reproducible traffic
+    
+    # Cache validation: repeat_ratio of requests draw prompts from a bounded key space
+    # with Zipf(skew) popularity, the rest are unique, so cache hit/miss paths both get load
+    cache_validation: bool = False
+    cache_key_space: int = 1000
+    cache_zipf_skew: float = 1.0
+    cache_repeat_ratio: float = 0.8
+    
+    # Load model: "closed" runs per-user request loops, "open" fires requests at a
+    # target arrival rate regardless of how many responses are outstanding, "trace"
+    # replays a recorded trace_file
+    load_model: str = "closed"
+    arrival_pattern: str = "constant"  # constant, step, ramp, poisson
+    target_rps: float = 10.0
+    arrival_start_rps: float = 1.0  # Initial rate for step/ramp patterns
+    arrival_step_rps: float = 5.0  # Rate increase per step
+    arrival_step_seconds: int = 30
+    max_in_flight: int = 1000  # Arrivals beyond this cap are dropped
+    late_send_threshold_ms: float = 10.0  # Sends later than this are counted as late
+    
+    # Trace replay (NDJSON or access log, read lazily)
+    trace_file: str = ""
+    trace_speed: float = 1.0  # 2.0 replays twice as fast as recorded
+    trace_shard_index: int = 0  # Workers/agents each replay every shard_count-th record
+    trace_shard_count: int = 1
+    
+    # Client saturation detection (flags windows where the generator was the bottleneck)
+    detect_client_saturation: bool = True
+    saturation_window_seconds: float = 1.0
+    saturation_loop_lag_ms: float = 25.0
+    saturation_dispatch_delay_ms: float = 50.0  # Intended start -> handed to the transport
+    saturation_pool_wait_ms: float = 10.0
+    auto_throttle: bool = False  # Scale offered load down while the client is saturated
+    auto_throttle_min_factor: float = 0.1
+    
+    # Capacity search: raise a constant arrival rate from arrival_start_rps towards
+    # target_rps (step or binary search) until p99 latency or error rate breaks the SLO
+    capacity_search: str = ""  # "", step, binary
+    slo_p99_ms: float = 1000.0
+    slo_error_rate: float = 0.01
+    
+    # Streaming responses ("stream": true on completion endpoints)
+    stream_responses: bool = False
+    stream_stall_threshold_ms: float = 1000.0
+    
     # Connection testing
     connection_pool_size: int = 100
     max_connections_per_host: int = 50
     keep_alive_timeout: int = 30
     test_connection_reuse: bool = True
     
+    # Warm-up: requests sent before the measured phase (0 = none), warmup_connections at a
+    # time so each opens its own pooled connection (0 = the transport's connection limit)
+    warmup_requests: int = 0
+    warmup_connections: int = 0
+    
+    # Transport: "http1" is aiohttp's keep-alive pool, "http2" multiplexes requests as
+    # streams over a few httpx connections
+    transport: str = "http1"
+    http2_connections: int = 10  # Connections opened on demand, up to this many
+    http2_streams_per_connection: int = 100  # Concurrent streams per connection before requests queue
+    
+    # Closed-model pacing: "scheduler" drives every virtual user from one timer heap and a
+    # worker pool; "per_user" runs one sleeping coroutine per user
+    closed_model_pacing: str = "scheduler"
+    pacing_tick_ms: float = 5.0  # Due sends are released in batches once per tick
+    pacing_workers: int = 0  # 0 = one per user plus one burst (max 10000)
+    
     # Request patterns
     burst_testing: bool = True
     burst_size: int = 20
@@ -117,6 +366,34 @@ class LoadTestConfig:
     min_payload_kb: int = 1
     max_payload_kb: int = 100
     
+    # Pre-serialized payload corpus (built once, cached on disk by config hash)
+    use_payload_corpus: bool = True
+    payload_size_buckets: int = 8  # Distinct body sizes between min and max payload KB
+    payload_variants_per_bucket: int = 4
+    payload_cache_dir: str = ".payload_cache"
+    
+    # Client retries, modelled on SDK clients: retry_policy "none" or "exponential"
+    # (backoff with full jitter) on 429, 5xx, timeouts and connection errors
+    retry_policy: str = "none"
+    max_retries: int = 3
+    retry_base_delay_ms: float = 500.0
+    retry_max_delay_ms: float = 8000.0
+    respect_retry_after: bool = True  # Wait at least Retry-After (capped at 60s)
+    retry_budget_tokens: float = 10.0  # Token-bucket retry budget; 0 = unlimited retries
+    retry_budget_ratio: float = 0.1  # Tokens earned per successful attempt (a failure costs 1)
+    
+    # Client-side circuit breaker: opens when the failure rate over the window crosses the
+    # threshold, short-circuits requests for circuit_open_seconds, then lets one probe through
+    circuit_breaker: bool = False
+    circuit_failure_threshold: float = 0.5
+    circuit_min_requests: int = 20
+    circuit_window_seconds: float = 10.0
+    circuit_open_seconds: float = 5.0
+    
+    # Multi-tenant traffic: one dict per API key (see TenantProfile); each tenant gets its own
+    # share of users/arrivals, client-side token-bucket rate cap and endpoint mix
+    tenants: List[Dict[str, Any]] = field(default_factory=list)
+    
     # Failure simulation
     simulate_client_failures: bool = True
     client_timeout_percentage: float = 0.02
@@ -124,18 +401,39 @@ class LoadTestConfig:
     
     # Monitoring
     collect_system_metrics: bool = True
+    system_metrics_interval_seconds: float = 1.0  # Sampled from /proc on a background thread
+    loop_lag_probe_interval_ms: float = 50.0
     monitor_memory_usage: bool = True
     track_connection_pool: bool = True
+    trace_request_phases: bool = True  # Per-phase timing via aiohttp TraceConfig hooks
+    metrics_port: int = 0  # >0 serves live OpenMetrics at http://metrics_host:metrics_port/metrics
+    metrics_host: str = "127.0.0.1"
+    
+    # Multi-process load generation
+    worker_processes: int = 1  # >1 shards users across processes, 0 = CPU count
+    worker_batch_size: int = 200  # Results per message streamed to the coordinator
+    worker_flush_interval_seconds: float = 0.5
+    
+    # Distributed mode (coordinator + agents)
+    agent_snapshot_interval_seconds: float = 2.0
+    agent_start_delay_seconds: float = 3.0  # Lead time so every agent starts together
     
     # Output
     scenario_name: str = "api_infrastructure_test"
     output_file: str = "api_load_test_results.json"
+    # none (embed raw_results in output_file), ndjson or binary; streamed runs write
+    # raw_results_file, not raw_results, into output_file
+    results_stream_format: str = "none"
+    results_stream_compression: str = "none"  # none, gzip, zstd
+    results_stream_file: str = ""  # Defaults to <output_file base>.results.<ext>
+    results_stream_batch_size: int = 1000
     real_time_dashboard: bool = True
 
 class PayloadGenerator:
     """Generate various payloads to test API handling"""
     
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
         self.templates = {
             "chat_completion": {
                 "model": "gpt-3.5-turbo",
@@ -155,34 +453,58 @@ class PayloadGenerator:
             }
         }
     
-    def generate_payload(self, endpoint: str, size_kb: int = 5) -> Dict[str, Any]:
+    @staticmethod
+    def supports_streaming(endpoint: str) -> bool:
+        """Whether the endpoint accepts "stream": true (chat/text completions)"""
+        return "completion" in endpoint
+    
+    def model_for(self, endpoint: str) -> str:
+        """Model named in the endpoint's payload template ("" for generic endpoints)"""
+        if "chat" in endpoint:
+            return self.templates["chat_completion"]["model"]
+        if "completion" in endpoint:
+            return self.templates["completion"]["model"]
+        if "embedding" in endpoint:
+            return self.templates["embedding"]["model"]
+        return ""
+    
+    def generate_payload(self, endpoint: str, size_kb: int = 5, stream: bool = False,
+                         content_prefix: str = "") -> Dict[str, Any]:
         """Generate payload of specified size for endpoint"""
         if "chat" in endpoint:
             template = self.templates["chat_completion"].copy()
-            content = self._generate_content(size_kb)
-            template["messages"][0]["content"] = content
+            content = content_prefix + self._generate_content(size_kb)
+            # New message list: the shallow copy shares it with the template
+            template["messages"] = [{**template["messages"][0], "content": content}]
+            if stream:
+                template["stream"] = True
         elif "completion" in endpoint:
             template = self.templates["completion"].copy()
-            template["prompt"] = self._generate_content(size_kb)
+            template["prompt"] = content_prefix + self._generate_content(size_kb)
+            if stream:
+                template["stream"] = True
         elif "embedding" in endpoint:
             template = self.templates["embedding"].copy()
-            template["input"] = self._generate_content(size_kb)
+            template["input"] = content_prefix + self._generate_content(size_kb)
         else:
             # Generic payload
-            return {"data": self._generate_content(size_kb)}
+            return {"data": content_prefix + self._generate_content(size_kb)}
         
         return template
     
-    def generate_malformed_payload(self, endpoint: str) -> Dict[str, Any]:
-        """Generate malformed payload to test API validation"""
-        malformed_types = [
+    def malformed_payloads(self) -> List[Dict[str, Any]]:
+        """All malformed payload variants used to test API validation"""
+        return [
             {"model": None},  # Missing required field
             {"model": 123},   # Wrong type
             {"invalid_field": "test", "model": "gpt-3.5-turbo"},  # Extra field
             {},  # Empty payload
             {"model": "gpt-3.5-turbo", "max_tokens": -1},  # Invalid value
         ]
-        return random.choice(malformed_types)
+    
+    def generate_malformed_payload(self, endpoint: str) -> Dict[str, Any]:
+        """Generate malformed payload to test API validation"""
+        return self.rng.choice(self.malformed_payloads())
     
     def _generate_content(self, size_kb: int) -> str:
         """Generate text content of approximately specified size"""
@@ -198,12 +520,999 @@ class PayloadGenerator:
         ]
         
         while current_size < target_chars:
-            word = random.choice(sample_words)
+            word = self.rng.choice(sample_words)
             words.append(word)
             current_size += len(word) + 1  # +1 for space
         
         return " ".join(words)
 
+def traffic_endpoints(config: LoadTestConfig) -> List[Tuple[str, float]]:
+    """(path, weight) pairs requests are drawn from"""
+    if config.endpoint_weights:
+        return [(path, float(weight)) for path, weight in config.endpoint_weights.items() if weight > 0]
+    if config.test_multiple_endpoints:
+        return [(path, 1.0) for path in config.endpoints_to_test]
+    return [(config.endpoint_path, 1.0)]
+
+def payload_size_weights(config: LoadTestConfig) -> List[Tuple[int, float]]:
+    """(size KB, weight) pairs; keys may arrive as strings from JSON-transported configs"""
+    return sorted((int(size), float(weight)) for size, weight in config.payload_size_weights.items() if weight > 0)
+
+@dataclass
+class TenantProfile:
+    """One API key's share of the traffic, client-side rate cap and endpoint mix"""
+    name: str
+    api_key: str
+    weight: float = 1.0  # Share of virtual users (closed model) or arrivals (open/trace)
+    rate_limit_rps: float = 0.0  # Client-side cap enforced by a token bucket (0 = uncapped)
+    burst: float = 0.0  # Token bucket capacity in requests (0 = one second at rate_limit_rps)
+    endpoint_weights: Dict[str, float] = field(default_factory=dict)  # Empty = the run's endpoint mix
+
+def tenant_profiles(config: LoadTestConfig) -> List[TenantProfile]:
+    """Validated TenantProfiles from config.tenants (plain dicts, so configs stay JSON-safe)"""
+    known = {f.name for f in fields(TenantProfile)}
+    profiles = []
+    for index, tenant in enumerate(config.tenants):
+        unknown = set(tenant) - known
+        if unknown:
+            raise ValueError(f"Tenant {index}: unknown keys {sorted(unknown)}")
+        if not tenant.get("name") or not tenant.get("api_key"):
+            raise ValueError(f"Tenant {index}: name and api_key are required")
+        profile = TenantProfile(**tenant)
+        if profile.weight <= 0 or profile.rate_limit_rps < 0 or profile.burst < 0:
+            raise ValueError(f"Tenant {profile.name}: weight must be positive, rate_limit_rps and burst >= 0")
+        profiles.append(profile)
+    names = [profile.name for profile in profiles]
+    if len(set(names)) != len(names):
+        raise ValueError("Tenant names must be unique")
+    return profiles
+
+REDACTED = "<redacted>"
+
+def redacted_config(config: LoadTestConfig) -> Dict[str, Any]:
+    """asdict(config) with API keys masked, for configs written to disk"""
+    values = asdict(config)
+    if values["api_key"]:
+        values["api_key"] = REDACTED
+    values["tenants"] = [{**tenant, "api_key": REDACTED} if tenant.get("api_key") else tenant
+                         for tenant in values["tenants"]]
+    return values
+
+@dataclass
+class TraceRecord:
+    """One request from a replayed trace"""
+    offset: float  # Seconds after the trace's first request
+    method: str
+    path: str
+    body_size: int = 0  # Request body bytes (0 = pick from the configured size mix)
+    model: str = ""
+
+class TraceReader:
+    """Lazily stream TraceRecords from an NDJSON or access-log trace (optionally gzipped)
+    
+    NDJSON lines need a timestamp (epoch seconds or ISO 8601) and an endpoint or
+    path; body_size/request_size, model and method are optional, so results
+    streams written by this tool replay directly. Access logs use the common or
+    combined format; a trailing integer field (nginx $request_length) is taken
+    as the body size. Only the current line is held in memory.
+    """
+    
+    ACCESS_LOG_PATTERN = re.compile(
+        r'\[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" \d{3} \S+(?P<rest>.*)$')
+    
+    def __init__(self, path: str, shard_index: int = 0, shard_count: int = 1):
+        self.path = path
+        self.shard_index = shard_index
+        self.shard_count = max(1, shard_count)
+        self.skipped_lines = 0
+    
+    def __iter__(self):
+        opener = gzip.open if self.path.endswith(".gz") else open
+        first_timestamp = None
+        record_number = 0
+        with opener(self.path, 'rt', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    parsed = self._parse_json(line) if line.startswith("{") else self._parse_access_log(line)
+                except (ValueError, KeyError, TypeError):
+                    parsed = None
+                if parsed is None:
+                    if '"_stream_header"' not in line:
+                        self.skipped_lines += 1
+                    continue
+                
+                timestamp, record = parsed
+                if first_timestamp is None:
+                    first_timestamp = timestamp
+                record_number += 1
+                if (record_number - 1) % self.shard_count != self.shard_index:
+                    continue
+                record.offset = timestamp - first_timestamp
+                yield record
+    
+    @staticmethod
+    def _parse_timestamp(value: Any) -> float:
+        if isinstance(value, (int, float)):
+            return float(value)
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    
+    def _parse_json(self, line: str) -> Optional[Tuple[float, TraceRecord]]:
+        entry = json.loads(line)
+        if "_stream_header" in entry:
+            return None
+        path = entry.get("endpoint") or entry.get("path")
+        if not path:
+            return None
+        timestamp = self._parse_timestamp(entry.get("timestamp", entry.get("time", entry.get("ts"))))
+        return timestamp, TraceRecord(
+            offset=0.0,
+            method=str(entry.get("method", "POST")).upper(),
+            path=path.split("?", 1)[0],
+            body_size=int(entry.get("body_size", entry.get("request_size", 0)) or 0),
+            model=entry.get("model") or ""
+        )
+    
+    def _parse_access_log(self, line: str) -> Optional[Tuple[float, TraceRecord]]:
+        match = self.ACCESS_LOG_PATTERN.search(line)
+        if not match:
+            return None
+        timestamp = datetime.strptime(match.group("time"), "%d/%b/%Y:%H:%M:%S %z").timestamp()
+        trailing = match.group("rest").split()
+        return timestamp, TraceRecord(
+            offset=0.0,
+            method=match.group("method"),
+            path=match.group("path").split("?", 1)[0],
+            body_size=int(trailing[-1]) if trailing and trailing[-1].isdigit() else 0
+        )
+
+class CacheKeySpace:
+    """Bounded prompt key space with Zipf popularity for exercising response caches
+    
+    Key k's body is generated from an RNG seeded by (endpoint, k), so the same
+    key is byte-identical across requests, worker processes and agents. Unique
+    requests reuse a keyed body with its key prefix swapped for a random nonce,
+    which guarantees a miss without generating new content.
+    """
+    
+    def __init__(self, config: LoadTestConfig, templates: Dict[str, Dict[str, Any]],
+                 select_size: Callable[[random.Random], int]):
+        self.config = config
+        self.templates = templates
+        self.select_size = select_size
+        self.size = max(1, config.cache_key_space)
+        self.repeat_ratio = config.cache_repeat_ratio
+        self._cum_weights = list(itertools.accumulate(
+            1.0 / rank ** config.cache_zipf_skew for rank in range(1, self.size + 1)))
+        self._keys = range(self.size)
+        self._bodies: Dict[Tuple[str, int], bytes] = {}
+    
+    @staticmethod
+    def _prefix(key: int) -> str:
+        return f"[key-{key:012d}] "
+    
+    def sample(self, rng: random.Random) -> int:
+        """A Zipf-distributed key, or -1 for a unique (uncacheable) prompt"""
+        if rng.random() >= self.repeat_ratio:
+            return -1
+        return rng.choices(self._keys, cum_weights=self._cum_weights)[0]
+    
+    def body(self, endpoint: str, key: int, rng: random.Random) -> bytes:
+        body_key = key if key >= 0 else rng.randrange(self.size)
+        body = self._bodies.get((endpoint, body_key))
+        if body is None:
+            key_rng = random.Random(f"cache:{endpoint}:{body_key}")
+            generator = PayloadGenerator(key_rng)
+            generator.templates = self.templates
+            payload = generator.generate_payload(endpoint, self.select_size(key_rng), self.config.stream_responses,
+                                                 content_prefix=self._prefix(body_key))
+            body = self._bodies[(endpoint, body_key)] = json.dumps(payload).encode()
+        if key < 0:
+            nonce = f"[new-{rng.getrandbits(48):012x}] "
+            body = body.replace(self._prefix(body_key).encode(), nonce.encode(), 1)
+        return body
+
+class EndpointTable:
+    """Precomputed (method, path, model) rows; results carry a small int index into it
+    
+    Built deterministically from the config, so worker processes, agents and
+    replayed streams all agree on the indexes. Unknown endpoints are appended.
+    """
+    
+    def __init__(self, entries: Optional[List[Tuple[str, str, str]]] = None):
+        self.entries: List[Tuple[str, str, str]] = []
+        self._indexes: Dict[Tuple[str, str, str], int] = {}
+        for method, path, model in entries or []:
+            self.index(method, path, model)
+    
+    @classmethod
+    def from_config(cls, config: LoadTestConfig, payload_generator: PayloadGenerator) -> "EndpointTable":
+        paths = [path for path, _ in traffic_endpoints(config)]
+        for path in [config.endpoint_path, *(path for profile in tenant_profiles(config)
+                                              for path in profile.endpoint_weights)]:
+            if path not in paths:
+                paths.append(path)
+        return cls([("POST", path, payload_generator.model_for(path)) for path in paths])
+    
+    def index(self, method: str, path: str, model: str = "") -> int:
+        key = (method, path, model)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = len(self.entries)
+            self.entries.append(key)
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def label(self, index: int) -> str:
+        """Report key: the path, qualified by method/model only when a path appears twice"""
+        method, path, model = self.entries[index]
+        if sum(1 for entry in self.entries if entry[1] == path) == 1:
+            return path
+        return f"{method} {path}" + (f" ({model})" if model else "")
+
+class ArrivalRateScheduler:
+    """Generate request send times for open-model (arrival-rate) load"""
+    
+    PATTERNS = ("constant", "step", "ramp", "poisson")
+    
+    def __init__(self, config: LoadTestConfig, rng: Optional[random.Random] = None):
+        if config.arrival_pattern not in self.PATTERNS:
+            raise ValueError(f"Unknown arrival pattern: {config.arrival_pattern}")
+        self.config = config
+        self.rng = rng or random.Random()
+        self.rate_factor = 1.0  # Lowered by auto-throttle while the client is saturated
+    
+    def rate_at(self, elapsed: float) -> float:
+        """Target arrival rate (requests/second) at a point in the test"""
+        config = self.config
+        if config.arrival_pattern == "step":
+            steps = int(elapsed // max(config.arrival_step_seconds, 1))
+            return min(config.target_rps, config.arrival_start_rps + steps * config.arrival_step_rps)
+        if config.arrival_pattern == "ramp" and elapsed < config.ramp_up_seconds:
+            progress = elapsed / config.ramp_up_seconds
+            return config.arrival_start_rps + (config.target_rps - config.arrival_start_rps) * progress
+        return config.target_rps
+    
+    def arrival_offsets(self, duration: float):
+        """Yield send offsets (seconds from test start) until duration is reached"""
+        elapsed = 0.0
+        while elapsed < duration:
+            rate = self.rate_at(elapsed) * self.rate_factor
+            if rate <= 0:
+                elapsed += 0.1  # Nothing is sent while the target rate is zero
+                continue
+            if self.config.arrival_pattern == "poisson":
+                elapsed += self.rng.expovariate(rate)
+            else:
+                elapsed += 1.0 / rate
+            
+            if elapsed < duration:
+                yield elapsed
+
+class LatencyHistogram:
+    """Log-bucketed (HDR-style) latency histogram with bounded relative error
+    
+    Values are recorded in microseconds. Values below 2**precision_bits are kept
+    exactly; larger values fall into buckets whose width is at most 1/2**(precision_bits-1)
+    of the value, so with precision_bits=8 a bucket spans at most ~0.8% and its
+    midpoint is within ~0.4% of any value in it.
+    """
+    
+    REPORT_PERCENTILES = (50, 90, 95, 99, 99.9)
+    
+    def __init__(self, precision_bits: int = 8):
+        self.precision_bits = precision_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min_value = 0.0
+        self.max_value = 0.0
+    
+    def record(self, value: float):
+        """Record a latency in seconds"""
+        micros = max(int(value * 1_000_000), 0)
+        shift = micros.bit_length() - self.precision_bits
+        index = micros if shift <= 0 else (shift << self.precision_bits) | (micros >> shift)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        
+        if self.count == 0 or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+        self.count += 1
+        self.total += value
+    
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples into this one"""
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        if not other.count:
+            return
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.min_value = other.min_value if self.count == 0 else min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+        self.count += other.count
+        self.total += other.total
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    def _bucket_value(self, index: int) -> float:
+        """Representative (midpoint) value of a bucket, in seconds"""
+        shift = index >> self.precision_bits
+        if shift == 0:
+            return index / 1_000_000
+        mantissa = index & ((1 << self.precision_bits) - 1)
+        low = mantissa << shift
+        return (low + ((1 << shift) - 1) / 2) / 1_000_000
+    
+    def percentile(self, percent: float) -> float:
+        """Value at the given percentile (0-100), in seconds"""
+        if not self.count:
+            return 0.0
+        if percent >= 100:
+            return self.max_value
+        
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(self._bucket_value(index), self.min_value), self.max_value)
+        return self.max_value
+    
+    def count_above(self, value: float) -> int:
+        """Samples in buckets strictly above the bucket holding value"""
+        micros = max(int(value * 1_000_000), 0)
+        shift = micros.bit_length() - self.precision_bits
+        limit = micros if shift <= 0 else (shift << self.precision_bits) | (micros >> shift)
+        return sum(count for index, count in self.counts.items() if index > limit)
+    
+    def percentiles(self) -> Dict[str, float]:
+        """Standard report percentiles (p50 ... p99.9 and max)"""
+        summary = {f"p{p:g}": self.percentile(p) for p in self.REPORT_PERCENTILES}
+        summary["max"] = self.max_value
+        return summary
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "precision_bits": self.precision_bits,
+            "counts": self.counts,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min_value,
+            "max": self.max_value
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls(data["precision_bits"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min_value = data["min"]
+        histogram.max_value = data["max"]
+        return histogram
+
+class PacingScheduler:
+    """Central send-time heap for closed-model virtual users
+    
+    Replaces a sleeping coroutine (and timer handle) per user with a single
+    dispatcher that wakes at most once per tick, releasing every due send to
+    a queue drained by a fixed worker pool.
+    """
+    
+    def __init__(self, tick_seconds: float):
+        self.tick = tick_seconds
+        self.ready: asyncio.Queue = asyncio.Queue()
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self.finished = False
+    
+    def schedule(self, due: float, item: Any):
+        if not self._heap or due < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (due, next(self._sequence), item))
+    
+    def finish(self):
+        self.finished = True
+        self._wakeup.set()
+    
+    async def dispatch(self):
+        """Release due items to the ready queue until finish() is called"""
+        heap = self._heap
+        while not self.finished:
+            now = time.time()
+            while heap and heap[0][0] <= now:
+                due, _, item = heapq.heappop(heap)
+                self.ready.put_nowait((due, item))
+            
+            self._wakeup.clear()
+            timeout = max(heap[0][0] - now, self.tick) if heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+class _SecondBucket:
+    """Counters and latency histogram for one wall-clock second"""
+    
+    __slots__ = ("second", "count", "errors", "histogram")
+    
+    def __init__(self, second: int):
+        self.second = second
+        self.count = 0
+        self.errors = 0
+        self.histogram = LatencyHistogram()
+
+class RealTimeAggregator:
+    """Ring-buffered per-second stats for live RPS, error rate and percentiles
+    
+    Each completed request updates a single bucket, and window queries touch at
+    most horizon_seconds buckets, so the cost is independent of how many results
+    the run has produced. Buckets are kept overall and per endpoint.
+    """
+    
+    WINDOWS = (1, 10, 60)
+    
+    def __init__(self, horizon_seconds: int = 60):
+        self.horizon = horizon_seconds
+        self.buckets: List[Optional[_SecondBucket]] = [None] * horizon_seconds
+        self.endpoint_buckets: Dict[str, List[Optional[_SecondBucket]]] = {}
+    
+    def _bucket(self, ring: List[Optional[_SecondBucket]], second: int) -> _SecondBucket:
+        slot = second % self.horizon
+        bucket = ring[slot]
+        if bucket is None or bucket.second != second:
+            bucket = ring[slot] = _SecondBucket(second)
+        return bucket
+    
+    def record(self, endpoint: str, completed_at: float, latency: float, is_error: bool):
+        """Add one completed request"""
+        second = int(completed_at)
+        ring = self.endpoint_buckets.get(endpoint)
+        if ring is None:
+            ring = self.endpoint_buckets[endpoint] = [None] * self.horizon
+        
+        for bucket in (self._bucket(self.buckets, second), self._bucket(ring, second)):
+            bucket.count += 1
+            bucket.errors += is_error
+            bucket.histogram.record(latency)
+    
+    def window(self, seconds: int, endpoint: Optional[str] = None,
+               now: Optional[float] = None) -> Dict[str, float]:
+        """Stats over the last `seconds` complete seconds"""
+        ring = self.buckets if endpoint is None else self.endpoint_buckets.get(endpoint, [])
+        current = int(now if now is not None else time.time())
+        first = current - min(seconds, self.horizon)
+        
+        count = errors = 0
+        histogram = LatencyHistogram()
+        for bucket in ring:
+            if bucket is not None and first <= bucket.second < current:
+                count += bucket.count
+                errors += bucket.errors
+                histogram.merge(bucket.histogram)
+        
+        return {
+            "requests": count,
+            "rps": count / seconds,
+            "error_rate": errors / count if count else 0.0,
+            "avg_latency": histogram.mean,
+            "p50_latency": histogram.percentile(50),
+            "p95_latency": histogram.percentile(95),
+            "p99_latency": histogram.percentile(99)
+        }
+    
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """All standard windows, overall and per endpoint"""
+        now = now if now is not None else time.time()
+        return {
+            "overall": {f"{w}s": self.window(w, now=now) for w in self.WINDOWS},
+            "endpoints": {
+                endpoint: {f"{w}s": self.window(w, endpoint, now) for w in self.WINDOWS}
+                for endpoint in self.endpoint_buckets
+            }
+        }
+
+class PayloadCorpus:
+    """Request bodies pre-serialized once per endpoint and size bucket
+    
+    Bodies are JSON-encoded bytes that are sent as-is, so the hot path does no
+    content generation or serialization. The corpus is cached on disk under a
+    hash of the settings that shape it, so repeated runs load it instantly.
+    """
+    
+    FORMAT_VERSION = 2
+    
+    def __init__(self, config: LoadTestConfig, generator: PayloadGenerator):
+        self.config = config
+        self.generator = generator
+        self.endpoints = sorted(set(config.endpoints_to_test) | {config.endpoint_path} | set(config.endpoint_weights) |
+                                {path for tenant in config.tenants for path in tenant.get("endpoint_weights", {})})
+        weighted_sizes = [size for size, _ in payload_size_weights(config)]
+        self.sizes_kb = weighted_sizes or self.size_buckets(config.min_payload_kb, config.max_payload_kb,
+                                                            config.payload_size_buckets)
+        self.bodies: Dict[str, List[List[bytes]]] = {}
+        self.malformed_bodies: List[bytes] = []
+    
+    @staticmethod
+    def size_buckets(min_kb: int, max_kb: int, count: int) -> List[int]:
+        """Geometrically spaced body sizes covering [min_kb, max_kb]"""
+        min_kb = max(min_kb, 1)
+        max_kb = max(max_kb, min_kb)
+        if count <= 1 or min_kb == max_kb:
+            return [max_kb]
+        ratio = (max_kb / min_kb) ** (1 / (count - 1))
+        return sorted({round(min_kb * ratio ** i) for i in range(count)} | {max_kb})
+    
+    def cache_key(self) -> str:
+        settings = {
+            "version": self.FORMAT_VERSION,
+            "endpoints": self.endpoints,
+            "sizes_kb": self.sizes_kb,
+            "variants": self.config.payload_variants_per_bucket,
+            "stream": self.config.stream_responses,
+            "templates": self.generator.templates
+        }
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+    
+    def cache_path(self) -> str:
+        return os.path.join(self.config.payload_cache_dir, f"payload-corpus-{self.cache_key()}.json")
+    
+    def _load(self, path: str):
+        """Read a cached corpus (plain JSON, so a tampered file can't run code) and check its shape"""
+        with open(path, 'rb') as f:
+            cached = json.load(f)
+        bodies, malformed = cached["bodies"], cached["malformed_bodies"]
+        if (sorted(bodies) != self.endpoints or
+                any(len(buckets) != len(self.sizes_kb) or not all(buckets) for buckets in bodies.values()) or
+                not malformed):
+            raise ValueError("corpus does not match the current settings")
+        self.bodies = {endpoint: [[body.encode() for body in bucket] for bucket in buckets]
+                       for endpoint, buckets in bodies.items()}
+        self.malformed_bodies = [body.encode() for body in malformed]
+    
+    def load_or_build(self) -> "PayloadCorpus":
+        """Load the corpus from the disk cache, building and caching it on a miss"""
+        path = self.cache_path()
+        try:
+            self._load(path)
+            logger.info(f"Loaded payload corpus from {path}")
+            return self
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable payload corpus cache {path}: {e}")
+        
+        started = time.time()
+        self.build()
+        try:
+            os.makedirs(self.config.payload_cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                # Bodies are ASCII JSON text (json.dumps escapes everything else)
+                json.dump({
+                    "bodies": {endpoint: [[body.decode() for body in bucket] for bucket in buckets]
+                               for endpoint, buckets in self.bodies.items()},
+                    "malformed_bodies": [body.decode() for body in self.malformed_bodies]
+                }, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache payload corpus: {e}")
+        logger.info(f"Built payload corpus ({self.total_bytes() / 1024 / 1024:.1f} MB) in {time.time() - started:.1f}s")
+        return self
+    
+    def build(self):
+        variants = max(1, self.config.payload_variants_per_bucket)
+        self.bodies = {
+            endpoint: [
+                [json.dumps(self.generator.generate_payload(endpoint, size_kb, self.config.stream_responses)).encode()
+                 for _ in range(variants)]
+                for size_kb in self.sizes_kb
+            ]
+            for endpoint in self.endpoints
+        }
+        self.malformed_bodies = [json.dumps(p).encode() for p in self.generator.malformed_payloads()]
+    
+    def total_bytes(self) -> int:
+        return sum(len(body) for buckets in self.bodies.values() for bucket in buckets for body in bucket)
+    
+    def body(self, endpoint: str, size_kb: int, rng: Optional[random.Random] = None) -> bytes:
+        """Pre-encoded body for the smallest size bucket holding size_kb"""
+        buckets = self.bodies[endpoint]
+        index = min(bisect.bisect_left(self.sizes_kb, size_kb), len(buckets) - 1)
+        return (rng or random).choice(buckets[index])
+    
+    def malformed_body(self, rng: Optional[random.Random] = None) -> bytes:
+        return (rng or random).choice(self.malformed_bodies)
+
+class TimeSeries:
+    """Per-second buckets over the whole run for the report's time series
+    
+    Requests land in the bucket of the second they were sent, so a burst and
+    the latency it caused share a bucket. Load drivers mark burst sends and
+    the start of ramp-down as they happen; phases are assigned from those
+    marks when the report is built, and coarser intervals are merged from the
+    one-second buckets.
+    """
+    
+    INTERVALS = (1, 10)
+    PHASES = ("ramp-up", "burst", "steady", "ramp-down")
+    
+    def __init__(self):
+        self.buckets: Dict[int, _SecondBucket] = {}
+        self.burst_sends: Dict[int, int] = defaultdict(int)  # second -> requests sent as part of a burst
+        self.ramp_down_at: Optional[float] = None  # First user finished / arrivals ended
+    
+    def record(self, result: APITestResult):
+        second = int(result.timestamp)
+        bucket = self.buckets.get(second)
+        if bucket is None:
+            bucket = self.buckets[second] = _SecondBucket(second)
+        bucket.count += 1
+        if result.status_code >= 400:
+            bucket.errors += 1
+        elif 200 <= result.status_code < 300:
+            bucket.histogram.record(result.total_latency)
+    
+    def mark_burst(self, when: float, requests: int = 1):
+        self.burst_sends[int(when)] += requests
+    
+    def mark_ramp_down(self, when: float):
+        if self.ramp_down_at is None or when < self.ramp_down_at:
+            self.ramp_down_at = when
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "buckets": {str(second): [bucket.count, bucket.errors, bucket.histogram.to_dict()]
+                        for second, bucket in self.buckets.items()},
+            **self.marks()
+        }
+    
+    def marks(self) -> Dict[str, Any]:
+        return {"burst_sends": {str(second): count for second, count in self.burst_sends.items()},
+                "ramp_down_at": self.ramp_down_at}
+    
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        for second, (count, errors, histogram) in snapshot.get("buckets", {}).items():
+            bucket = self.buckets.get(int(second))
+            if bucket is None:
+                bucket = self.buckets[int(second)] = _SecondBucket(int(second))
+            bucket.count += count
+            bucket.errors += errors
+            bucket.histogram.merge(LatencyHistogram.from_dict(histogram))
+        for second, count in snapshot["burst_sends"].items():
+            self.burst_sends[int(second)] += count
+        if snapshot["ramp_down_at"] is not None:
+            self.mark_ramp_down(snapshot["ramp_down_at"])
+    
+    def _phase(self, start: int, width: int, requests: int, burst_requests: int, ramp_up_end: float) -> str:
+        middle = start + width / 2
+        if requests and burst_requests * 2 >= requests:
+            return "burst"
+        if self.ramp_down_at is not None and middle >= self.ramp_down_at:
+            return "ramp-down"
+        if middle < ramp_up_end:
+            return "ramp-up"
+        return "steady"
+    
+    @staticmethod
+    def _system_summary(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "samples": len(samples),
+            "cpu_percent": statistics.mean(sample["cpu_percent"] for sample in samples),
+            "process_cpu_percent": statistics.mean(sample["process_cpu_percent"] for sample in samples),
+            "rss_mb": max(sample["rss_mb"] for sample in samples),
+            "network_connections": max(sample["network_connections"] for sample in samples),
+            "loop_lag_max_ms": max(sample.get("loop_lag_max_ms", 0.0) for sample in samples),
+            "gc_pause_ms": sum(sample.get("gc_pause_ms", 0.0) for sample in samples)
+        }
+    
+    def report(self, ramp_up_seconds: float, system_samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Interval series (tagged with phase and system samples) plus per-phase totals"""
+        if not self.buckets:
+            return {}
+        first, last = min(self.buckets), max(self.buckets)
+        ramp_up_end = first + ramp_up_seconds
+        sample_times = [sample["timestamp"] for sample in system_samples]
+        empty = _SecondBucket(0)
+        
+        series = {}
+        phase_histograms = {phase: LatencyHistogram() for phase in self.PHASES}
+        phase_totals = {phase: [0, 0, 0] for phase in self.PHASES}  # seconds, requests, errors
+        for width in self.INTERVALS:
+            intervals = []
+            for start in range(first, last + 1, width):
+                requests = errors = burst_requests = 0
+                histogram = LatencyHistogram()
+                for second in range(start, min(start + width, last + 1)):
+                    bucket = self.buckets.get(second, empty)
+                    requests += bucket.count
+                    errors += bucket.errors
+                    burst_requests += self.burst_sends.get(second, 0)
+                    histogram.merge(bucket.histogram)
+                phase = self._phase(start, width, requests, burst_requests, ramp_up_end)
+                if width == 1:
+                    phase_histograms[phase].merge(histogram)
+                    totals = phase_totals[phase]
+                    totals[0] += 1
+                    totals[1] += requests
+                    totals[2] += errors
+                
+                interval = {
+                    "start": start,
+                    "offset_seconds": start - first,
+                    "phase": phase,
+                    "requests": requests,
+                    "rps": requests / width,
+                    "error_rate": errors / requests if requests else 0.0,
+                    "burst_requests": burst_requests,
+                    "avg_latency": histogram.mean,
+                    "p50_latency": histogram.percentile(50),
+                    "p95_latency": histogram.percentile(95),
+                    "p99_latency": histogram.percentile(99),
+                    "max_latency": histogram.max_value
+                }
+                # A sample covers the collection interval that ends at its timestamp
+                samples = system_samples[bisect.bisect_right(sample_times, start):
+                                         bisect.bisect_right(sample_times, start + width)]
+                if samples:
+                    interval["system"] = self._system_summary(samples)
+                intervals.append(interval)
+            series[f"{width}s"] = intervals
+        
+        return {
+            "intervals": series,
+            "phases": {
+                phase: {
+                    "seconds": seconds,
+                    "requests": requests,
+                    "rps": requests / seconds,
+                    "error_rate": errors / requests if requests else 0.0,
+                    "avg_latency": phase_histograms[phase].mean,
+                    **{f"{key}_latency": value for key, value in phase_histograms[phase].percentiles().items()}
+                }
+                for phase, (seconds, requests, errors) in phase_totals.items() if seconds
+            }
+        }
+
+class RunStatistics:
+    """Counters and latency histograms behind the infrastructure report
+    
+    Updated incrementally per result, so the report never rescans raw results.
+    Snapshots are plain JSON-safe dicts that can be merged, which is how stats
+    from agents, intervals or replayed streams are combined into one report.
+    """
+    
+    def __init__(self):
+        self.totals = {
+            "requests": 0,
+            "successful": 0,
+            "errors": 0,
+            "reused_connections": 0,
+            "new_connections": 0,
+            "streamed_requests": 0,
+            "stream_chunks": 0,
+            "stream_seconds": 0.0,
+            "stream_stalls": 0,
+            "stalled_requests": 0,
+            "request_bytes": 0,
+            "response_bytes": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "attempts": 0,  # Network attempts, retries included
+            "retried_requests": 0,
+            "short_circuited": 0  # Failed fast by the client circuit breaker
+        }
+        self.error_breakdown: Dict[str, int] = defaultdict(int)
+        self.latency_histograms = {
+            "total_latency": LatencyHistogram(),  # Successful requests only
+            "first_byte_time": LatencyHistogram(),
+            "attempt_latency": LatencyHistogram(),  # Final attempt only, retries and backoff excluded
+            "retried_total_latency": LatencyHistogram()  # Requests that needed a retry
+        }
+        # Per-phase distributions (only requests where the phase occurred)
+        self.phase_histograms = {
+            "dns_resolution_time": LatencyHistogram(),
+            "pool_wait_time": LatencyHistogram(),
+            "connection_time": LatencyHistogram(),
+            "request_send_time": LatencyHistogram(),
+            "first_byte_time": LatencyHistogram(),
+            "download_time": LatencyHistogram()
+        }
+        # Streaming response distributions; inter_chunk_gap holds every gap of every stream
+        self.stream_histograms = {
+            "time_to_first_chunk": LatencyHistogram(),
+            "inter_chunk_gap": LatencyHistogram(),
+            "max_inter_chunk_gap": LatencyHistogram(),
+            "stream_duration": LatencyHistogram()
+        }
+        # Per-endpoint counters and latency (successful requests), keyed by EndpointTable index
+        self.endpoint_totals: Dict[int, Dict[str, int]] = defaultdict(self._empty_endpoint_totals)
+        self.endpoint_histograms: Dict[int, LatencyHistogram] = defaultdict(LatencyHistogram)
+        # Cache hit/miss latency per (endpoint index, hit) and hit rate per time bucket (successful requests)
+        self.cache_histograms: Dict[Tuple[int, bool], LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.cache_timeline: Dict[int, List[int]] = defaultdict(lambda: [0, 0])  # bucket start -> [responses, hits]
+        self.cache_totals = {"keyed_responses": 0, "keyed_hits": 0, "unkeyed_responses": 0, "unkeyed_hits": 0}
+        # Per-second buckets and phase marks for the report's time series
+        self.timeline = TimeSeries()
+        # Per-tenant counters and latency (successful requests), keyed by tenant name
+        self.tenant_totals: Dict[str, Dict[str, float]] = defaultdict(self._empty_tenant_totals)
+        self.tenant_histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+    
+    CACHE_TIMELINE_SECONDS = 5
+    
+    @staticmethod
+    def _empty_endpoint_totals() -> Dict[str, int]:
+        return {"requests": 0, "errors": 0, "rate_limited": 0, "request_bytes": 0, "response_bytes": 0}
+    
+    @staticmethod
+    def _empty_tenant_totals() -> Dict[str, float]:
+        return {"requests": 0, "successful": 0, "errors": 0, "rate_limited": 0, "throttled": 0, "throttle_seconds": 0.0}
+    
+    def record(self, result: APITestResult):
+        totals = self.totals
+        self.timeline.record(result)
+        totals["requests"] += 1
+        totals["request_bytes"] += result.request_size
+        totals["response_bytes"] += result.response_size
+        totals["reused_connections"] += result.connection_reused
+        if result.connection_time > 0 and not result.connection_reused:
+            totals["new_connections"] += 1
+        totals["rate_limited"] += result.rate_limited
+        if result.error_type == "timeout":
+            totals["timeouts"] += 1
+        totals["attempts"] += result.retry_count + (not result.circuit_breaker_open)
+        totals["retried_requests"] += result.retry_count > 0
+        totals["short_circuited"] += result.circuit_breaker_open
+        if 200 <= result.status_code < 300:
+            totals["successful"] += 1
+        elif result.status_code >= 400:
+            totals["errors"] += 1
+            self.error_breakdown[result.error_type] += 1
+        
+        if 200 <= result.status_code < 300:
+            self.latency_histograms["total_latency"].record(result.total_latency)
+            self.latency_histograms["first_byte_time"].record(result.first_byte_time)
+            self.latency_histograms["attempt_latency"].record(result.attempt_latency or result.total_latency)
+            if result.retry_count:
+                self.latency_histograms["retried_total_latency"].record(result.total_latency)
+        for phase, histogram in self.phase_histograms.items():
+            value = getattr(result, phase)
+            if value > 0:
+                histogram.record(value)
+        
+        if result.stream_chunks:
+            totals["streamed_requests"] += 1
+            totals["stream_chunks"] += result.stream_chunks
+            totals["stream_seconds"] += result.stream_duration
+            totals["stream_stalls"] += result.stream_stalls
+            totals["stalled_requests"] += result.stream_stalls > 0
+            self.stream_histograms["time_to_first_chunk"].record(result.time_to_first_chunk)
+            self.stream_histograms["max_inter_chunk_gap"].record(result.max_inter_chunk_gap)
+            if result.chunk_gaps:
+                self.stream_histograms["inter_chunk_gap"].merge(result.chunk_gaps)
+            self.stream_histograms["stream_duration"].record(result.stream_duration)
+        
+        if result.endpoint_index >= 0:
+            endpoint_totals = self.endpoint_totals[result.endpoint_index]
+            endpoint_totals["requests"] += 1
+            endpoint_totals["request_bytes"] += result.request_size
+            endpoint_totals["response_bytes"] += result.response_size
+            endpoint_totals["rate_limited"] += result.rate_limited
+            if result.status_code >= 400:
+                endpoint_totals["errors"] += 1
+            elif 200 <= result.status_code < 300:
+                self.endpoint_histograms[result.endpoint_index].record(result.total_latency)
+        
+        if result.tenant:
+            tenant_totals = self.tenant_totals[result.tenant]
+            tenant_totals["requests"] += 1
+            tenant_totals["rate_limited"] += result.rate_limited
+            tenant_totals["throttled"] += result.throttle_wait > 0
+            tenant_totals["throttle_seconds"] += result.throttle_wait
+            if result.status_code >= 400:
+                tenant_totals["errors"] += 1
+            elif 200 <= result.status_code < 300:
+                tenant_totals["successful"] += 1
+                self.tenant_histograms[result.tenant].record(result.total_latency)
+        
+        if 200 <= result.status_code < 300:
+            if result.endpoint_index >= 0:
+                self.cache_histograms[(result.endpoint_index, result.cache_hit)].record(result.total_latency)
+            completed = result.timestamp + result.total_latency
+            bucket = self.cache_timeline[int(completed // self.CACHE_TIMELINE_SECONDS) * self.CACHE_TIMELINE_SECONDS]
+            bucket[0] += 1
+            bucket[1] += result.cache_hit
+            prefix = "keyed" if result.cache_key >= 0 else "unkeyed"
+            self.cache_totals[f"{prefix}_responses"] += 1
+            self.cache_totals[f"{prefix}_hits"] += result.cache_hit
+    
+    def _histogram_groups(self) -> Dict[str, Dict[str, LatencyHistogram]]:
+        return {
+            "latency": self.latency_histograms,
+            "phase": self.phase_histograms,
+            "stream": self.stream_histograms
+        }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "totals": dict(self.totals),
+            "error_breakdown": dict(self.error_breakdown),
+            "histograms": {
+                group: {name: histogram.to_dict() for name, histogram in histograms.items() if histogram.count}
+                for group, histograms in self._histogram_groups().items()
+            },
+            # JSON object keys are strings; merge_snapshot converts them back to indexes
+            "endpoints": {
+                str(index): {
+                    "totals": dict(totals),
+                    "latency": self.endpoint_histograms[index].to_dict() if index in self.endpoint_histograms else None
+                }
+                for index, totals in self.endpoint_totals.items()
+            },
+            "cache": {
+                "totals": dict(self.cache_totals),
+                "timeline": {str(bucket): counts for bucket, counts in self.cache_timeline.items()},
+                "histograms": {f"{index}:{int(hit)}": histogram.to_dict()
+                               for (index, hit), histogram in self.cache_histograms.items()}
+            },
+            "timeline": self.timeline.snapshot(),
+            "tenants": {
+                name: {
+                    "totals": dict(totals),
+                    "latency": self.tenant_histograms[name].to_dict() if name in self.tenant_histograms else None
+                }
+                for name, totals in self.tenant_totals.items()
+            }
+        }
+    
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        for key, value in snapshot["totals"].items():
+            self.totals[key] = self.totals.get(key, 0) + value
+        for error_type, count in snapshot["error_breakdown"].items():
+            self.error_breakdown[error_type] += count
+        groups = self._histogram_groups()
+        for group, histograms in snapshot["histograms"].items():
+            for name, data in histograms.items():
+                target = groups[group].get(name)
+                if target is None:
+                    target = groups[group][name] = LatencyHistogram(data["precision_bits"])
+                target.merge(LatencyHistogram.from_dict(data))
+        for index, endpoint in snapshot.get("endpoints", {}).items():
+            totals = self.endpoint_totals[int(index)]
+            for key, value in endpoint["totals"].items():
+                totals[key] += value
+            if endpoint["latency"]:
+                self.endpoint_histograms[int(index)].merge(LatencyHistogram.from_dict(endpoint["latency"]))
+        cache = snapshot.get("cache")
+        if cache:
+            for key, value in cache["totals"].items():
+                self.cache_totals[key] += value
+            for bucket, (responses, hits) in cache["timeline"].items():
+                counts = self.cache_timeline[int(bucket)]
+                counts[0] += responses
+                counts[1] += hits
+            for key, data in cache["histograms"].items():
+                index, hit = key.split(":")
+                self.cache_histograms[(int(index), hit == "1")].merge(LatencyHistogram.from_dict(data))
+        if "timeline" in snapshot:
+            self.timeline.merge_snapshot(snapshot["timeline"])
+        for name, tenant in snapshot.get("tenants", {}).items():
+            totals = self.tenant_totals[name]
+            for key, value in tenant["totals"].items():
+                totals[key] += value
+            if tenant["latency"]:
+                self.tenant_histograms[name].merge(LatencyHistogram.from_dict(tenant["latency"]))
+
 class ConnectionPoolMonitor:
     """Monitor connection pool health and performance"""
     
@@ -220,11 +1529,12 @@ class ConnectionPoolMonitor:
         self.total_connections = 0
         
     def record_connection(self, connection_time: float, reused: bool):
-        """Record connection metrics"""
-        self.connection_times.append(connection_time)
+        """Record connection metrics (connect time only counts newly opened connections)"""
         self.total_connections += 1
         if reused:
             self.reuse_count += 1
+        elif connection_time > 0:
+            self.connection_times.append(connection_time)
             
         # Update stats
         if self.connection_times:
@@ -233,74 +1543,1321 @@ class ConnectionPoolMonitor:
         if self.total_connections > 0:
             self.pool_stats["connection_reuse_rate"] = self.reuse_count / self.total_connections
 
-class SystemMetricsCollector:
-    """Collect system-level metrics during testing"""
+class RequestTrace:
+    """Per-request phase timestamps (perf_counter) filled in by TraceConfig hooks"""
+    
+    __slots__ = ("request_start", "queued_start", "queued_end", "dns_start", "dns_end",
+                 "connect_start", "connect_end", "connection_ready", "reused",
+                 "request_sent", "response_start", "last_chunk")
     
     def __init__(self):
-        self.metrics_history = []
-        self.collection_interval = 5.0  # seconds
-        self.collecting = False
-        self._collection_task = None
-        
-    async def start_collection(self):
-        """Start collecting system metrics"""
-        self.collecting = True
-        self._collection_task = asyncio.create_task(self._collect_loop())
-        
-    async def stop_collection(self):
-        """Stop collecting system metrics"""
-        self.collecting = False
-        if self._collection_task:
-            self._collection_task.cancel()
-            try:
-                await self._collection_task
-            except asyncio.CancelledError:
-                pass
+        for name in self.__slots__:
+            setattr(self, name, 0.0)
+        self.reused = False
     
-    async def _collect_loop(self):
-        """Main collection loop"""
-        while self.collecting:
-            try:
-                metrics = {
-                    "timestamp": time.time(),
-                    "cpu_percent": psutil.cpu_percent(interval=1),
-                    "memory_percent": psutil.virtual_memory().percent,
-                    "memory_used_mb": psutil.virtual_memory().used / 1024 / 1024,
-                    "network_connections": len(psutil.net_connections()),
-                    "open_files": len(psutil.Process().open_files()) if hasattr(psutil.Process(), 'open_files') else 0
-                }
-                self.metrics_history.append(metrics)
-                await asyncio.sleep(self.collection_interval)
-            except Exception as e:
-                logger.warning(f"Error collecting system metrics: {e}")
+    def apply(self, result: APITestResult):
+        """Copy measured phase durations onto a result"""
+        if self.dns_end:
+            result.dns_resolution_time = self.dns_end - self.dns_start
+        if self.connect_end:
+            # aiohttp performs the TCP and TLS handshakes in one step, so for https
+            # this phase includes TLS; there is no hook to time TLS on its own.
+            result.connection_time = self.connect_end - self.connect_start
+        if self.queued_end:
+            result.pool_wait_time = self.queued_end - self.queued_start
+        if self.request_sent and self.connection_ready:
+            result.request_send_time = self.request_sent - self.connection_ready
+        result.connection_reused = self.reused
 
-class APIInfrastructureTester:
-    """Main tester focused on API infrastructure performance"""
+def build_trace_config() -> aiohttp.TraceConfig:
+    """TraceConfig whose hooks record phase timestamps into a RequestTrace"""
+    clock = time.perf_counter
     
-    def __init__(self, config: LoadTestConfig):
+    async def on_request_start(session, ctx, params):
+        ctx.trace_request_ctx.request_start = clock()
+    
+    async def on_connection_queued_start(session, ctx, params):
+        ctx.trace_request_ctx.queued_start = clock()
+    
+    async def on_connection_queued_end(session, ctx, params):
+        ctx.trace_request_ctx.queued_end = clock()
+    
+    async def on_dns_resolvehost_start(session, ctx, params):
+        ctx.trace_request_ctx.dns_start = clock()
+    
+    async def on_dns_resolvehost_end(session, ctx, params):
+        ctx.trace_request_ctx.dns_end = clock()
+    
+    async def on_connection_create_start(session, ctx, params):
+        ctx.trace_request_ctx.connect_start = clock()
+    
+    async def on_connection_create_end(session, ctx, params):
+        trace = ctx.trace_request_ctx
+        trace.connect_end = trace.connection_ready = clock()
+    
+    async def on_connection_reuseconn(session, ctx, params):
+        trace = ctx.trace_request_ctx
+        trace.reused = True
+        trace.connection_ready = clock()
+    
+    async def on_request_sent(session, ctx, params):
+        ctx.trace_request_ctx.request_sent = clock()
+    
+    async def on_request_end(session, ctx, params):
+        ctx.trace_request_ctx.response_start = clock()
+    
+    async def on_response_chunk_received(session, ctx, params):
+        ctx.trace_request_ctx.last_chunk = clock()
+    
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=_RequestTraceContext)
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_queued_start.append(on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(on_connection_queued_end)
+    trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_request_headers_sent.append(on_request_sent)
+    trace_config.on_request_chunk_sent.append(on_request_sent)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    return trace_config
+
+class AiohttpTransport:
+    """HTTP/1.1 keep-alive pool: one request per connection at a time (aiohttp)"""
+    
+    name = "http1"
+    
+    def __init__(self, config: "LoadTestConfig", headers: Dict[str, str], timeout: aiohttp.ClientTimeout):
         self.config = config
-        self.payload_generator = PayloadGenerator()
-        self.connection_monitor = ConnectionPoolMonitor()
-        self.system_monitor = SystemMetricsCollector()
-        self.results: List[APITestResult] = []
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.active_connections = 0
-        self.endpoint_stats = defaultdict(list)
-        self.real_time_stats = {
-            "requests_per_second": deque(maxlen=60),
-            "error_rate": deque(maxlen=60),
-            "avg_latency": deque(maxlen=60)
-        }
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=config.connection_pool_size,
+                limit_per_host=config.max_connections_per_host,
+                keepalive_timeout=config.keep_alive_timeout,
+                enable_cleanup_closed=True,
+                force_close=not config.test_connection_reuse
+            ),
+            timeout=timeout,
+            headers=headers,
+            trace_configs=[build_trace_config()] if config.trace_request_phases else None
+        )
+        self.peak_open_connections = 0
+    
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, url: str, data: bytes, trace: Optional[RequestTrace] = None,
+                      headers: Optional[Dict[str, str]] = None):
+        async with self.session.request(method, url, data=data, headers=headers, trace_request_ctx=trace) as response:
+            # The pool only grows when a connection is opened for a request, so sampling
+            # once the request holds its connection catches the peak
+            counts = self._pool_counts()
+            if counts and sum(counts) > self.peak_open_connections:
+                self.peak_open_connections = sum(counts)
+            yield response
+    
+    @staticmethod
+    def http_version(response: aiohttp.ClientResponse) -> str:
+        return f"{response.version.major}.{response.version.minor}"
+    
+    @property
+    def max_connections(self) -> int:
+        return min(self.config.connection_pool_size, self.config.max_connections_per_host)
+    
+    def summary(self, totals: Dict[str, int]) -> Dict[str, Any]:
+        return {
+            "transport": self.name,
+            "connections_opened": totals["new_connections"],
+            "peak_open_connections": self.peak_open_connections,
+            "max_connections": self.max_connections,
+            "streams_per_connection": 1
+        }
+    
+    def _pool_counts(self) -> Optional[Tuple[int, int]]:
+        """(idle, active) connections, or None if the connector's pools can't be read
         
-    async def __aenter__(self):
-        # Configure connector for infrastructure testing
-        connector = aiohttp.TCPConnector(
-            limit=self.config.connection_pool_size,
-            limit_per_host=self.config.max_connections_per_host,
-            keepalive_timeout=self.config.keep_alive_timeout,
-            enable_cleanup_closed=True,
-            force_close=not self.config.test_connection_reuse
+        aiohttp's connector has no public API for this; its private pools are
+        read defensively so a connector that lacks them degrades instead of
+        raising.
+        """
+        connector = self.session.connector
+        conns, acquired = getattr(connector, "_conns", None), getattr(connector, "_acquired", None)
+        try:
+            return sum(len(connections) for connections in conns.values()), len(acquired)
+        except (AttributeError, TypeError):
+            return None
+    
+    def pool_state(self) -> Dict[str, Any]:
+        """Connections open right now, or "unknown" counts"""
+        counts = self._pool_counts()
+        if counts is None:
+            return {"open_connections": "unknown", "idle_connections": "unknown",
+                    "active_connections": "unknown", "max_connections": self.max_connections}
+        idle, active = counts
+        return {"open_connections": idle + active, "idle_connections": idle, "active_connections": active,
+                "max_connections": self.max_connections}
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {"peak_open_connections": self.peak_open_connections}
+    
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        """Fold in a worker's transport state (peaks add up: generators hold their pools concurrently)"""
+        self.peak_open_connections += snapshot.get("peak_open_connections", 0)
+    
+    async def close(self):
+        await self.session.close()
+
+class _HTTP2Connection:
+    """One multiplexed HTTP/2 connection (an httpx client limited to a single socket)"""
+    
+    __slots__ = ("client", "streams", "pending", "active", "completed")
+    
+    def __init__(self, client, streams_per_connection: int):
+        self.client = client
+        self.streams = asyncio.Semaphore(streams_per_connection)
+        self.pending = 0  # Requests waiting for or holding a stream
+        self.active = 0  # Requests holding a stream
+        self.completed = 0
+
+class _HTTP2Response:
+    """The slice of aiohttp's ClientResponse that make_api_request reads, over an httpx response"""
+    
+    __slots__ = ("_response", "status", "headers", "version", "content")
+    
+    def __init__(self, response):
+        self._response = response
+        self.status = response.status_code
+        self.headers = response.headers
+        self.version = response.http_version
+        self.content = self
+    
+    def iter_any(self):
+        return self._response.aiter_raw()
+    
+    async def text(self) -> str:
+        await self._response.aread()
+        return self._response.text
+
+class HTTP2Transport:
+    """HTTP/2 via httpx: requests are streams multiplexed over a few connections
+    
+    Connections open on demand (the least loaded one is picked, a new one is
+    opened while all are busy) and each admits http2_streams_per_connection
+    concurrent streams. Time spent waiting for a free stream is recorded as
+    pool_wait_time, the same phase HTTP/1.1 spends queued for a connection,
+    and latency is bucketed by how many streams shared the connection, which
+    is where head-of-line blocking on the shared TCP stream shows up.
+    """
+    
+    name = "http2"
+    STREAM_BUCKETS = ((1, "1"), (4, "2-4"), (16, "5-16"), (64, "17-64"), (float("inf"), "65+"))
+    
+    def __init__(self, config: "LoadTestConfig", headers: Dict[str, str], timeout: aiohttp.ClientTimeout):
+        if httpx is None:
+            raise ValueError("The http2 transport requires the 'httpx[http2]' package")
+        self.config = config
+        self.headers = headers
+        self.timeout = httpx.Timeout(timeout.total, connect=timeout.connect, read=timeout.sock_read)
+        self.connections: List[_HTTP2Connection] = []
+        self.connections_opened = 0
+        self.peak_open_connections = 0  # Connections are kept for the whole run
+        self.peak_streams = 0
+        self.stream_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+    
+    def _select_connection(self) -> _HTTP2Connection:
+        connection = min(self.connections, key=lambda c: c.pending) if self.connections else None
+        if connection is None or (connection.pending and len(self.connections) < self.config.http2_connections):
+            connection = _HTTP2Connection(
+                httpx.AsyncClient(http2=True, headers=self.headers, timeout=self.timeout,
+                                  limits=httpx.Limits(max_connections=1, max_keepalive_connections=1)),
+                self.config.http2_streams_per_connection)
+            self.connections.append(connection)
+            self.connections_opened += 1
+            self.peak_open_connections = max(self.peak_open_connections, len(self.connections))
+        return connection
+    
+    def _stream_bucket(self, streams: int) -> str:
+        for limit, label in self.STREAM_BUCKETS:
+            if streams <= limit:
+                return label
+    
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, url: str, data: bytes, trace: Optional[RequestTrace] = None,
+                      headers: Optional[Dict[str, str]] = None):
+        connection = self._select_connection()
+        connection.pending += 1
+        queued = time.perf_counter()
+        try:
+            async with connection.streams:
+                if trace is not None:
+                    trace.queued_start, trace.queued_end = queued, time.perf_counter()
+                    trace.reused = connection.completed > 0
+                connection.active += 1
+                streams = connection.active
+                self.peak_streams = max(self.peak_streams, streams)
+                started = time.perf_counter()
+                try:
+                    async with connection.client.stream(method, url, content=data, headers=headers) as response:
+                        yield _HTTP2Response(response)
+                except httpx.TimeoutException as e:
+                    raise asyncio.TimeoutError(str(e)) from e
+                except httpx.TransportError as e:
+                    raise aiohttp.ClientConnectionError(str(e)) from e
+                finally:
+                    connection.active -= 1
+                self.stream_latency[self._stream_bucket(streams)].record(time.perf_counter() - started)
+                connection.completed += 1
+        finally:
+            connection.pending -= 1
+    
+    @staticmethod
+    def http_version(response: _HTTP2Response) -> str:
+        return response.version.replace("HTTP/", "")
+    
+    @property
+    def max_connections(self) -> int:
+        return self.config.http2_connections
+    
+    def pool_state(self) -> Dict[str, Any]:
+        active = sum(1 for connection in self.connections if connection.pending)
+        return {"open_connections": len(self.connections), "idle_connections": len(self.connections) - active,
+                "active_connections": active, "max_connections": self.max_connections}
+    
+    def summary(self, totals: Dict[str, int]) -> Dict[str, Any]:
+        return {
+            "transport": self.name,
+            "connections_opened": self.connections_opened,
+            "peak_open_connections": self.peak_open_connections,
+            "max_connections": self.max_connections,
+            "streams_per_connection": self.config.http2_streams_per_connection,
+            "peak_streams_per_connection": self.peak_streams,
+            "latency_by_concurrent_streams": {
+                label: {"requests": self.stream_latency[label].count, "avg": self.stream_latency[label].mean,
+                        **self.stream_latency[label].percentiles()}
+                for _, label in self.STREAM_BUCKETS if label in self.stream_latency
+            }
+        }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "connections_opened": self.connections_opened,
+            "peak_open_connections": self.peak_open_connections,
+            "peak_streams": self.peak_streams,
+            "stream_latency": {label: histogram.to_dict() for label, histogram in self.stream_latency.items()}
+        }
+    
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        """Fold in a worker's transport state"""
+        self.connections_opened += snapshot["connections_opened"]
+        self.peak_open_connections += snapshot.get("peak_open_connections", 0)
+        self.peak_streams = max(self.peak_streams, snapshot["peak_streams"])
+        for label, data in snapshot["stream_latency"].items():
+            self.stream_latency[label].merge(LatencyHistogram.from_dict(data))
+    
+    async def close(self):
+        await asyncio.gather(*(connection.client.aclose() for connection in self.connections))
+
+TRANSPORTS = {"http1": AiohttpTransport, "http2": HTTP2Transport}
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class OpenMetricsExporter:
+    """Live OpenMetrics endpoint for a running test
+    
+    Completed requests are folded into counters and fixed-bucket latency
+    histograms as they are recorded, labelled by endpoint, status class and
+    error type; a scrape only formats that state, so its cost depends on the
+    number of label combinations, never on the number of requests. Counters
+    keep counting across capacity-search steps, as Prometheus expects.
+    """
+    
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+    
+    def __init__(self, tester: "APIInfrastructureTester"):
+        self.tester = tester
+        self.requests: Dict[Tuple[int, str, str], int] = defaultdict(int)  # (endpoint, status class, error) -> count
+        self.latency: Dict[Tuple[int, str], List[Any]] = {}  # (endpoint, status class) -> [bucket counts, sum]
+        self.bytes: Dict[int, List[int]] = defaultdict(lambda: [0, 0])  # endpoint -> [sent, received]
+        self.runner: Optional[web.AppRunner] = None
+        self.port = 0  # Bound port (differs from the requested one when that is 0)
+    
+    def record(self, result: APITestResult):
+        status_class = f"{result.status_code // 100}xx" if result.status_code else "none"
+        self.requests[(result.endpoint_index, status_class, result.error_type or "none")] += 1
+        key = (result.endpoint_index, status_class)
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = [[0] * (len(self.BUCKETS) + 1), 0.0]
+        latency[0][bisect.bisect_left(self.BUCKETS, result.total_latency)] += 1
+        latency[1] += result.total_latency
+        transferred = self.bytes[result.endpoint_index]
+        transferred[0] += result.request_size
+        transferred[1] += result.response_size
+    
+    def _endpoint(self, index: int) -> str:
+        table = self.tester.endpoint_table
+        return _label_value(table.label(index) if 0 <= index < len(table.entries) else "unknown")
+    
+    def exposition(self) -> str:
+        config = self.tester.config
+        lines = [
+            "# TYPE loadtest info",
+            "# HELP loadtest Load test being run.",
+            f'loadtest_info{{scenario="{_label_value(config.scenario_name)}",load_model="{config.load_model}",'
+            f'transport="{config.transport}"}} 1',
+            "# TYPE loadtest_requests counter",
+            "# HELP loadtest_requests Completed requests.",
+        ]
+        for (index, status_class, error_type), count in sorted(self.requests.items()):
+            lines.append(f'loadtest_requests_total{{endpoint="{self._endpoint(index)}",status_class="{status_class}",'
+                         f'error_type="{_label_value(error_type)}"}} {count}')
+        
+        lines += [
+            "# TYPE loadtest_request_duration_seconds histogram",
+            "# UNIT loadtest_request_duration_seconds seconds",
+            "# HELP loadtest_request_duration_seconds End-to-end request latency.",
+        ]
+        bounds = [f"{bound:g}" for bound in self.BUCKETS] + ["+Inf"]
+        for (index, status_class), (counts, total) in sorted(self.latency.items()):
+            labels = f'endpoint="{self._endpoint(index)}",status_class="{status_class}"'
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'loadtest_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"loadtest_request_duration_seconds_count{{{labels}}} {cumulative}")
+            lines.append(f"loadtest_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+        
+        for direction, position in (("sent", 0), ("received", 1)):
+            lines += [f"# TYPE loadtest_{direction}_bytes counter", f"# UNIT loadtest_{direction}_bytes bytes",
+                      f"# HELP loadtest_{direction}_bytes Body bytes {direction}."]
+            for index, transferred in sorted(self.bytes.items()):
+                lines.append(f'loadtest_{direction}_bytes_total{{endpoint="{self._endpoint(index)}"}} '
+                             f'{transferred[position]}')
+        
+        lines += [
+            "# TYPE loadtest_in_flight_requests gauge",
+            "# HELP loadtest_in_flight_requests Requests sent and not yet completed.",
+            f"loadtest_in_flight_requests {self.tester.in_flight_requests}",
+            "# EOF"
+        ]
+        return "\n".join(lines) + "\n"
+    
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.exposition().encode(), headers={"Content-Type": self.CONTENT_TYPE})
+    
+    async def start(self, host: str, port: int):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        self.port = self.runner.addresses[0][1]
+        logger.info(f"Serving live OpenMetrics on http://{host}:{self.port}/metrics")
+    
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+class _RequestTraceContext:
+    """Minimal trace context; requests made without a RequestTrace get a throwaway one"""
+    
+    __slots__ = ("trace_request_ctx",)
+    
+    def __init__(self, trace_request_ctx=None):
+        self.trace_request_ctx = trace_request_ctx if trace_request_ctx is not None else RequestTrace()
+
+class SystemMetricsCollector:
+    """Collect system-level metrics during testing without blocking the event loop
+    
+    Resource samples (CPU, RSS, fds, TCP states) are read from /proc on a
+    daemon thread; psutil's non-blocking calls are the fallback elsewhere.
+    A small probe task on the loop measures event-loop lag and gc.callbacks
+    times garbage collection pauses, so client-side stalls can be told apart
+    from server latency.
+    """
+    
+    TCP_STATES = {
+        "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1",
+        "05": "FIN_WAIT2", "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT",
+        "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING"
+    }
+    
+    def __init__(self, collection_interval: float = 1.0, lag_probe_interval: float = 0.05):
+        self.metrics_history = []
+        self.collection_interval = collection_interval  # seconds
+        self.lag_probe_interval = lag_probe_interval
+        self.collecting = False
+        self.use_proc = os.path.exists("/proc/self/stat")
+        self.loop_lag_histogram = LatencyHistogram()
+        self.gc_pause_histogram = LatencyHistogram()
+        self._lock = threading.RLock()  # Re-entrant: a GC callback may fire while the lock is held
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lag_task = None
+        self._gc_started = 0.0
+        self._interval = self._empty_interval()
+        self._clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._last_cpu: Optional[Tuple[float, float, float, float]] = None
+        self._process = psutil.Process()
+    
+    @staticmethod
+    def _empty_interval() -> Dict[str, float]:
+        return {"lag_max": 0.0, "lag_total": 0.0, "lag_count": 0, "gc_pause": 0.0, "gc_max": 0.0, "gc_count": 0}
+    
+    async def start_collection(self):
+        """Start collecting system metrics"""
+        self.collecting = True
+        self._stop_event.clear()
+        gc.callbacks.append(self._on_gc)
+        self._lag_task = asyncio.create_task(self._lag_probe())
+        self._thread = threading.Thread(target=self._sample_loop, name="system-metrics", daemon=True)
+        self._thread.start()
+        
+    async def stop_collection(self):
+        """Stop collecting system metrics"""
+        self.collecting = False
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self._lag_task:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+        if self._thread:
+            self._stop_event.set()
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+    
+    def _on_gc(self, phase: str, info: Dict[str, Any]):
+        """gc.callbacks hook: time each collection (runs in the collecting thread)"""
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started:
+            pause = time.perf_counter() - self._gc_started
+            self._gc_started = 0.0
+            with self._lock:
+                self.gc_pause_histogram.record(pause)
+                self._interval["gc_pause"] += pause
+                self._interval["gc_max"] = max(self._interval["gc_max"], pause)
+                self._interval["gc_count"] += 1
+    
+    async def _lag_probe(self):
+        """Measure how late the loop wakes a sleeping task"""
+        while True:
+            expected = time.perf_counter() + self.lag_probe_interval
+            await asyncio.sleep(self.lag_probe_interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            with self._lock:
+                self.loop_lag_histogram.record(lag)
+                self._interval["lag_max"] = max(self._interval["lag_max"], lag)
+                self._interval["lag_total"] += lag
+                self._interval["lag_count"] += 1
+    
+    def _sample_loop(self):
+        """Collection thread: sample at the configured rate until stopped"""
+        while not self._stop_event.wait(self.collection_interval):
+            try:
+                metrics = self._sample_proc() if self.use_proc else self._sample_psutil()
+                with self._lock:
+                    interval, self._interval = self._interval, self._empty_interval()
+                metrics.update({
+                    "loop_lag_max_ms": interval["lag_max"] * 1000,
+                    "loop_lag_mean_ms": interval["lag_total"] / interval["lag_count"] * 1000 if interval["lag_count"] else 0.0,
+                    "gc_collections": interval["gc_count"],
+                    "gc_pause_ms": interval["gc_pause"] * 1000,
+                    "gc_max_pause_ms": interval["gc_max"] * 1000
+                })
+                self.metrics_history.append(metrics)
+            except Exception as e:
+                logger.warning(f"Error collecting system metrics: {e}")
+    
+    def _sample_proc(self) -> Dict[str, Any]:
+        """One sample read straight from /proc (no process or socket table scans)"""
+        now = time.monotonic()
+        with open("/proc/stat") as f:
+            cpu_fields = [float(value) for value in f.readline().split()[1:]]
+        system_busy = sum(cpu_fields) - cpu_fields[3] - (cpu_fields[4] if len(cpu_fields) > 4 else 0.0)
+        system_total = sum(cpu_fields)
+        with open("/proc/self/stat") as f:
+            stat = f.read().rsplit(")", 1)[1].split()
+        process_cpu = (float(stat[11]) + float(stat[12])) / self._clock_ticks
+        
+        cpu_percent = process_cpu_percent = 0.0
+        if self._last_cpu:
+            last_now, last_busy, last_total, last_process = self._last_cpu
+            if system_total > last_total:
+                cpu_percent = (system_busy - last_busy) / (system_total - last_total) * 100
+            if now > last_now:
+                process_cpu_percent = (process_cpu - last_process) / (now - last_now) * 100
+        self._last_cpu = (now, system_busy, system_total, process_cpu)
+        
+        meminfo = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = float(value.split()[0]) * 1024
+        memory_total = meminfo.get("MemTotal", 0.0)
+        memory_used = memory_total - meminfo.get("MemAvailable", meminfo.get("MemFree", 0.0))
+        
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * self._page_size
+        
+        tcp_states = self._tcp_states()
+        return {
+            "timestamp": time.time(),
+            "cpu_percent": cpu_percent,
+            "process_cpu_percent": process_cpu_percent,
+            "memory_percent": memory_used / memory_total * 100 if memory_total else 0.0,
+            "memory_used_mb": memory_used / 1024 / 1024,
+            "rss_mb": rss / 1024 / 1024,
+            "open_files": len(os.listdir("/proc/self/fd")),
+            "network_connections": sum(tcp_states.values()),
+            "tcp_states": tcp_states
+        }
+    
+    def _tcp_states(self) -> Dict[str, int]:
+        """Count sockets by TCP state from /proc/net/tcp{,6}"""
+        states: Dict[str, int] = defaultdict(int)
+        for path in ("/proc/net/tcp", "/proc/net/tcp6"):
+            try:
+                with open(path) as f:
+                    next(f, None)
+                    for line in f:
+                        parts = line.split(None, 4)
+                        if len(parts) > 3:
+                            states[self.TCP_STATES.get(parts[3], parts[3])] += 1
+            except OSError:
+                continue
+        return dict(states)
+    
+    def _sample_psutil(self) -> Dict[str, Any]:
+        """Fallback sample for platforms without /proc, using only non-blocking psutil calls"""
+        memory = psutil.virtual_memory()
+        return {
+            "timestamp": time.time(),
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "process_cpu_percent": self._process.cpu_percent(interval=None),
+            "memory_percent": memory.percent,
+            "memory_used_mb": memory.used / 1024 / 1024,
+            "rss_mb": self._process.memory_info().rss / 1024 / 1024,
+            "open_files": self._process.num_fds() if hasattr(self._process, "num_fds") else 0,
+            "network_connections": 0,
+            "tcp_states": {}
+        }
+    
+    def summary(self) -> Dict[str, Any]:
+        """Peaks and averages over the run's samples for the report"""
+        history = self.metrics_history
+        lag = self.loop_lag_histogram
+        gc_pauses = self.gc_pause_histogram
+        return {
+            "peak_memory_mb": max([m["memory_used_mb"] for m in history], default=0),
+            "avg_cpu_percent": statistics.mean([m["cpu_percent"] for m in history]) if history else 0,
+            "peak_connections": max([m["network_connections"] for m in history], default=0),
+            "avg_process_cpu_percent": statistics.mean([m["process_cpu_percent"] for m in history]) if history else 0,
+            "peak_rss_mb": max([m["rss_mb"] for m in history], default=0),
+            "peak_open_files": max([m["open_files"] for m in history], default=0),
+            "sample_interval_seconds": self.collection_interval,
+            "event_loop_lag_ms": {
+                "probe_interval_ms": self.lag_probe_interval * 1000,
+                "mean": lag.mean * 1000,
+                **{key: value * 1000 for key, value in lag.percentiles().items()}
+            },
+            "gc_pauses": {
+                "collections": gc_pauses.count,
+                "total_pause_ms": gc_pauses.total * 1000,
+                "max_pause_ms": gc_pauses.max_value * 1000,
+                "p99_pause_ms": gc_pauses.percentile(99) * 1000
+            }
+        }
+
+def parse_retry_after(value: str) -> float:
+    """Retry-After header (delta-seconds or HTTP date) as seconds from now"""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+class RetryPolicy:
+    """SDK-style retries: exponential backoff with full jitter, Retry-After and a retry budget
+    
+    The budget is a token bucket in the style of gRPC retry throttling: each
+    failed attempt costs a token, each success earns retry_budget_ratio, and
+    retries are only allowed while more than half the tokens remain. It caps
+    the load a struggling server sees from retries at roughly ratio x traffic.
+    """
+    
+    RETRYABLE_STATUS = frozenset((429, 500, 502, 503, 504))
+    RETRYABLE_ERRORS = frozenset(("timeout", "connection_error"))
+    MAX_RETRY_AFTER_SECONDS = 60.0
+    
+    def __init__(self, config: LoadTestConfig):
+        self.config = config
+        self.tokens = config.retry_budget_tokens
+        self.stats = {"retries": 0, "retries_exhausted": 0, "budget_denied": 0, "retry_after_waits": 0,
+                      "backoff_seconds": 0.0}
+    
+    @classmethod
+    def is_retryable(cls, result: APITestResult) -> bool:
+        return result.status_code in cls.RETRYABLE_STATUS or result.error_type in cls.RETRYABLE_ERRORS
+    
+    def next_delay(self, attempt: int, result: APITestResult, rng: random.Random, failed: bool) -> Optional[float]:
+        """Seconds to wait before retrying, or None to give up with this result"""
+        config = self.config
+        budget = config.retry_budget_tokens
+        if budget:
+            self.tokens = max(0.0, self.tokens - 1) if failed else min(budget, self.tokens + config.retry_budget_ratio)
+        if not failed:
+            return None
+        if attempt >= config.max_retries:
+            self.stats["retries_exhausted"] += 1
+            return None
+        if budget and self.tokens <= budget / 2:
+            self.stats["budget_denied"] += 1
+            return None
+        
+        delay = rng.uniform(0, min(config.retry_max_delay_ms, config.retry_base_delay_ms * 2 ** attempt) / 1000)
+        if config.respect_retry_after and result.retry_after > delay:
+            delay = min(result.retry_after, self.MAX_RETRY_AFTER_SECONDS)
+            self.stats["retry_after_waits"] += 1
+        self.stats["retries"] += 1
+        self.stats["backoff_seconds"] += delay
+        return delay
+
+class CircuitBreaker:
+    """Client-side breaker: closed -> open on a high failure rate -> half-open probe -> closed
+    
+    Outcomes are kept for circuit_window_seconds; once at least
+    circuit_min_requests are in the window and the failure rate reaches the
+    threshold, the breaker opens and requests fail fast without touching the
+    network. After circuit_open_seconds a single probe is let through: success
+    closes the breaker, failure opens it again.
+    """
+    
+    def __init__(self, config: LoadTestConfig):
+        self.config = config
+        self.state = "closed"
+        self.window: deque = deque()  # (time, failed)
+        self.window_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.stats = {"opened": 0, "short_circuited": 0, "open_seconds": 0.0}
+    
+    def allow(self, now: float) -> bool:
+        if self.state == "open":
+            if now - self.opened_at < self.config.circuit_open_seconds:
+                self.stats["short_circuited"] += 1
+                return False
+            self.stats["open_seconds"] += now - self.opened_at
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                self.stats["short_circuited"] += 1
+                return False
+            self.probe_in_flight = True
+        return True
+    
+    def record(self, now: float, failed: bool):
+        if self.state == "half_open":
+            self.probe_in_flight = False
+            if failed:
+                self._open(now)
+            else:
+                self.state = "closed"
+            return
+        if self.state == "open":
+            return  # Attempt sent before the breaker opened
+        
+        window = self.window
+        window.append((now, failed))
+        self.window_failures += failed
+        horizon = now - self.config.circuit_window_seconds
+        while window[0][0] < horizon:
+            self.window_failures -= window.popleft()[1]
+        if (len(window) >= self.config.circuit_min_requests and
+                self.window_failures / len(window) >= self.config.circuit_failure_threshold):
+            self._open(now)
+    
+    def _open(self, now: float):
+        self.state = "open"
+        self.opened_at = now
+        self.stats["opened"] += 1
+        self.window.clear()
+        self.window_failures = 0
+
+class TokenBucket:
+    """Client-side rate limiter: rate tokens per second, at most capacity banked
+    
+    reserve() takes a token immediately and returns how long the caller must
+    wait for it; the balance may go negative, so concurrent callers are queued
+    in arrival order without a lock or a polling loop. With max_wait it takes
+    nothing and returns None when the wait would be longer.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def reserve(self, now: float, max_wait: Optional[float] = None) -> Optional[float]:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if max_wait is not None and wait > max_wait:
+            return None
+        self.tokens -= 1
+        return wait
+
+class Tenant:
+    """A TenantProfile bound to a run: auth header, token bucket and endpoint sampler"""
+    
+    __slots__ = ("profile", "headers", "bucket", "endpoint_paths", "endpoint_cum_weights")
+    
+    def __init__(self, profile: TenantProfile, default_endpoints: List[Tuple[str, float]]):
+        self.profile = profile
+        self.headers = {"Authorization": f"Bearer {profile.api_key}"}
+        self.bucket = (TokenBucket(profile.rate_limit_rps, profile.burst or profile.rate_limit_rps)
+                       if profile.rate_limit_rps > 0 else None)
+        endpoints = ([(path, float(weight)) for path, weight in profile.endpoint_weights.items() if weight > 0] or
+                     default_endpoints)
+        self.endpoint_paths = [path for path, _ in endpoints]
+        self.endpoint_cum_weights = list(itertools.accumulate(weight for _, weight in endpoints))
+    
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take a token; returns the seconds until it is due, or None (nothing taken) past max_wait"""
+        return self.bucket.reserve(time.monotonic(), max_wait) if self.bucket else 0.0
+    
+    async def throttle(self) -> float:
+        """Wait for a token; returns the seconds waited"""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+class SaturationMonitor:
+    """Detect windows where the load generator, not the server, was the bottleneck
+    
+    Each window tracks event-loop lag, dispatch delay (intended start to the
+    request being handed to aiohttp), peak in-flight requests against the
+    connection pool size, and pool wait time. Windows over any threshold are
+    flagged; with auto-throttle enabled the offered load is scaled down until
+    the client keeps up again.
+    """
+    
+    MAX_REPORTED_PERIODS = 100
+    
+    def __init__(self, config: LoadTestConfig, in_flight: Callable[[], int]):
+        self.config = config
+        self.in_flight = in_flight
+        self.window_seconds = config.saturation_window_seconds
+        self.probe_interval = min(0.05, self.window_seconds / 4)
+        self.thresholds = {
+            "loop_lag_ms": config.saturation_loop_lag_ms,
+            "dispatch_delay_ms": config.saturation_dispatch_delay_ms,
+            "pool_wait_ms": config.saturation_pool_wait_ms
+        }
+        # Requests the transport can have on the wire at once
+        self.pool_capacity = (config.http2_connections * config.http2_streams_per_connection
+                              if config.transport == "http2" else config.connection_pool_size)
+        self.rate_factor = 1.0
+        self.throttle_adjustments = 0
+        self.windows: List[Dict[str, Any]] = []
+        self.reason_counts: Dict[str, int] = defaultdict(int)
+        self._healthy_streak = 0
+        self._last_mean_latency = 0.0
+        self._task = None
+        self._reset_window(time.time())
+    
+    def _reset_window(self, now: float):
+        self._window = {
+            "start": now, "loop_lag_max": 0.0, "dispatch_delay_max": 0.0, "peak_in_flight": 0,
+            "pool_wait_total": 0.0, "requests": 0, "latency_total": 0.0
+        }
+    
+    def start(self):
+        self._reset_window(time.time())
+        self._task = asyncio.create_task(self._probe_loop())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+    
+    def record_dispatch(self, delay: float):
+        """Time from a request's intended start until it is handed to the session"""
+        window = self._window
+        if delay > window["dispatch_delay_max"]:
+            window["dispatch_delay_max"] = delay
+        in_flight = self.in_flight()
+        if in_flight > window["peak_in_flight"]:
+            window["peak_in_flight"] = in_flight
+    
+    def record_completion(self, result: APITestResult):
+        window = self._window
+        window["requests"] += 1
+        window["pool_wait_total"] += result.pool_wait_time
+        window["latency_total"] += result.total_latency
+    
+    def admission_delay(self) -> float:
+        """Pause before a closed-model request so each user's rate scales with rate_factor"""
+        if self.rate_factor >= 1.0:
+            return 0.0
+        return (1.0 / self.rate_factor - 1.0) * self._last_mean_latency
+    
+    async def _probe_loop(self):
+        while True:
+            expected = time.perf_counter() + self.probe_interval
+            await asyncio.sleep(self.probe_interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            if lag > self._window["loop_lag_max"]:
+                self._window["loop_lag_max"] = lag
+            now = time.time()
+            if now - self._window["start"] >= self.window_seconds:
+                self._close_window(now)
+    
+    def _close_window(self, now: float):
+        window = self._window
+        self._reset_window(now)
+        requests = window["requests"]
+        pool_wait_mean = window["pool_wait_total"] / requests if requests else 0.0
+        if requests:
+            self._last_mean_latency = window["latency_total"] / requests
+        
+        reasons = []
+        if window["loop_lag_max"] * 1000 > self.thresholds["loop_lag_ms"]:
+            reasons.append("event_loop_lag")
+        if window["dispatch_delay_max"] * 1000 > self.thresholds["dispatch_delay_ms"]:
+            reasons.append("scheduling_delay")
+        if (window["peak_in_flight"] >= self.pool_capacity and
+                pool_wait_mean * 1000 > self.thresholds["pool_wait_ms"]):
+            reasons.append("connection_pool_exhausted")
+        for reason in reasons:
+            self.reason_counts[reason] += 1
+        
+        self.windows.append({
+            "start": window["start"],
+            "end": now,
+            "reasons": reasons,
+            "loop_lag_max_ms": window["loop_lag_max"] * 1000,
+            "dispatch_delay_max_ms": window["dispatch_delay_max"] * 1000,
+            "peak_in_flight": window["peak_in_flight"],
+            "pool_wait_mean_ms": pool_wait_mean * 1000,
+            "requests": requests
+        })
+        
+        if self.config.auto_throttle:
+            self._adjust_throttle(bool(reasons))
+    
+    def _adjust_throttle(self, saturated: bool):
+        """Back off quickly while saturated, recover slowly once healthy"""
+        if saturated:
+            self._healthy_streak = 0
+            factor = max(self.config.auto_throttle_min_factor, self.rate_factor * 0.75)
+        else:
+            self._healthy_streak += 1
+            if self._healthy_streak < 5 or self.rate_factor >= 1.0:
+                return
+            factor = min(1.0, self.rate_factor * 1.1)
+        if factor != self.rate_factor:
+            logger.warning(f"Auto-throttle: offered load scaled to {factor:.0%}"
+                           f" ({'client saturated' if saturated else 'recovering'})")
+            self.rate_factor = factor
+            self.throttle_adjustments += 1
+    
+    def summary(self) -> Dict[str, Any]:
+        """Saturated windows merged into contiguous periods, plus totals"""
+        windows = self.windows
+        saturated = [w for w in windows if w["reasons"]]
+        total_requests = sum(w["requests"] for w in windows)
+        saturated_requests = sum(w["requests"] for w in saturated)
+        
+        periods: List[Dict[str, Any]] = []
+        for window in saturated:
+            last = periods[-1] if periods else None
+            if last and window["start"] - last["end"] <= self.window_seconds * 0.5:
+                last["end"] = window["end"]
+                last["reasons"] = sorted(set(last["reasons"]) | set(window["reasons"]))
+                last["loop_lag_max_ms"] = max(last["loop_lag_max_ms"], window["loop_lag_max_ms"])
+                last["dispatch_delay_max_ms"] = max(last["dispatch_delay_max_ms"], window["dispatch_delay_max_ms"])
+                last["peak_in_flight"] = max(last["peak_in_flight"], window["peak_in_flight"])
+                last["requests"] += window["requests"]
+            else:
+                periods.append({key: value for key, value in window.items() if key != "pool_wait_mean_ms"})
+        
+        return {
+            "detected": bool(saturated),
+            "saturated_windows": len(saturated),
+            "total_windows": len(windows),
+            "window_seconds": self.window_seconds,
+            "saturated_requests": saturated_requests,
+            "total_requests": total_requests,
+            "saturated_request_fraction": saturated_requests / total_requests if total_requests else 0.0,
+            "reasons": dict(self.reason_counts),
+            "thresholds": self.thresholds,
+            "connection_pool_size": self.config.connection_pool_size,
+            "peak_in_flight": max((w["peak_in_flight"] for w in windows), default=0),
+            "peak_loop_lag_ms": max((w["loop_lag_max_ms"] for w in windows), default=0.0),
+            "peak_dispatch_delay_ms": max((w["dispatch_delay_max_ms"] for w in windows), default=0.0),
+            "periods": periods[:self.MAX_REPORTED_PERIODS],
+            "auto_throttle": {
+                "enabled": self.config.auto_throttle,
+                "final_rate_factor": self.rate_factor,
+                "min_rate_factor": self.config.auto_throttle_min_factor,
+                "adjustments": self.throttle_adjustments
+            }
+        }
+
+class _NdjsonResultCodec:
+    """One JSON object per line; a header line carries the run's config"""
+    
+    FIELD_NAMES = [f.name for f in STORED_RESULT_FIELDS]
+    
+    @staticmethod
+    def encode_header(header: Dict[str, Any]) -> bytes:
+        return json.dumps({"_stream_header": header}).encode() + b"\n"
+    
+    @classmethod
+    def encode_batch(cls, batch: List[APITestResult]) -> bytes:
+        return b"".join(json.dumps({name: getattr(result, name) for name in cls.FIELD_NAMES}).encode() + b"\n"
+                        for result in batch)
+
+class _BinaryResultCodec:
+    """Compact columnar frames: each batch stores one typed array per field
+    
+    Layout: MAGIC, uint32 header length, JSON header (field layout and config),
+    then frames of uint32 payload length + uint32 row count + payload. String
+    columns are dictionary-encoded per frame (JSON value list + uint32 indexes).
+    """
+    
+    MAGIC = b"LTRS\x01\n"
+    TYPECODES = {float: 'd', int: 'q', bool: 'b', str: 's'}
+    
+    @classmethod
+    def field_layout(cls) -> List[Tuple[str, str]]:
+        return [(f.name, cls.TYPECODES[f.type]) for f in STORED_RESULT_FIELDS]
+    
+    @classmethod
+    def encode_header(cls, header: Dict[str, Any]) -> bytes:
+        payload = json.dumps({**header, "fields": cls.field_layout()}).encode()
+        return cls.MAGIC + struct.pack("<I", len(payload)) + payload
+    
+    @classmethod
+    def encode_batch(cls, batch: List[APITestResult]) -> bytes:
+        parts = []
+        for name, typecode in cls.field_layout():
+            values = [getattr(result, name) for result in batch]
+            if typecode == 's':
+                interner = StringInterner()
+                indexes = array.array('I', map(interner.intern, values))
+                table = json.dumps(interner.values).encode()
+                parts.append(struct.pack("<I", len(table)) + table + indexes.tobytes())
+            else:
+                parts.append(array.array(typecode, values).tobytes())
+        payload = b"".join(parts)
+        return struct.pack("<II", len(payload), len(batch)) + payload
+    
+    @classmethod
+    def read(cls, f) -> Tuple[Dict[str, Any], Any]:
+        """Return the stream header and an iterator over its results"""
+        f.read(len(cls.MAGIC))
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length))
+        layout = header.pop("fields")
+        known = {f.name for f in STORED_RESULT_FIELDS}
+        
+        def rows():
+            while True:
+                frame_header = f.read(8)
+                if len(frame_header) < 8:
+                    return
+                payload_length, count = struct.unpack("<II", frame_header)
+                payload = f.read(payload_length)
+                if len(payload) < payload_length:
+                    return  # Truncated final frame from an interrupted run
+                
+                columns = {}
+                offset = 0
+                for name, typecode in layout:
+                    if typecode == 's':
+                        (table_length,) = struct.unpack_from("<I", payload, offset)
+                        offset += 4
+                        table = json.loads(payload[offset:offset + table_length])
+                        offset += table_length
+                        indexes = array.array('I')
+                        indexes.frombytes(payload[offset:offset + 4 * count])
+                        offset += 4 * count
+                        values = [table[i] for i in indexes]
+                    else:
+                        values = array.array(typecode)
+                        values.frombytes(payload[offset:offset + values.itemsize * count])
+                        offset += values.itemsize * count
+                        if typecode == 'b':
+                            values = [bool(v) for v in values]
+                    if name in known:
+                        columns[name] = values
+                
+                for i in range(count):
+                    yield APITestResult(**{name: values[i] for name, values in columns.items()})
+        
+        return header, rows()
+
+class StreamingResultWriter:
+    """Append completed results to disk in batches from a background task
+    
+    Results are buffered in memory only until the next batch is written, so a
+    crashed or interrupted run keeps everything up to the last flush. Writes run
+    on a dedicated thread to keep file I/O and compression off the event loop.
+    """
+    
+    FORMATS = ("ndjson", "binary")
+    COMPRESSIONS = ("none", "gzip", "zstd")
+    EXTENSIONS = {"ndjson": ".ndjson", "binary": ".bin", "gzip": ".gz", "zstd": ".zst", "none": ""}
+    
+    def __init__(self, path: str, fmt: str = "ndjson", compression: str = "none",
+                 batch_size: int = 1000, flush_interval: float = 1.0):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown results stream format: {fmt}")
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"Unknown results stream compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        
+        self.path = path
+        self.codec = _BinaryResultCodec if fmt == "binary" else _NdjsonResultCodec
+        self.compression = compression
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._pending: List[APITestResult] = []
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._file = None
+        self._raw_file = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-writer")
+    
+    @classmethod
+    def default_path(cls, output_file: str, fmt: str, compression: str) -> str:
+        base = os.path.splitext(output_file)[0]
+        return f"{base}.results{cls.EXTENSIONS[fmt]}{cls.EXTENSIONS[compression]}"
+    
+    def _open(self, header: Dict[str, Any]):
+        self._raw_file = open(self.path, 'wb')
+        if self.compression == "gzip":
+            self._file = gzip.GzipFile(fileobj=self._raw_file, mode='wb')
+        elif self.compression == "zstd":
+            self._file = zstandard.ZstdCompressor().stream_writer(self._raw_file)
+        else:
+            self._file = self._raw_file
+        self._write(self.codec.encode_header(header))
+    
+    def _write(self, data: bytes):
+        self._file.write(data)
+        # Flush through the compressor so everything written so far is readable
+        if self.compression == "gzip":
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+        elif self.compression == "zstd":
+            self._file.flush(zstandard.FLUSH_BLOCK)
+        self._raw_file.flush()
+    
+    def _write_batch(self, batch: List[APITestResult]):
+        self._write(self.codec.encode_batch(batch))
+    
+    def _close(self):
+        if self._file is not self._raw_file:
+            self._file.close()
+        if not self._raw_file.closed:
+            self._raw_file.close()
+    
+    async def start(self, header: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._open, header)
+        self._task = asyncio.create_task(self._run())
+    
+    def submit(self, result: APITestResult):
+        self._pending.append(result)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            
+            batch, self._pending = self._pending, []
+            if batch:
+                try:
+                    await loop.run_in_executor(self._executor, self._write_batch, batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    logger.error(f"Error writing results stream: {e}")
+            if self._closing and not self._pending:
+                return
+    
+    async def close(self):
+        """Flush remaining results and close the file"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wake.set()
+        await self._task
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
+        self._task = None
+
+def read_result_stream(path: str, raw: bool = False) -> Tuple[Dict[str, Any], Any]:
+    """Open a results stream (any format/compression) and return (header, results iterator)
+    
+    Tolerates a truncated tail, so streams from interrupted runs can be analyzed.
+    With raw=True NDJSON records are yielded as plain dicts, skipping
+    APITestResult construction; binary streams always yield results.
+    """
+    with open(path, 'rb') as probe:
+        magic = probe.read(4)
+    
+    if magic[:2] == b"\x1f\x8b":
+        f = gzip.open(path, 'rb')
+    elif magic == b"\x28\xb5\x2f\xfd":
+        if zstandard is None:
+            raise ValueError("Reading zstd streams requires the 'zstandard' package")
+        f = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    else:
+        f = open(path, 'rb')
+    
+    if f.peek(len(_BinaryResultCodec.MAGIC)).startswith(_BinaryResultCodec.MAGIC):
+        header, rows = _BinaryResultCodec.read(f)
+    else:
+        header, rows = _read_ndjson_stream(f, raw)
+    
+    def guarded():
+        try:
+            yield from rows
+        except (EOFError, zlib.error) as e:
+            logger.warning(f"Results stream {path} ends early ({e}); using results read so far")
+        finally:
+            f.close()
+    
+    return header, guarded()
+
+def _read_ndjson_stream(f, raw: bool = False) -> Tuple[Dict[str, Any], Any]:
+    """Parse an NDJSON results stream; the header line is optional"""
+    known = {f.name for f in STORED_RESULT_FIELDS}
+    first = f.readline()
+    header = {}
+    pending = []
+    if first:
+        try:
+            record = json.loads(first)
+        except ValueError:
+            record = None
+        if record and "_stream_header" in record:
+            header = record["_stream_header"]
+        elif record:
+            pending.append(first)
+    
+    def rows():
+        for line in itertools.chain(pending, f):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return  # Truncated final line from an interrupted run
+            if raw:
+                yield record
+                continue
+            yield APITestResult(**{k: v for k, v in record.items() if k in known})
+    
+    return header, rows()
+
+class APIInfrastructureTester:
+    """Main tester focused on API infrastructure performance"""
+    
+    CAPACITY_SEARCH_MODES = ("step", "binary")
+    
+    def __init__(self, config: LoadTestConfig):
+        self.config = config
+        self._rngs: Dict[Any, random.Random] = {}
+        self.payload_generator = PayloadGenerator(self.rng_for("payloads"))
+        self.endpoint_table = EndpointTable.from_config(config, self.payload_generator)
+        self._endpoint_indexes = {path: index for index, (_, path, _) in enumerate(self.endpoint_table.entries)}
+        endpoint_mix = traffic_endpoints(config)
+        self._endpoint_paths = [path for path, _ in endpoint_mix]
+        self._endpoint_cum_weights = list(itertools.accumulate(weight for _, weight in endpoint_mix))
+        self.tenants = [Tenant(profile, endpoint_mix) for profile in tenant_profiles(config)]
+        self._tenant_cum_weights = list(itertools.accumulate(tenant.profile.weight for tenant in self.tenants))
+        size_mix = payload_size_weights(config)
+        self._payload_sizes = [size for size, _ in size_mix]
+        self._payload_cum_weights = list(itertools.accumulate(weight for _, weight in size_mix))
+        self.cache_keys = (CacheKeySpace(config, self.payload_generator.templates, self.select_payload_size)
+                           if config.cache_validation else None)
+        self.payload_corpus: Optional[PayloadCorpus] = None
+        self.connection_monitor = ConnectionPoolMonitor()
+        self.system_monitor = SystemMetricsCollector(
+            config.system_metrics_interval_seconds,
+            config.loop_lag_probe_interval_ms / 1000
         )
+        self.results = ResultStore()
+        self.transport: Optional[AiohttpTransport] = None
+        self.metrics_exporter: Optional[OpenMetricsExporter] = None
+        self.active_connections = 0
+        self.endpoint_stats = defaultdict(list)
+        # Report aggregates, updated as each result is recorded
+        self.stats = RunStatistics()
+        self.real_time_aggregator = RealTimeAggregator()
+        self.retain_results = True  # Disabled when results are streamed to disk or forwarded
+        self.result_writer: Optional[StreamingResultWriter] = None
+        self.results_stream_path = ""
+        self.real_time_stats = {
+            "requests_per_second": deque(maxlen=60),
+            "error_rate": deque(maxlen=60),
+            "avg_latency": deque(maxlen=60)
+        }
+        self.open_model_stats = {
+            "scheduled_requests": 0,
+            "sent_requests": 0,
+            "dropped_requests": 0,
+            "late_requests": 0,
+            "rate_limited_drops": 0,
+            "max_send_lag_ms": 0.0
+        }
+        # Optional hook invoked with every completed request (used by worker processes)
+        self.on_result: Optional[Callable[[APITestResult], None]] = None
+        self.in_flight_requests = 0
+        self.pacing_stats = {"scheduled_sends": 0, "late_sends": 0, "max_drift_ms": 0.0}
+        self.pacing_drift = LatencyHistogram()  # Actual minus intended send time
+        # Warm-up results are kept apart from self.stats; warmup_state holds its duration,
+        # connection target and the pool state each load generator measured from
+        self.warming_up = False
+        self.warmup_stats = RunStatistics()
+        self.warmup_state: Dict[str, Any] = {}
+        self.load_started_at: Optional[float] = None  # When worker processes passed the start barrier
+        if config.retry_policy not in ("none", "exponential"):
+            raise ValueError(f"Unknown retry policy: {config.retry_policy}")
+        self.retry_policy = RetryPolicy(config) if config.retry_policy != "none" else None
+        self.circuit_breaker = CircuitBreaker(config) if config.circuit_breaker else None
+        self.saturation_monitor = (SaturationMonitor(config, lambda: self.in_flight_requests)
+                                   if config.detect_client_saturation else None)
+        self.remote_saturation: List[Dict[str, Any]] = []  # Summaries from workers/agents
+        
+    async def __aenter__(self):
+        if self.config.use_payload_corpus:
+            self.payload_corpus = PayloadCorpus(self.config, self.payload_generator).load_or_build()
         
         # Configure timeout for API testing
         timeout = aiohttp.ClientTimeout(
@@ -310,47 +2867,86 @@ class APIInfrastructureTester:
         )
         
         headers = {
-            'Authorization': f'Bearer {self.config.api_key}',
             'Content-Type': 'application/json',
             'User-Agent': f'API-LoadTester/{self.config.scenario_name}',
             'X-Test-Session': str(uuid.uuid4())
         }
+        if self.config.api_key:
+            headers['Authorization'] = f'Bearer {self.config.api_key}'  # Tenants override it per request
         
-        self.session = aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout,
-            headers=headers
-        )
+        if self.config.transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {self.config.transport}")
+        self.transport = TRANSPORTS[self.config.transport](self.config, headers, timeout)
+        if self.config.metrics_port:
+            self.metrics_exporter = OpenMetricsExporter(self)
+            await self.metrics_exporter.start(self.config.metrics_host, self.config.metrics_port)
         
         if self.config.collect_system_metrics:
             await self.system_monitor.start_collection()
+        if self.saturation_monitor:
+            self.saturation_monitor.start()
             
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        if self.transport:
+            await self.transport.close()
+        if self.metrics_exporter:
+            await self.metrics_exporter.stop()
         
         if self.config.collect_system_metrics:
             await self.system_monitor.stop_collection()
+        if self.saturation_monitor:
+            await self.saturation_monitor.stop()
+    
+    def rng_for(self, stream: Any) -> random.Random:
+        """Independent RNG stream (per user, or "arrivals"); seeded from random_seed when set
+        
+        Each user draws from its own stream, so a seeded run makes the same
+        choices per user no matter how responses interleave.
+        """
+        rng = self._rngs.get(stream)
+        if rng is None:
+            seed = self.config.random_seed
+            rng = self._rngs[stream] = random.Random(f"{seed}:{stream}") if seed is not None else random.Random()
+        return rng
     
-    def select_endpoint(self) -> str:
-        """Select endpoint for testing"""
-        if self.config.test_multiple_endpoints:
-            return random.choice(self.config.endpoints_to_test)
-        return self.config.endpoint_path
+    def select_endpoint(self, rng: Optional[random.Random] = None, tenant: Optional[Tenant] = None) -> str:
+        """Select endpoint for testing (weighted by endpoint_weights, or the tenant's own mix)"""
+        paths, cum_weights = ((tenant.endpoint_paths, tenant.endpoint_cum_weights) if tenant else
+                              (self._endpoint_paths, self._endpoint_cum_weights))
+        if len(paths) == 1:
+            return paths[0]
+        return (rng or random).choices(paths, cum_weights=cum_weights)[0]
     
-    def should_create_malformed_request(self) -> bool:
+    TENANT_SPREAD = (math.sqrt(5) - 1) / 2  # Golden-ratio stride: consecutive user ids spread across tenants
+    
+    def select_tenant(self, user_id: int, rng: random.Random) -> Optional[Tenant]:
+        """Tenant for a request: fixed per virtual user (closed model), drawn per request otherwise"""
+        if not self.tenants:
+            return None
+        position = (user_id * self.TENANT_SPREAD) % 1.0 if self.config.load_model == "closed" else rng.random()
+        index = bisect.bisect_right(self._tenant_cum_weights, position * self._tenant_cum_weights[-1])
+        return self.tenants[min(index, len(self.tenants) - 1)]
+    
+    def select_payload_size(self, rng: Optional[random.Random] = None) -> int:
+        """Request body size in KB: weighted mix when configured, else uniform in [min, max]"""
+        rng = rng or random
+        if self._payload_sizes:
+            return rng.choices(self._payload_sizes, cum_weights=self._payload_cum_weights)[0]
+        return rng.randint(self.config.min_payload_kb, self.config.max_payload_kb)
+    
+    def should_create_malformed_request(self, rng: Optional[random.Random] = None) -> bool:
         """Determine if this request should be malformed"""
         return (self.config.test_malformed_requests and 
-                random.random() < self.config.malformed_request_percentage)
+                (rng or random).random() < self.config.malformed_request_percentage)
     
-    def should_simulate_client_failure(self) -> Tuple[bool, str]:
+    def should_simulate_client_failure(self, rng: Optional[random.Random] = None) -> Tuple[bool, str]:
         """Determine if we should simulate a client-side failure"""
         if not self.config.simulate_client_failures:
             return False, ""
         
-        rand = random.random()
+        rand = (rng or random).random()
         if rand < self.config.client_timeout_percentage:
             return True, "client_timeout"
         elif rand < self.config.client_timeout_percentage + self.config.connection_drop_percentage:
@@ -358,61 +2954,179 @@ class APIInfrastructureTester:
         
         return False, ""
     
-    async def make_api_request(self, user_id: int, request_num: int) -> APITestResult:
-        """Make single API request with detailed infrastructure metrics"""
+    async def make_api_request(self, user_id: int, request_num: int,
+                               scheduled_time: Optional[float] = None,
+                               trace_record: Optional[TraceRecord] = None,
+                               admission: Optional[Tuple[Optional[Tenant], float]] = None) -> APITestResult:
+        """Make single API request with detailed infrastructure metrics
+        
+        When scheduled_time is given (open-model load), latency is measured from
+        the intended send time so client-side queueing is not hidden. A
+        trace_record fixes the method, endpoint, body size and model, and
+        admission is the (tenant, token wait) _admit_arrival reserved for it.
+        """
         request_id = f"{user_id}-{request_num}-{uuid.uuid4().hex[:8]}"
-        start_time = time.time()
+        rng = self.rng_for(user_id)
+        
+        # The tenant's rate limiter holds the request back before it is timed, so the
+        # wait shows up as throttle_wait rather than as API latency
+        if admission is None:
+            tenant = self.select_tenant(user_id, rng)
+            throttle_wait = await tenant.throttle() if tenant else 0.0
+        else:
+            tenant, throttle_wait = admission
+            if throttle_wait:
+                await asyncio.sleep(throttle_wait)
+        start_time = scheduled_time + throttle_wait if scheduled_time is not None else time.time()
         
         # Select endpoint and generate payload
-        endpoint = self.select_endpoint()
+        method = "POST"
+        model = ""
+        if trace_record:
+            method, endpoint, model = trace_record.method, trace_record.path, trace_record.model
+            endpoint_index = self.endpoint_table.index(
+                method, endpoint, model or self.payload_generator.model_for(endpoint))
+        else:
+            endpoint = self.select_endpoint(rng, tenant)
+            endpoint_index = self._endpoint_indexes[endpoint]
         full_url = f"{self.config.base_url.rstrip('/')}{endpoint}"
         
-        # Generate payload
-        if self.should_create_malformed_request():
-            payload = self.payload_generator.generate_malformed_payload(endpoint)
-            expected_error = True
+        # Select a pre-encoded body (or generate and encode one when the corpus is disabled,
+        # the endpoint is not in it, or a trace names a different model)
+        expected_error = self.should_create_malformed_request(rng)
+        cache_key = -1
+        if expected_error:
+            body = (self.payload_corpus.malformed_body(rng) if self.payload_corpus else
+                    json.dumps(self.payload_generator.generate_malformed_payload(endpoint)).encode())
+        elif self.cache_keys and not trace_record:
+            cache_key = self.cache_keys.sample(rng)
+            body = self.cache_keys.body(endpoint, cache_key, rng)
         else:
-            payload_size = random.randint(self.config.min_payload_kb, self.config.max_payload_kb)
-            payload = self.payload_generator.generate_payload(endpoint, payload_size)
-            expected_error = False
+            if trace_record and trace_record.body_size:
+                payload_size = max(1, round(trace_record.body_size / 1000))
+            else:
+                payload_size = self.select_payload_size(rng)
+            if (self.payload_corpus and endpoint in self.payload_corpus.bodies and
+                    (not model or model == self.payload_generator.model_for(endpoint))):
+                body = self.payload_corpus.body(endpoint, payload_size, rng)
+            else:
+                payload = self.payload_generator.generate_payload(endpoint, payload_size, self.config.stream_responses)
+                if model and "model" in payload:
+                    payload["model"] = model
+                body = json.dumps(payload).encode()
+        if method in ("GET", "HEAD"):
+            body = b""
         
         # Check for simulated client failures
-        should_fail, failure_type = self.should_simulate_client_failure()
+        should_fail, failure_type = self.should_simulate_client_failure(rng)
         
-        result = APITestResult(
+        template = APITestResult(
             timestamp=start_time,
             request_id=request_id,
             user_id=user_id,
+            endpoint=endpoint,
+            endpoint_index=endpoint_index,
             total_latency=0,
-            request_size=len(json.dumps(payload))
+            request_size=len(body),
+            cache_key=cache_key,
+            tenant=tenant.profile.name if tenant else "",
+            throttle_wait=throttle_wait
         )
+        headers = tenant.headers if tenant else None
+        result = replace(template) if self.retry_policy else template
+        
+        attempt = 0
+        attempt_start = start_time
+        while True:
+            if self.circuit_breaker and not self.circuit_breaker.allow(time.time()):
+                result.circuit_breaker_open = True
+                result.status_code = 0
+                result.error_type = "circuit_open"
+                result.error_message = "Client circuit breaker open"
+                result.total_latency = time.time() - attempt_start
+                break
+            
+            await self._send_attempt(result, method, full_url, body, endpoint, expected_error, attempt_start,
+                                     simulate_timeout=should_fail and failure_type == "client_timeout" and not attempt,
+                                     headers=headers)
+            failed = RetryPolicy.is_retryable(result)
+            if self.circuit_breaker:
+                self.circuit_breaker.record(time.time(), failed)
+            if not self.retry_policy:
+                break
+            delay = self.retry_policy.next_delay(attempt, result, rng, failed)
+            if delay is None:
+                break
+            
+            await asyncio.sleep(delay)
+            if tenant:
+                template.throttle_wait += await tenant.throttle()  # Retries spend the tenant's tokens too
+            attempt += 1
+            attempt_start = time.time()
+            result = replace(template)
+        
+        # total_latency is what the caller waited, retries and backoff included
+        result.retry_count = attempt
+        result.attempt_latency = result.total_latency
+        if attempt:
+            result.total_latency = attempt_start + result.attempt_latency - start_time
+        
+        if self.warming_up:
+            self.warmup_stats.record(result)  # Reported separately, never part of the measured run
+            return result
+        
+        if self.saturation_monitor:
+            self.saturation_monitor.record_completion(result)
+        
+        # Record connection metrics
+        if result.first_byte_time > 0:
+            self.connection_monitor.record_connection(
+                result.connection_time, 
+                result.connection_reused
+            )
         
-        connection_start = time.time()
+        self._record_result(result)
+        
+        return result
+    
+    async def _send_attempt(self, result: APITestResult, method: str, full_url: str, body: bytes, endpoint: str,
+                            expected_error: bool, start_time: float, simulate_timeout: bool = False,
+                            headers: Optional[Dict[str, str]] = None):
+        """One network attempt, filling in result; latency is measured from start_time"""
+        trace = RequestTrace() if self.config.trace_request_phases else None
+        self.in_flight_requests += 1
         
         try:
             # Simulate client timeout
-            if should_fail and failure_type == "client_timeout":
+            if simulate_timeout:
                 await asyncio.sleep(0.1)  # Simulate slow client
                 raise asyncio.TimeoutError("Simulated client timeout")
             
+            if self.saturation_monitor:
+                self.saturation_monitor.record_dispatch(time.time() - start_time)
+            
             # Track connection establishment
-            async with self.session.post(full_url, json=payload) as response:
+            async with self.transport.request(method, full_url, body, trace, headers) as response:
                 first_byte_time = time.time()
                 result.first_byte_time = first_byte_time - start_time
                 
-                # Read response
-                response_text = await response.text()
+                # Read response (streamed bodies are consumed incrementally, never buffered)
+                if (self.config.stream_responses and response.status < 400 and
+                        PayloadGenerator.supports_streaming(endpoint)):
+                    response_text = ""
+                    result.response_size = await self._consume_stream(response, result, start_time)
+                else:
+                    response_text = await response.text()
+                    result.response_size = len(response_text)
                 end_time = time.time()
                 
                 # Calculate timing metrics
                 result.total_latency = end_time - start_time
                 result.download_time = end_time - first_byte_time
-                result.connection_time = first_byte_time - connection_start
                 
                 # HTTP metrics
                 result.status_code = response.status
-                result.response_size = len(response_text)
-                result.http_version = str(response.version)
+                result.http_version = self.transport.http_version(response)
                 
                 # Extract API-specific headers
                 result.server_id = response.headers.get('X-Server-ID', '')
@@ -429,17 +3143,14 @@ class APIInfrastructureTester:
                 # Check cache status
                 result.cache_hit = response.headers.get('X-Cache', '').lower() == 'hit'
                 
-                # Connection reuse detection
-                result.connection_reused = 'Connection' not in response.headers or \
-                                         response.headers.get('Connection', '').lower() == 'keep-alive'
-                
-                # Record connection metrics
-                self.connection_monitor.record_connection(
-                    result.connection_time, 
-                    result.connection_reused
-                )
+                # Connection reuse detection (header heuristic when phase tracing is off)
+                if trace is None:
+                    result.connection_reused = 'Connection' not in response.headers or \
+                                             response.headers.get('Connection', '').lower() == 'keep-alive'
                 
                 # Rate limiting detection
+                if response.status in (429, 503) and 'Retry-After' in response.headers:
+                    result.retry_after = parse_retry_after(response.headers['Retry-After'])
                 if response.status == 429:
                     result.rate_limited = True
                     result.error_type = "rate_limited"
@@ -468,38 +3179,68 @@ class APIInfrastructureTester:
             result.error_message = str(e)
             result.status_code = 500
         
-        # Update real-time stats
-        self._update_real_time_stats(result)
+        finally:
+            # Cancellation (duration cutoff, Ctrl-C) skips the handlers above
+            self.in_flight_requests -= 1
         
-        return result
+        if trace is not None:
+            trace.apply(result)
     
-    def _update_real_time_stats(self, result: APITestResult):
-        """Update real-time statistics"""
-        current_time = time.time()
-        
-        # Update request rate (requests in last second)
-        recent_requests = [r for r in self.results[-100:] 
-                          if current_time - r.timestamp <= 1.0]
-        self.real_time_stats["requests_per_second"].append(len(recent_requests))
+    async def _consume_stream(self, response, result: APITestResult,
+                              start_time: float) -> int:
+        """Read a streamed body chunk by chunk, recording first-chunk and inter-chunk timing"""
+        stall_threshold = self.config.stream_stall_threshold_ms / 1000
+        received = 0
+        chunks = 0
+        first_chunk = last_chunk = 0.0
+        gaps = LatencyHistogram()
         
-        # Update error rate
-        recent_errors = [r for r in recent_requests if r.status_code >= 400]
-        error_rate = len(recent_errors) / len(recent_requests) if recent_requests else 0
-        self.real_time_stats["error_rate"].append(error_rate)
+        async for chunk in response.content.iter_any():
+            now = time.time()
+            if chunks == 0:
+                first_chunk = now
+                result.time_to_first_chunk = now - start_time
+            else:
+                gap = now - last_chunk
+                gaps.record(gap)
+                if gap > result.max_inter_chunk_gap:
+                    result.max_inter_chunk_gap = gap
+                if gap > stall_threshold:
+                    result.stream_stalls += 1
+            last_chunk = now
+            chunks += 1
+            received += len(chunk)
         
-        # Update latency
-        if result.total_latency > 0:
-            self.real_time_stats["avg_latency"].append(result.total_latency)
+        result.stream_chunks = chunks
+        result.stream_duration = last_chunk - first_chunk
+        if chunks > 1:
+            result.mean_inter_chunk_gap = result.stream_duration / (chunks - 1)
+            result.chunk_gaps = gaps
+        return received
     
-    async def user_simulation(self, user_id: int) -> List[APITestResult]:
-        """Simulate single user's API usage patterns"""
-        user_results = []
+    def _update_real_time_stats(self, result: APITestResult):
+        """Update real-time statistics"""
+        is_error = result.status_code >= 400 or result.error_type != ""
+        self.real_time_aggregator.record(
+            result.endpoint,
+            result.timestamp + result.total_latency,
+            result.total_latency,
+            is_error
+        )
+    
+    async def user_simulation(self, user_id: int) -> int:
+        """Simulate single user's API usage patterns, returning requests completed"""
+        completed = 0
         
         # Staggered start for ramp-up
         ramp_delay = (self.config.ramp_up_seconds / self.config.concurrent_users) * user_id
         await asyncio.sleep(ramp_delay)
         
         for request_num in range(self.config.requests_per_user):
+            # Auto-throttle: stretch think time while the client is saturated
+            if self.saturation_monitor and self.saturation_monitor.rate_factor < 1.0:
+                await asyncio.sleep(self.saturation_monitor.admission_delay())
+            
             # Burst pattern simulation
             if self.config.burst_testing and request_num % self.config.burst_size == 0:
                 # Create burst of requests
@@ -511,22 +3252,22 @@ class APIInfrastructureTester:
                     )
                     burst_tasks.append(task)
                 
+                self.stats.timeline.mark_burst(time.time(), len(burst_tasks))
                 burst_results = await asyncio.gather(*burst_tasks, return_exceptions=True)
-                for result in burst_results:
-                    if isinstance(result, APITestResult):
-                        user_results.append(result)
+                completed += sum(1 for result in burst_results if isinstance(result, APITestResult))
                 
                 # Wait before next burst
                 await asyncio.sleep(self.config.burst_interval_seconds)
             else:
                 # Regular request
-                result = await self.make_api_request(user_id, request_num)
-                user_results.append(result)
+                await self.make_api_request(user_id, request_num)
+                completed += 1
                 
                 # Normal inter-request delay
-                await asyncio.sleep(random.uniform(0.5, 2.0))
+                await asyncio.sleep(self.rng_for(user_id).uniform(0.5, 2.0))
         
-        return user_results
+        self.stats.timeline.mark_ramp_down(time.time())
+        return completed
     
     async def run_load_test(self) -> Dict[str, Any]:
         """Execute the complete API infrastructure load test"""
@@ -534,32 +3275,33 @@ class APIInfrastructureTester:
         logger.info(f"Target: {self.config.base_url}")
         logger.info(f"Load: {self.config.concurrent_users} users, {self.config.requests_per_user} req/user")
         
-        test_start_time = time.time()
+        # Warm up before the clock starts (worker processes warm up their own pools)
+        if self._resolve_worker_count() == 1:
+            await self.warm_up()
         
-        # Create user simulation tasks
-        user_tasks = []
-        for user_id in range(self.config.concurrent_users):
-            task = asyncio.create_task(self.user_simulation(user_id))
-            user_tasks.append(task)
+        test_start_time = time.time()
+        await self._start_result_stream()
         
         # Start real-time monitoring if enabled
         if self.config.real_time_dashboard:
             monitor_task = asyncio.create_task(self._real_time_monitor())
         
         # Execute load test
-        user_results = await asyncio.gather(*user_tasks, return_exceptions=True)
+        await self.execute_load(range(self.config.concurrent_users))
         
         # Stop monitoring
         if self.config.real_time_dashboard:
             monitor_task.cancel()
         
-        # Collect all results
-        for user_result in user_results:
-            if isinstance(user_result, list):
-                self.results.extend(user_result)
-        
+        # Worker processes are released together once spawned and warmed up; measure from there
+        if self.load_started_at is not None:
+            test_start_time = self.load_started_at
         test_duration = time.time() - test_start_time
         
+        if self.result_writer:
+            await self.result_writer.close()
+            logger.info(f"Streamed {self.result_writer.written} results to {self.results_stream_path}")
+        
         # Generate comprehensive report
         report = await self._generate_infrastructure_report(test_duration)
         
@@ -568,127 +3310,1033 @@ class APIInfrastructureTester:
         
         return report
     
+    WARMUP_USER = -1  # user_id (and RNG stream) of warm-up requests
+    
+    async def warm_up(self):
+        """Prime the connection pool with warmup_requests kept out of the measured run
+        
+        Requests go out warmup_connections at a time, so the first wave opens
+        that many connections concurrently and the measured phase starts on a
+        warm keep-alive pool instead of paying for DNS, TCP and TLS setup.
+        """
+        config = self.config
+        if config.warmup_requests <= 0:
+            return
+        connections = min(config.warmup_connections or self.transport.max_connections, config.warmup_requests)
+        if not config.test_connection_reuse:
+            logger.warning("Connection reuse is disabled: warm-up requests cannot leave connections open")
+        logger.info(f"Warm-up: {config.warmup_requests} requests over {connections} connections")
+        
+        started = time.time()
+        request_nums = iter(range(config.warmup_requests))
+        
+        async def sender():
+            for request_num in request_nums:
+                await self.make_api_request(self.WARMUP_USER, request_num)
+        
+        self.warming_up = True
+        try:
+            await asyncio.gather(*(sender() for _ in range(connections)))
+        finally:
+            self.warming_up = False
+        
+        pool = self.transport.pool_state()
+        self.warmup_state = {
+            "duration_seconds": time.time() - started,
+            "connections_target": connections,
+            "pool_at_measurement_start": [pool]
+        }
+        logger.info(f"Warm-up done in {self.warmup_state['duration_seconds']:.1f}s: "
+                    f"{pool['open_connections']} connections open, "
+                    f"{self.warmup_stats.totals['errors']} of {self.warmup_stats.totals['requests']} requests failed")
+    
+    def _merge_warmup(self, warmup: Dict[str, Any]):
+        """Fold in another load generator's warm-up (generators warm up in parallel)"""
+        if not warmup:
+            return
+        self.warmup_stats.merge_snapshot(warmup["stats"])
+        state = self.warmup_state
+        state["duration_seconds"] = max(state.get("duration_seconds", 0.0), warmup["duration_seconds"])
+        state["connections_target"] = state.get("connections_target", 0) + warmup["connections_target"]
+        state.setdefault("pool_at_measurement_start", []).extend(warmup["pool_at_measurement_start"])
+    
+    def _warmup_export(self) -> Dict[str, Any]:
+        return {**self.warmup_state, "stats": self.warmup_stats.snapshot()} if self.warmup_state else {}
+    
+    async def execute_load(self, user_ids: range):
+        """Drive this tester's share of the load (worker processes, open or closed model)"""
+        worker_count = self._resolve_worker_count()
+        if worker_count > 1:
+            await self._run_multiprocess_load(worker_count, user_ids)
+        elif self.config.load_model == "open":
+            await self.run_open_model_load()
+        elif self.config.load_model == "trace":
+            await self.run_trace_replay()
+        else:
+            await self.run_users(user_ids)
+    
+    async def run_capacity_search(self) -> Dict[str, Any]:
+        """Find the highest constant arrival rate that meets the latency/error SLO
+        
+        Rates run from arrival_start_rps up to target_rps, each held for
+        arrival_step_seconds. "step" raises the rate by arrival_step_rps until a
+        step fails; "binary" bisects between the bounds down to arrival_step_rps.
+        """
+        config = self.config
+        if config.capacity_search not in self.CAPACITY_SEARCH_MODES:
+            raise ValueError(f"Unknown capacity search mode: {config.capacity_search}")
+        # Synthetic client failures and malformed requests would count against the error SLO
+        self.config = config = replace(config, test_malformed_requests=False, simulate_client_failures=False)
+        
+        logger.info(f"Starting capacity search ({config.capacity_search}): {config.scenario_name}")
+        logger.info(f"SLO: p99 <= {config.slo_p99_ms:.0f}ms, error rate <= {config.slo_error_rate:.1%} | "
+                    f"rates {config.arrival_start_rps:g}-{config.target_rps:g} RPS, {config.arrival_step_seconds}s per step")
+        
+        await self.warm_up()
+        search_start = time.time()
+        await self._start_result_stream()
+        steps: List[Dict[str, Any]] = []
+        reports: Dict[float, Dict[str, Any]] = {}
+        
+        async def measure(rate: float) -> bool:
+            step, reports[rate] = await self._run_capacity_step(rate)
+            steps.append(step)
+            logger.info(f"[CAPACITY] {rate:8.1f} RPS -> achieved {step['achieved_rps']:.1f} | "
+                        f"p50 {step['p50_latency_ms']:.0f}ms | p99 {step['p99_latency_ms']:.0f}ms | "
+                        f"errors {step['error_rate']:.2%} | {'PASS' if step['passed'] else 'FAIL ' + ', '.join(step['failed_checks'])}")
+            return step["passed"]
+        
+        low, high = config.arrival_start_rps, config.target_rps
+        max_rate = 0.0
+        if config.capacity_search == "step":
+            rate = low
+            while rate <= high and await measure(rate):
+                max_rate = rate
+                rate += config.arrival_step_rps
+        elif await measure(low):
+            max_rate = low
+            if await measure(high):
+                max_rate = high
+            else:
+                while high - low > config.arrival_step_rps:
+                    middle = (low + high) / 2
+                    if await measure(middle):
+                        low = max_rate = middle
+                    else:
+                        high = middle
+        
+        if self.result_writer:
+            await self.result_writer.close()
+            logger.info(f"Streamed {self.result_writer.written} results to {self.results_stream_path}")
+        
+        curve = sorted(steps, key=lambda step: step["target_rps"])
+        first_failure = next((step for step in curve if not step["passed"]), None)
+        report = {
+            "capacity_search": {
+                "scenario_name": config.scenario_name,
+                "target_url": config.base_url,
+                "mode": config.capacity_search,
+                "slo": {"p99_latency_ms": config.slo_p99_ms, "error_rate": config.slo_error_rate},
+                "step_seconds": config.arrival_step_seconds,
+                "search_duration": time.time() - search_start,
+                "max_sustainable_rps": max_rate,
+                "first_failing_rps": first_failure["target_rps"] if first_failure else None,
+                "saturation_curve": curve
+            },
+            "report_at_capacity": reports.get(max_rate, {})
+        }
+        self._save_results(report)
+        return report
+    
+    async def _run_capacity_step(self, rate: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Hold one constant arrival rate with fresh statistics and check it against the SLO"""
+        config = self.config
+        self.stats = RunStatistics()
+        self.real_time_aggregator = RealTimeAggregator()
+        self.open_model_stats = {key: 0.0 if key.startswith("max_") else 0 for key in self.open_model_stats}
+        saturated_before = sum(1 for window in self.saturation_monitor.windows if window["reasons"]) \
+            if self.saturation_monitor else 0
+        
+        duration = float(config.arrival_step_seconds)
+        step_start = time.time()
+        await self.run_open_model_load(
+            ArrivalRateScheduler(replace(config, arrival_pattern="constant", target_rps=rate)), duration)
+        step_report = await self._generate_infrastructure_report(time.time() - step_start)
+        
+        dropped = self.open_model_stats["dropped_requests"]
+        requests = self.stats.totals["requests"]
+        attempted = requests + dropped
+        error_rate = (self.stats.totals["errors"] + dropped) / attempted if attempted else 1.0
+        latency = self.stats.latency_histograms["total_latency"]
+        achieved = requests / duration
+        
+        failed_checks = []
+        if not latency.count or latency.percentile(99) * 1000 > config.slo_p99_ms:
+            failed_checks.append("p99_latency")
+        if error_rate > config.slo_error_rate:
+            failed_checks.append("error_rate")
+        if achieved < rate * 0.9:
+            failed_checks.append("throughput")
+        
+        saturated_after = sum(1 for window in self.saturation_monitor.windows if window["reasons"]) \
+            if self.saturation_monitor else 0
+        step = {
+            "target_rps": rate,
+            "achieved_rps": achieved,
+            "requests": requests,
+            "dropped_requests": dropped,
+            "error_rate": error_rate,
+            "p50_latency_ms": latency.percentile(50) * 1000,
+            "p95_latency_ms": latency.percentile(95) * 1000,
+            "p99_latency_ms": latency.percentile(99) * 1000,
+            "client_saturated_windows": saturated_after - saturated_before,
+            "passed": not failed_checks,
+            "failed_checks": failed_checks
+        }
+        return step, step_report
+    
+    async def run_distributed_load_test(self, agent_urls: List[str], token: str) -> Dict[str, Any]:
+        """Coordinate agents: split the config, start them together, merge their snapshots"""
+        config = self.config
+        agent_count = len(agent_urls)
+        shards = self._shard_users(agent_count, range(config.concurrent_users))
+        start_at = time.time() + config.agent_start_delay_seconds
+        base, ext = os.path.splitext(config.output_file)
+        agents = []
+        
+        logger.info(f"Starting distributed test: {config.scenario_name} on {agent_count} agents")
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30),
+                                         headers={AGENT_TOKEN_HEADER: token}) as agent_session:
+            for index, url in enumerate(agent_urls):
+                url = url.rstrip('/')
+                agent_config = replace(
+                    load_generator_config(config, index, agent_count),
+                    real_time_dashboard=False,
+                    collect_system_metrics=False,
+                    metrics_port=0,
+                    output_file=f"{base}.agent{index}{ext}",
+                    results_stream_file=""
+                )
+                async with agent_session.post(f"{url}/run", json={
+                    "config": asdict(agent_config),
+                    "start_at": start_at,
+                    "user_start": shards[index].start,
+                    "user_end": shards[index].stop
+                }) as response:
+                    if response.status != 202:
+                        raise RuntimeError(f"Agent {url} rejected the run: {await response.text()}")
+                agents.append({"url": url, "state": "waiting", "final": {}})
+            
+            pending = list(agents)
+            last_interval_end = start_at
+            while pending:
+                await asyncio.sleep(config.agent_snapshot_interval_seconds)
+                interval_stats = RunStatistics()
+                for agent in list(pending):
+                    try:
+                        async with agent_session.get(f"{agent['url']}/snapshots") as response:
+                            status = await response.json()
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        logger.warning(f"Agent {agent['url']} unreachable: {e}")
+                        continue
+                    
+                    for snapshot in status["snapshots"]:
+                        self._remap_snapshot_endpoints(snapshot)
+                        self.stats.merge_snapshot(snapshot)
+                        interval_stats.merge_snapshot(snapshot)
+                        last_interval_end = max(last_interval_end, snapshot["interval_end"])
+                    agent["state"] = status["state"]
+                    if status["state"] in ("done", "error"):
+                        agent["final"] = status.get("final") or {}
+                        if status["state"] == "error":
+                            logger.error(f"Agent {agent['url']} failed: {status.get('error')}")
+                        pending.remove(agent)
+                
+                interval_requests = interval_stats.totals["requests"]
+                if interval_requests:
+                    logger.info(f"[AGENTS] running: {len(pending)}/{agent_count} | "
+                                f"RPS: {interval_requests / config.agent_snapshot_interval_seconds:.1f} | "
+                                f"p99: {interval_stats.latency_histograms['total_latency'].percentile(99):.3f}s")
+        
+        for agent in agents:
+            for key, value in agent["final"].get("open_model_stats", {}).items():
+                if key.startswith("max_"):
+                    self.open_model_stats[key] = max(self.open_model_stats[key], value)
+                else:
+                    self.open_model_stats[key] += value
+            if agent["final"].get("client_saturated"):
+                self.remote_saturation.append({"agent": agent["url"], **agent["final"]["client_saturated"]})
+            self._merge_warmup(agent["final"].get("warmup"))
+            if agent["final"].get("pacing_drift"):
+                self._merge_pacing(agent["final"]["pacing_stats"], agent["final"]["pacing_drift"])
+            if agent["final"].get("transport"):
+                self.transport.merge_snapshot(agent["final"]["transport"])
+            self._merge_retry_stats(agent["final"].get("retry_stats", {}), agent["final"].get("breaker_stats", {}))
+        
+        report = await self._generate_infrastructure_report(max(last_interval_end - start_at, 0.0))
+        report["distributed"] = {
+            "agents": [
+                {
+                    "url": agent["url"],
+                    "state": agent["state"],
+                    "connection_pool_stats": agent["final"].get("connection_pool_stats", {}),
+                    "results_stream_file": agent["final"].get("results_stream_file", "")
+                }
+                for agent in agents
+            ]
+        }
+        self._save_results(report)
+        return report
+    
+    def _remap_snapshot_endpoints(self, snapshot: Dict[str, Any]):
+        """Rewrite an agent snapshot's endpoint indexes into this process's EndpointTable"""
+        entries = snapshot.get("endpoint_table")
+        if entries:
+            snapshot["endpoints"] = {
+                str(self.endpoint_table.index(*entries[int(index)])): endpoint
+                for index, endpoint in snapshot.get("endpoints", {}).items()
+            }
+            if snapshot.get("cache"):
+                histograms = {}
+                for key, data in snapshot["cache"]["histograms"].items():
+                    index, hit = key.split(":")
+                    histograms[f"{self.endpoint_table.index(*entries[int(index)])}:{hit}"] = data
+                snapshot["cache"]["histograms"] = histograms
+    
+    async def _start_result_stream(self):
+        """Start the background results writer unless raw results are embedded in the report"""
+        config = self.config
+        if config.results_stream_format == "none":
+            return
+        
+        self.results_stream_path = config.results_stream_file or StreamingResultWriter.default_path(
+            config.output_file, config.results_stream_format, config.results_stream_compression)
+        self.result_writer = StreamingResultWriter(
+            self.results_stream_path,
+            config.results_stream_format,
+            config.results_stream_compression,
+            batch_size=config.results_stream_batch_size
+        )
+        await self.result_writer.start({"config": redacted_config(config), "started_at": time.time()})
+        self.retain_results = False  # The stream holds the raw results; the report uses aggregates
+    
+    async def run_users(self, user_ids: range) -> int:
+        """Run the user simulations for a range of user ids"""
+        if self.config.closed_model_pacing == "scheduler":
+            return await self.run_paced_users(user_ids)
+        
+        user_tasks = [asyncio.create_task(self.user_simulation(user_id)) for user_id in user_ids]
+        user_results = await asyncio.gather(*user_tasks, return_exceptions=True)
+        return sum(completed for completed in user_results if isinstance(completed, int))
+    
+    def _pacing_worker_count(self, user_count: int) -> int:
+        """A closed-model user has one request in flight outside bursts; leave room for one burst"""
+        if self.config.pacing_workers > 0:
+            return self.config.pacing_workers
+        burst_extra = self.config.burst_size - 1 if self.config.burst_testing else 0
+        return max(1, min(user_count + burst_extra, 10_000))
+    
+    async def run_paced_users(self, user_ids: range) -> int:
+        """Closed-model users driven by one PacingScheduler and a worker pool
+        
+        Sends the same requests as user_simulation (ramp-up stagger, a burst at
+        every burst_size-th request number, 0.5-2s think time), with every
+        send's drift from its intended time recorded in pacing_drift.
+        """
+        config = self.config
+        pacing = PacingScheduler(config.pacing_tick_ms / 1000)
+        late_threshold = config.late_send_threshold_ms / 1000
+        ramp_step = config.ramp_up_seconds / config.concurrent_users
+        remaining_users = len(user_ids)
+        completed = 0
+        
+        def schedule_next(user_id: int, request_num: int, due: float):
+            nonlocal remaining_users
+            if request_num >= config.requests_per_user:
+                self.stats.timeline.mark_ramp_down(time.time())
+                remaining_users -= 1
+                if remaining_users == 0:
+                    pacing.finish()
+                return
+            if config.burst_testing and request_num % config.burst_size == 0:
+                # As in user_simulation, the burst's sends are numbered from request_num
+                # and the user carries on with request_num + 1 afterwards
+                count = min(config.burst_size, config.requests_per_user - request_num)
+                burst = [count, request_num + 1]  # Outstanding sends, next request number
+                for offset in range(count):
+                    pacing.schedule(due, (user_id, request_num + offset, burst))
+            else:
+                pacing.schedule(due, (user_id, request_num, None))
+        
+        async def worker():
+            nonlocal completed
+            while True:
+                due, (user_id, request_num, burst) = await pacing.ready.get()
+                drift = max(0.0, time.time() - due)
+                self.pacing_drift.record(drift)
+                self.pacing_stats["scheduled_sends"] += 1
+                if drift > late_threshold:
+                    self.pacing_stats["late_sends"] += 1
+                if drift * 1000 > self.pacing_stats["max_drift_ms"]:
+                    self.pacing_stats["max_drift_ms"] = drift * 1000
+                if self.saturation_monitor:
+                    self.saturation_monitor.record_dispatch(drift)
+                if burst is not None:
+                    self.stats.timeline.mark_burst(time.time())
+                
+                try:
+                    await self.make_api_request(user_id, request_num)
+                    completed += 1
+                finally:
+                    now = time.time()
+                    if self.saturation_monitor:
+                        now += self.saturation_monitor.admission_delay()  # Auto-throttle
+                    if burst is None:
+                        schedule_next(user_id, request_num + 1, now + self.rng_for(user_id).uniform(0.5, 2.0))
+                    else:
+                        burst[0] -= 1
+                        if burst[0] == 0:
+                            schedule_next(user_id, burst[1], now + config.burst_interval_seconds)
+        
+        if not remaining_users:
+            return 0
+        start = time.time()
+        for user_id in user_ids:
+            schedule_next(user_id, 0, start + ramp_step * user_id)
+        
+        workers = [asyncio.create_task(worker()) for _ in range(self._pacing_worker_count(len(user_ids)))]
+        try:
+            await pacing.dispatch()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return completed
+    
+    def _admit_arrival(self, deadline: float) -> Optional[Tuple[Optional[Tenant], float]]:
+        """Pick an open-model arrival's tenant and reserve its token
+        
+        Returns (tenant, seconds until the token is due), or None, with no token
+        taken, when the token would only come after deadline (the arrival would
+        be a late send) and the client drops the arrival instead of queueing it.
+        """
+        tenant = self.select_tenant(0, self.rng_for(0))
+        if tenant is None:
+            return None, 0.0
+        wait = tenant.reserve(max(0.0, deadline - time.time()))
+        return None if wait is None else (tenant, wait)
+    
+    async def run_open_model_load(self, scheduler: Optional[ArrivalRateScheduler] = None,
+                                  duration: Optional[float] = None):
+        """Fire requests at the scheduled arrival rate, independent of responses"""
+        scheduler = scheduler or ArrivalRateScheduler(self.config, self.rng_for("arrivals"))
+        duration = duration if duration is not None else self.config.test_duration_minutes * 60
+        late_threshold = self.config.late_send_threshold_ms / 1000
+        stats = self.open_model_stats
+        in_flight: Set[asyncio.Task] = set()
+        
+        def on_done(task: asyncio.Task):
+            in_flight.discard(task)
+        
+        test_start = time.time()
+        for request_num, offset in enumerate(scheduler.arrival_offsets(duration)):
+            scheduled_time = test_start + offset
+            delay = scheduled_time - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif request_num % 100 == 0:
+                await asyncio.sleep(0)  # Let responses progress while catching up
+            
+            if self.saturation_monitor:
+                scheduler.rate_factor = self.saturation_monitor.rate_factor
+            stats["scheduled_requests"] += 1
+            if len(in_flight) >= self.config.max_in_flight:
+                stats["dropped_requests"] += 1
+                continue
+            admission = self._admit_arrival(scheduled_time + late_threshold)
+            if admission is None:
+                stats["rate_limited_drops"] += 1
+                continue
+            
+            send_lag = time.time() - scheduled_time
+            if send_lag > late_threshold:
+                stats["late_requests"] += 1
+            stats["max_send_lag_ms"] = max(stats["max_send_lag_ms"], send_lag * 1000)
+            
+            task = asyncio.create_task(self.make_api_request(0, request_num, scheduled_time, admission=admission))
+            task.add_done_callback(on_done)
+            in_flight.add(task)
+            stats["sent_requests"] += 1
+        
+        self.stats.timeline.mark_ramp_down(time.time())
+        if in_flight:
+            await asyncio.wait(in_flight)
+    
+    async def run_trace_replay(self):
+        """Replay trace_file at trace_speed x recorded time, reading it lazily"""
+        config = self.config
+        reader = TraceReader(config.trace_file, config.trace_shard_index, config.trace_shard_count)
+        speed = config.trace_speed if config.trace_speed > 0 else 1.0
+        late_threshold = config.late_send_threshold_ms / 1000
+        stats = self.open_model_stats
+        in_flight: Set[asyncio.Task] = set()
+        
+        def on_done(task: asyncio.Task):
+            in_flight.discard(task)
+        
+        logger.info(f"Replaying trace {config.trace_file} at {speed:g}x"
+                    + (f" (shard {config.trace_shard_index + 1}/{config.trace_shard_count})"
+                       if config.trace_shard_count > 1 else ""))
+        replay_start = time.time()
+        for request_num, record in enumerate(reader):
+            scheduled_time = replay_start + max(record.offset, 0.0) / speed
+            delay = scheduled_time - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif request_num % 100 == 0:
+                await asyncio.sleep(0)
+            
+            stats["scheduled_requests"] += 1
+            if len(in_flight) >= config.max_in_flight:
+                stats["dropped_requests"] += 1
+                continue
+            admission = self._admit_arrival(scheduled_time + late_threshold)
+            if admission is None:
+                stats["rate_limited_drops"] += 1
+                continue
+            
+            send_lag = time.time() - scheduled_time
+            if send_lag > late_threshold:
+                stats["late_requests"] += 1
+            stats["max_send_lag_ms"] = max(stats["max_send_lag_ms"], send_lag * 1000)
+            
+            task = asyncio.create_task(self.make_api_request(0, request_num, scheduled_time, record, admission))
+            task.add_done_callback(on_done)
+            in_flight.add(task)
+            stats["sent_requests"] += 1
+        
+        self.stats.timeline.mark_ramp_down(time.time())
+        if in_flight:
+            await asyncio.wait(in_flight)
+        if reader.skipped_lines:
+            logger.warning(f"Skipped {reader.skipped_lines} unparseable trace lines")
+    
+    def _record_result(self, result: APITestResult):
+        """Add a completed request to the run's result set and live aggregates"""
+        if self.retain_results:
+            self.results.append(result)
+        if self.result_writer:
+            self.result_writer.submit(result)
+        self._update_real_time_stats(result)
+        self.stats.record(result)
+        if self.metrics_exporter:
+            self.metrics_exporter.record(result)
+        
+        if self.on_result:
+            self.on_result(result)
+    
+    def _resolve_worker_count(self) -> int:
+        """Number of load generation processes to use for this run"""
+        workers = self.config.worker_processes
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        if self.config.load_model in ("open", "trace"):
+            return max(1, workers)
+        return max(1, min(workers, self.config.concurrent_users))
+    
+    def _shard_users(self, worker_count: int, user_ids: range) -> List[range]:
+        """Split user ids into contiguous, near-equal shards (one per worker)"""
+        base, extra = divmod(len(user_ids), worker_count)
+        shards = []
+        start = user_ids.start
+        for index in range(worker_count):
+            size = base + (1 if index < extra else 0)
+            shards.append(range(start, start + size))
+            start += size
+        return shards
+    
+    async def _run_multiprocess_load(self, worker_count: int, user_ids: range):
+        """Shard users across worker processes and merge their streamed results
+        
+        Workers report "ready" once spawned, set up and warmed up, and wait on a
+        shared start event, so process start-up is not part of the measured run.
+        """
+        ctx = multiprocessing.get_context("spawn")
+        result_queue = ctx.Queue()
+        start_event = ctx.Event()
+        processes = []
+        
+        for index, shard in enumerate(self._shard_users(worker_count, user_ids)):
+            process = ctx.Process(
+                target=_load_worker_main,
+                args=(self.config, index, worker_count, shard.start, shard.stop, result_queue, start_event),
+                daemon=True
+            )
+            process.start()
+            processes.append(process)
+        
+        logger.info(f"Started {worker_count} load worker processes")
+        
+        loop = asyncio.get_running_loop()
+        pending = set(range(worker_count))
+        starting = set(range(worker_count))  # Not yet at the start barrier
+        endpoint_remaps: Dict[int, List[int]] = {}  # Worker endpoint index -> ours
+        while pending:
+            if not starting and not start_event.is_set():
+                self.load_started_at = time.time()
+                start_event.set()
+            
+            message = await loop.run_in_executor(None, _poll_queue, result_queue, 1.0)
+            if message is None:
+                # Detect workers that died without reporting back
+                for index in list(pending):
+                    if not processes[index].is_alive():
+                        logger.error(f"Load worker {index} exited unexpectedly (code {processes[index].exitcode})")
+                        pending.discard(index)
+                        starting.discard(index)
+                continue
+            
+            kind, worker_index, payload = message
+            if kind == "ready":
+                starting.discard(worker_index)
+            elif kind == "results":
+                remap = endpoint_remaps.get(worker_index)
+                for result in payload:
+                    if remap and 0 <= result.endpoint_index < len(remap):
+                        result.endpoint_index = remap[result.endpoint_index]
+                    self._merge_result(result)
+            elif kind == "endpoints":
+                endpoint_remaps[worker_index] = [self.endpoint_table.index(*entry) for entry in payload]
+            elif kind == "worker_stats":
+                self._merge_worker_stats(payload)
+            elif kind == "done":
+                pending.discard(worker_index)
+            elif kind == "error":
+                logger.error(f"Load worker {worker_index} failed: {payload}")
+                pending.discard(worker_index)
+                starting.discard(worker_index)
+        
+        for process in processes:
+            process.join(timeout=5)
+    
+    def _worker_stats(self) -> Dict[str, Any]:
+        """State a worker reports once at the end that is not carried by its results"""
+        return {
+            "open_model_stats": self.open_model_stats,
+            "client_saturated": self.saturation_monitor.summary() if self.saturation_monitor else {},
+            "pacing_stats": self.pacing_stats,
+            "transport": self.transport.snapshot(),
+            "timeline_marks": self.stats.timeline.marks(),
+            "retry_stats": self.retry_stats,
+            "breaker_stats": self.breaker_stats,
+            "pacing_drift": self.pacing_drift.to_dict(),
+            "warmup": self._warmup_export()
+        }
+    
+    def _merge_worker_stats(self, payload: Dict[str, Any]):
+        for key, value in payload["open_model_stats"].items():
+            if key.startswith("max_"):
+                self.open_model_stats[key] = max(self.open_model_stats[key], value)
+            else:
+                self.open_model_stats[key] += value
+        if payload["client_saturated"]:
+            self.remote_saturation.append(payload["client_saturated"])
+        self._merge_pacing(payload["pacing_stats"], payload["pacing_drift"])
+        if payload["transport"]:
+            self.transport.merge_snapshot(payload["transport"])
+        self.stats.timeline.merge_snapshot(payload["timeline_marks"])
+        self._merge_warmup(payload["warmup"])
+        self._merge_retry_stats(payload["retry_stats"], payload["breaker_stats"])
+    
+    def _merge_retry_stats(self, retry_stats: Dict[str, Any], breaker_stats: Dict[str, Any]):
+        """Fold in another load generator's retry policy and circuit breaker counters"""
+        for target, counts in ((self.retry_stats, retry_stats), (self.breaker_stats, breaker_stats)):
+            for key, value in counts.items():
+                target[key] = target.get(key, 0) + value
+    
+    def _merge_pacing(self, pacing_stats: Dict[str, Any], pacing_drift: Dict[str, Any]):
+        """Fold in another load generator's pacing counters and drift histogram"""
+        for key, value in pacing_stats.items():
+            self.pacing_stats[key] = max(self.pacing_stats[key], value) if key.startswith("max_") else \
+                self.pacing_stats[key] + value
+        self.pacing_drift.merge(LatencyHistogram.from_dict(pacing_drift))
+    
+    def _merge_result(self, result: APITestResult):
+        """Merge a result produced elsewhere (worker process or replayed stream)"""
+        index = result.endpoint_index
+        if result.endpoint and not (0 <= index < len(self.endpoint_table) and
+                                    self.endpoint_table.entries[index][1] == result.endpoint):
+            # Older stream, or an endpoint the producing process added at runtime
+            result.endpoint_index = self.endpoint_table.index(
+                "POST", result.endpoint, self.payload_generator.model_for(result.endpoint))
+        if result.first_byte_time > 0:
+            self.connection_monitor.record_connection(result.connection_time, result.connection_reused)
+        self._record_result(result)
+    
     async def _real_time_monitor(self):
         """Real-time monitoring and dashboard"""
         try:
             while True:
                 await asyncio.sleep(5)
                 
-                if len(self.results) > 0:
-                    recent_results = [r for r in self.results 
-                                    if time.time() - r.timestamp <= 60]
-                    
-                    if recent_results:
-                        avg_latency = statistics.mean([r.total_latency for r in recent_results])
-                        error_rate = len([r for r in recent_results if r.status_code >= 400]) / len(recent_results)
-                        rps = len(recent_results) / 60
-                        
-                        logger.info(f"[LIVE] RPS: {rps:.1f} | Avg Latency: {avg_latency:.2f}s | Error Rate: {error_rate:.1%}")
+                snapshot = self.real_time_aggregator.snapshot()
+                recent = snapshot["overall"]["10s"]
+                self.real_time_stats["requests_per_second"].append(recent["rps"])
+                self.real_time_stats["error_rate"].append(recent["error_rate"])
+                self.real_time_stats["avg_latency"].append(recent["avg_latency"])
+                
+                if snapshot["overall"]["60s"]["requests"]:
+                    for window, stats in snapshot["overall"].items():
+                        logger.info(f"[LIVE {window:>3}] RPS: {stats['rps']:.1f} | Avg Latency: {stats['avg_latency']:.2f}s | "
+                                    f"p95: {stats['p95_latency']:.2f}s | p99: {stats['p99_latency']:.2f}s | "
+                                    f"Error Rate: {stats['error_rate']:.1%}")
+                    for endpoint, windows in snapshot["endpoints"].items():
+                        stats = windows["10s"]
+                        if stats["requests"]:
+                            logger.info(f"[LIVE 10s] {endpoint}: RPS: {stats['rps']:.1f} | "
+                                        f"p95: {stats['p95_latency']:.2f}s | Error Rate: {stats['error_rate']:.1%}")
         except asyncio.CancelledError:
             pass
     
     async def _generate_infrastructure_report(self, test_duration: float) -> Dict[str, Any]:
         """Generate comprehensive API infrastructure report"""
-        if not self.results:
+        totals = self.stats.totals
+        if not totals["requests"]:
             return {"error": "No results collected"}
         
-        successful_results = [r for r in self.results if 200 <= r.status_code < 300]
-        error_results = [r for r in self.results if r.status_code >= 400]
-        
         # Core API metrics
-        latencies = [r.total_latency for r in successful_results]
-        connection_times = [r.connection_time for r in self.results if r.connection_time > 0]
-        first_byte_times = [r.first_byte_time for r in successful_results]
+        latency_histogram = self.stats.latency_histograms["total_latency"]
+        connection_histogram = self.stats.phase_histograms["connection_time"]
+        first_byte_histogram = self.stats.latency_histograms["first_byte_time"]
+        system_summary = self.system_monitor.summary() if self.config.collect_system_metrics else {}
         
         # Throughput analysis
-        total_requests = len(self.results)
+        total_requests = totals["requests"]
         requests_per_second = total_requests / test_duration if test_duration > 0 else 0
         
         # Connection analysis
-        reused_connections = len([r for r in self.results if r.connection_reused])
-        connection_reuse_rate = reused_connections / total_requests if total_requests > 0 else 0
-        
-        # Error analysis by type
-        error_breakdown = defaultdict(int)
-        for result in error_results:
-            error_breakdown[result.error_type] += 1
+        connection_reuse_rate = totals["reused_connections"] / total_requests
         
-        # Endpoint performance breakdown
+        # Endpoint performance breakdown (O(endpoints): counters kept per EndpointTable index)
         endpoint_performance = {}
-        for result in self.results:
-            endpoint = result.request_id.split('-')[0]  # Simplified endpoint extraction
-            if endpoint not in endpoint_performance:
-                endpoint_performance[endpoint] = {
-                    "requests": 0,
-                    "avg_latency": 0,
-                    "error_rate": 0,
-                    "latencies": []
-                }
-            
-            endpoint_performance[endpoint]["requests"] += 1
-            endpoint_performance[endpoint]["latencies"].append(result.total_latency)
-        
-        # Calculate endpoint averages
-        for endpoint, stats in endpoint_performance.items():
-            if stats["latencies"]:
-                stats["avg_latency"] = statistics.mean(stats["latencies"])
-                stats["p95_latency"] = sorted(stats["latencies"])[int(len(stats["latencies"]) * 0.95)]
-            del stats["latencies"]  # Remove raw data for cleaner output
+        for index, endpoint_totals in sorted(self.stats.endpoint_totals.items()):
+            method, path, model = self.endpoint_table.entries[index]
+            histogram = self.stats.endpoint_histograms.get(index) or LatencyHistogram()
+            endpoint_requests = endpoint_totals["requests"]
+            endpoint_performance[self.endpoint_table.label(index)] = {
+                "method": method,
+                "path": path,
+                "model": model,
+                "requests": endpoint_requests,
+                "requests_per_second": endpoint_requests / test_duration if test_duration > 0 else 0,
+                "error_rate": endpoint_totals["errors"] / endpoint_requests if endpoint_requests else 0,
+                "rate_limited": endpoint_totals["rate_limited"],
+                "avg_latency": histogram.mean,
+                "p50_latency": histogram.percentile(50),
+                "p95_latency": histogram.percentile(95),
+                "p99_latency": histogram.percentile(99),
+                "request_bytes": endpoint_totals["request_bytes"],
+                "response_bytes": endpoint_totals["response_bytes"]
+            }
         
         report = {
             "test_metadata": {
                 "scenario_name": self.config.scenario_name,
                 "test_duration": test_duration,
                 "target_url": self.config.base_url,
+                "load_model": self.config.load_model,
                 "concurrent_users": self.config.concurrent_users,
-                "total_requests_planned": self.config.concurrent_users * self.config.requests_per_user,
+                "total_requests_planned": (self.open_model_stats["scheduled_requests"]
+                                           if self.config.load_model != "closed"
+                                           else self.config.concurrent_users * self.config.requests_per_user),
                 "total_requests_executed": total_requests
             },
             
             "performance_summary": {
                 "requests_per_second": requests_per_second,
-                "total_throughput_mb": sum(r.response_size for r in self.results) / 1024 / 1024,
-                "avg_request_size_kb": statistics.mean([r.request_size for r in self.results]) / 1024 if self.results else 0,
-                "avg_response_size_kb": statistics.mean([r.response_size for r in self.results]) / 1024 if self.results else 0
+                "total_throughput_mb": totals["response_bytes"] / 1024 / 1024,
+                "avg_request_size_kb": totals["request_bytes"] / total_requests / 1024,
+                "avg_response_size_kb": totals["response_bytes"] / total_requests / 1024
             },
             
             "latency_analysis": {
-                "avg_total_latency": statistics.mean(latencies) if latencies else 0,
-                "median_latency": statistics.median(latencies) if latencies else 0,
-                "p95_latency": sorted(latencies)[int(len(latencies) * 0.95)] if len(latencies) > 20 else (max(latencies) if latencies else 0),
-                "p99_latency": sorted(latencies)[int(len(latencies) * 0.99)] if len(latencies) > 100 else (max(latencies) if latencies else 0),
-                "max_latency": max(latencies) if latencies else 0,
-                "avg_connection_time": statistics.mean(connection_times) if connection_times else 0,
-                "avg_first_byte_time": statistics.mean(first_byte_times) if first_byte_times else 0
+                "avg_total_latency": latency_histogram.mean,
+                "median_latency": latency_histogram.percentile(50),
+                "p90_latency": latency_histogram.percentile(90),
+                "p95_latency": latency_histogram.percentile(95),
+                "p99_latency": latency_histogram.percentile(99),
+                "p999_latency": latency_histogram.percentile(99.9),
+                "max_latency": latency_histogram.max_value,
+                "avg_connection_time": connection_histogram.mean,
+                "avg_first_byte_time": first_byte_histogram.mean,
+                "connection_time_percentiles": connection_histogram.percentiles(),
+                "first_byte_time_percentiles": first_byte_histogram.percentiles(),
+                "streaming": self._streaming_summary()
+            },
+            
+            "phase_analysis": {
+                phase: {"requests": histogram.count, "avg": histogram.mean, **histogram.percentiles()}
+                for phase, histogram in self.stats.phase_histograms.items()
             },
             
             "connection_analysis": {
                 "connection_reuse_rate": connection_reuse_rate,
-                "avg_connection_time": statistics.mean(connection_times) if connection_times else 0,
-                "connection_pool_stats": self.connection_monitor.pool_stats
+                "new_connections": totals["new_connections"],
+                "avg_connection_time": connection_histogram.mean,
+                "connection_pool_stats": self.connection_monitor.pool_stats,
+                **(self.transport.summary(totals) if self.transport else {"transport": self.config.transport}),
+                "pool_wait_time": self.stats.phase_histograms["pool_wait_time"].percentiles()
             },
             
             "reliability_metrics": {
-                "success_rate": len(successful_results) / total_requests if total_requests > 0 else 0,
-                "error_rate": len(error_results) / total_requests if total_requests > 0 else 0,
-                "rate_limited_requests": len([r for r in self.results if r.rate_limited]),
-                "timeout_rate": len([r for r in self.results if r.error_type == "timeout"]) / total_requests if total_requests > 0 else 0
+                "success_rate": totals["successful"] / total_requests,
+                "error_rate": totals["errors"] / total_requests,
+                "rate_limited_requests": totals["rate_limited"],
+                "timeout_rate": totals["timeouts"] / total_requests
             },
             
-            "error_analysis": dict(error_breakdown),
+            "open_model_scheduler": {
+                **({"trace_file": self.config.trace_file, "trace_speed": self.config.trace_speed}
+                   if self.config.load_model == "trace" else
+                   {"arrival_pattern": self.config.arrival_pattern, "target_rps": self.config.target_rps}),
+                "max_in_flight": self.config.max_in_flight,
+                **self.open_model_stats
+            } if self.config.load_model != "closed" else {},
+            
+            "client_saturated": self._client_saturation_summary(),
+            "cache_analysis": self._cache_summary(),
+            "retries": self._retry_summary(),
+            "pacing": self._pacing_summary(),
+            "warmup": self._warmup_summary(),
+            "time_series": self.stats.timeline.report(
+                self._ramp_up_seconds(),
+                self.system_monitor.metrics_history if self.config.collect_system_metrics else []),
+            
+            "error_analysis": dict(self.stats.error_breakdown),
             "endpoint_performance": endpoint_performance,
+            "tenant_performance": self._tenant_summary(test_duration),
             
-            "system_resources": {
-                "peak_memory_mb": max([m["memory_used_mb"] for m in self.system_monitor.metrics_history], default=0),
-                "avg_cpu_percent": statistics.mean([m["cpu_percent"] for m in self.system_monitor.metrics_history]) if self.system_monitor.metrics_history else 0,
-                "peak_connections": max([m["network_connections"] for m in self.system_monitor.metrics_history], default=0)
-            } if self.config.collect_system_metrics else {}
+            "system_resources": system_summary
         }
         
         return report
     
+    def _warmup_summary(self) -> Dict[str, Any]:
+        """Warm-up requests (left out of every other section) and the pool they left open"""
+        totals = self.warmup_stats.totals
+        if not totals["requests"]:
+            return {}
+        connection_histogram = self.warmup_stats.phase_histograms["connection_time"]
+        return {
+            "requests": totals["requests"],
+            "successful": totals["successful"],
+            "errors": totals["errors"],
+            "duration_seconds": self.warmup_state.get("duration_seconds", 0.0),
+            "connections_target": self.warmup_state.get("connections_target", 0),
+            "connections_opened": totals["new_connections"],
+            "avg_connection_time": connection_histogram.mean,
+            "connection_time": connection_histogram.percentiles(),
+            "latency": self.warmup_stats.latency_histograms["total_latency"].percentiles(),
+            "pool_at_measurement_start": self.warmup_state.get("pool_at_measurement_start", [])
+        }
+    
+    def _tenant_summary(self, test_duration: float) -> Dict[str, Any]:
+        """Throughput, 429 rate and latency per tenant, next to its client-side rate cap"""
+        caps = {tenant.profile.name: tenant.profile.rate_limit_rps for tenant in self.tenants}
+        summary = {}
+        for name, tenant_totals in sorted(self.stats.tenant_totals.items()):
+            histogram = self.stats.tenant_histograms.get(name) or LatencyHistogram()
+            requests = tenant_totals["requests"]
+            summary[name] = {
+                "rate_limit_rps": caps.get(name, 0.0),
+                "requests": requests,
+                "requests_per_second": requests / test_duration if test_duration > 0 else 0,
+                "success_rate": tenant_totals["successful"] / requests,
+                "error_rate": tenant_totals["errors"] / requests,
+                "rate_limited": tenant_totals["rate_limited"],
+                "rate_limited_rate": tenant_totals["rate_limited"] / requests,
+                "throttled_requests": tenant_totals["throttled"],
+                "avg_throttle_wait": tenant_totals["throttle_seconds"] / requests,
+                "avg_latency": histogram.mean,
+                "p50_latency": histogram.percentile(50),
+                "p95_latency": histogram.percentile(95),
+                "p99_latency": histogram.percentile(99)
+            }
+        return summary
+    
+    def _ramp_up_seconds(self) -> float:
+        """How long the configured load takes to reach full strength"""
+        config = self.config
+        if config.load_model == "closed":
+            return config.ramp_up_seconds
+        if config.load_model == "open" and config.arrival_pattern == "ramp":
+            return config.ramp_up_seconds
+        if config.load_model == "open" and config.arrival_pattern == "step" and config.arrival_step_rps > 0:
+            steps = math.ceil(max(0.0, config.target_rps - config.arrival_start_rps) / config.arrival_step_rps)
+            return steps * config.arrival_step_seconds
+        return 0.0
+    
+    def _pacing_summary(self) -> Dict[str, Any]:
+        """Closed-model send drift (actual vs intended send time) from the pacing scheduler"""
+        if not self.pacing_stats["scheduled_sends"]:
+            return {}
+        drift = self.pacing_drift
+        return {
+            "mode": self.config.closed_model_pacing,
+            "virtual_users": self.config.concurrent_users,
+            "tick_ms": self.config.pacing_tick_ms,
+            "late_send_threshold_ms": self.config.late_send_threshold_ms,
+            **self.pacing_stats,
+            "late_send_rate": self.pacing_stats["late_sends"] / self.pacing_stats["scheduled_sends"],
+            "drift_ms": {"mean": drift.mean * 1000, **{key: value * 1000 for key, value in drift.percentiles().items()}}
+        }
+    
+    def _cache_summary(self) -> Dict[str, Any]:
+        """Hit vs miss latency per endpoint and hit rate over time (successful requests)"""
+        cache_totals = self.stats.cache_totals
+        responses = cache_totals["keyed_responses"] + cache_totals["unkeyed_responses"]
+        hits = cache_totals["keyed_hits"] + cache_totals["unkeyed_hits"]
+        if not responses or not (hits or self.config.cache_validation):
+            return {}
+        
+        def latency(histogram: Optional[LatencyHistogram]) -> Dict[str, Any]:
+            histogram = histogram or LatencyHistogram()
+            return {"count": histogram.count, "avg": histogram.mean, "p50": histogram.percentile(50),
+                    "p95": histogram.percentile(95), "p99": histogram.percentile(99)}
+        
+        endpoints = {}
+        for index in sorted({index for index, _ in self.stats.cache_histograms}):
+            hit_latency = latency(self.stats.cache_histograms.get((index, True)))
+            miss_latency = latency(self.stats.cache_histograms.get((index, False)))
+            endpoint_responses = hit_latency["count"] + miss_latency["count"]
+            endpoints[self.endpoint_table.label(index)] = {
+                "responses": endpoint_responses,
+                "hit_rate": hit_latency["count"] / endpoint_responses,
+                "hit_latency": hit_latency,
+                "miss_latency": miss_latency,
+                "p50_speedup": miss_latency["p50"] / hit_latency["p50"] if hit_latency["p50"] else 0
+            }
+        
+        timeline = sorted(self.stats.cache_timeline.items())
+        first_bucket = timeline[0][0] if timeline else 0
+        return {
+            "key_space": {
+                "keys": self.config.cache_key_space,
+                "zipf_skew": self.config.cache_zipf_skew,
+                "repeat_ratio": self.config.cache_repeat_ratio
+            } if self.config.cache_validation else {},
+            "hit_rate": hits / responses,
+            "keyed_hit_rate": (cache_totals["keyed_hits"] / cache_totals["keyed_responses"]
+                               if cache_totals["keyed_responses"] else 0),
+            "unkeyed_hit_rate": (cache_totals["unkeyed_hits"] / cache_totals["unkeyed_responses"]
+                                 if cache_totals["unkeyed_responses"] else 0),
+            "endpoints": endpoints,
+            "hit_rate_over_time": [
+                {"offset_seconds": bucket - first_bucket, "responses": counts[0], "hits": counts[1],
+                 "hit_rate": counts[1] / counts[0] if counts[0] else 0}
+                for bucket, counts in timeline
+            ],
+            "bucket_seconds": RunStatistics.CACHE_TIMELINE_SECONDS
+        }
+    
+    def _retry_summary(self) -> Dict[str, Any]:
+        """Retry amplification and latency with vs without retries"""
+        totals = self.stats.totals
+        config = self.config
+        if config.retry_policy == "none" and not config.circuit_breaker and not totals["retried_requests"]:
+            return {}
+        histograms = self.stats.latency_histograms
+        return {
+            "policy": config.retry_policy,
+            "max_retries": config.max_retries,
+            "logical_requests": totals["requests"],
+            "attempts": totals["attempts"],
+            "amplification": totals["attempts"] / totals["requests"],
+            "retried_requests": totals["retried_requests"],
+            "retry_rate": totals["retried_requests"] / totals["requests"],
+            "short_circuited": totals["short_circuited"],
+            "latency_including_retries": histograms["total_latency"].percentiles(),
+            "latency_excluding_retries": histograms["attempt_latency"].percentiles(),
+            "retried_requests_latency": histograms["retried_total_latency"].percentiles(),
+            "policy_stats": self.retry_stats,
+            "circuit_breaker": {"enabled": config.circuit_breaker, **self.breaker_stats}
+        }
+    
+    @property
+    def retry_stats(self) -> Dict[str, Any]:
+        return self.retry_policy.stats if self.retry_policy else {}
+    
+    @property
+    def breaker_stats(self) -> Dict[str, Any]:
+        return self.circuit_breaker.stats if self.circuit_breaker else {}
+    
+    def _client_saturation_summary(self) -> Dict[str, Any]:
+        """This process's saturation windows, or the totals of those reported by workers or agents"""
+        if not self.saturation_monitor:
+            return {}
+        summary = self.saturation_monitor.summary()
+        remotes = self.remote_saturation
+        if not remotes:
+            return summary
+        
+        # Workers or agents sent the load; this process's own monitor saw none of it
+        saturated_requests = sum(remote["saturated_requests"] for remote in remotes)
+        total_requests = sum(remote["total_requests"] for remote in remotes)
+        reasons: Dict[str, int] = defaultdict(int)
+        for remote in remotes:
+            for reason, count in remote["reasons"].items():
+                reasons[reason] += count
+        summary.update({
+            "detected": any(remote["detected"] for remote in remotes),
+            "saturated_windows": sum(remote["saturated_windows"] for remote in remotes),
+            "total_windows": sum(remote["total_windows"] for remote in remotes),
+            "saturated_requests": saturated_requests,
+            "total_requests": total_requests,
+            "saturated_request_fraction": saturated_requests / total_requests if total_requests else 0.0,
+            "reasons": dict(reasons),
+            "peak_in_flight": max(remote["peak_in_flight"] for remote in remotes),
+            "peak_loop_lag_ms": max(remote["peak_loop_lag_ms"] for remote in remotes),
+            "peak_dispatch_delay_ms": max(remote["peak_dispatch_delay_ms"] for remote in remotes),
+            "periods": [],  # Per load generator, under load_generators
+            "load_generators": remotes
+        })
+        summary["auto_throttle"].update({
+            "final_rate_factor": min(remote["auto_throttle"]["final_rate_factor"] for remote in remotes),
+            "adjustments": sum(remote["auto_throttle"]["adjustments"] for remote in remotes)
+        })
+        return summary
+    
+    def _streaming_summary(self) -> Dict[str, Any]:
+        """Time-to-first-chunk, inter-chunk gap and stall statistics for streamed responses"""
+        totals = self.stats.totals
+        if not totals["streamed_requests"]:
+            return {}
+        return {
+            "streamed_requests": totals["streamed_requests"],
+            "avg_chunks_per_request": totals["stream_chunks"] / totals["streamed_requests"],
+            "avg_chunks_per_second": totals["stream_chunks"] / totals["stream_seconds"] if totals["stream_seconds"] else 0,
+            "stalls": totals["stream_stalls"],
+            "stalled_request_rate": totals["stalled_requests"] / totals["streamed_requests"],
+            "stall_threshold_ms": self.config.stream_stall_threshold_ms,
+            **{
+                name: {"avg": histogram.mean, **histogram.percentiles()}
+                for name, histogram in self.stats.stream_histograms.items()
+            }
+        }
+    
     def _save_results(self, report: Dict[str, Any]):
         """Save comprehensive test results"""
+        if self.results_stream_path:
+            output_data = {
+                "infrastructure_report": report,
+                "raw_results_file": self.results_stream_path,
+                "system_metrics": self.system_monitor.metrics_history if self.config.collect_system_metrics else []
+            }
+            with open(self.config.output_file, 'w') as f:
+                json.dump(output_data, f, indent=2)
+            logger.info(f"Infrastructure test results saved to {self.config.output_file}")
+            return
+        
         output_data = {
             "infrastructure_report": report,
             "raw_results": [
@@ -696,6 +4344,7 @@ class APIInfrastructureTester:
                     "timestamp": r.timestamp,
                     "request_id": r.request_id,
                     "user_id": r.user_id,
+                    "endpoint": r.endpoint,
                     "total_latency": r.total_latency,
                     "connection_time": r.connection_time,
                     "first_byte_time": r.first_byte_time,
@@ -719,20 +4368,1373 @@ class APIInfrastructureTester:
         
         logger.info(f"Infrastructure test results saved to {self.config.output_file}")
 
+def scaled_config_share(config: LoadTestConfig, share: float) -> LoadTestConfig:
+    """Config for one of several equal load generators (open-model rates are split)"""
+    if config.load_model != "open":
+        return config  # Closed-model users are split by user id range instead
+    return replace(
+        config,
+        target_rps=config.target_rps * share,
+        arrival_start_rps=config.arrival_start_rps * share,
+        arrival_step_rps=config.arrival_step_rps * share,
+        max_in_flight=max(1, int(config.max_in_flight * share))
+    )
+
+def load_generator_config(config: LoadTestConfig, index: int, count: int) -> LoadTestConfig:
+    """Config for load generator `index` of `count` (worker process or agent)
+    
+    Open-model rates and tenant rate caps are split, trace records are sharded
+    round-robin, and a seeded open-model run gets a distinct seed per generator
+    (closed-model users already have their own RNG streams).
+    """
+    generator_config = scaled_config_share(config, 1.0 / count)
+    if count == 1:
+        return generator_config
+    if config.tenants:
+        generator_config = replace(generator_config, tenants=[
+            {**tenant, **{key: tenant[key] / count for key in ("rate_limit_rps", "burst") if key in tenant}}
+            for tenant in config.tenants
+        ])
+    if config.load_model == "trace":
+        generator_config = replace(
+            generator_config,
+            trace_shard_index=config.trace_shard_index * count + index,
+            trace_shard_count=config.trace_shard_count * count
+        )
+    if config.load_model != "closed" and config.random_seed is not None:
+        generator_config = replace(generator_config, random_seed=config.random_seed * 1000 + index)
+    return generator_config
+
+AGENT_TOKEN_HEADER = "X-Agent-Token"
+
+class LoadAgent:
+    """HTTP agent that runs its share of a distributed test and serves stats snapshots
+    
+    Protocol: POST /run (config, synchronized start time, user id range),
+    GET /snapshots (per-interval RunStatistics deltas since the last poll, plus
+    state and final counters), GET /health. Every endpoint but /health requires
+    the shared token in the X-Agent-Token header.
+    """
+    
+    # Remote configs cannot choose where the agent writes: these are reset to agent-local values
+    LOCAL_PATH_FIELDS = ("output_file", "results_stream_file", "payload_cache_dir")
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 8089, token: str = "", output_dir: str = "."):
+        if not token:
+            raise ValueError("A load agent requires a shared token")
+        self.host = host
+        self.port = port
+        self.token = token
+        self.output_dir = output_dir
+        self.state = "idle"
+        self.error = ""
+        self.snapshots: List[Dict[str, Any]] = []
+        self.final: Dict[str, Any] = {}
+        self._run_task: Optional[asyncio.Task] = None
+    
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._check_token])
+        app.router.add_post("/run", self.handle_run)
+        app.router.add_get("/snapshots", self.handle_snapshots)
+        app.router.add_get("/health", self.handle_health)
+        return app
+    
+    async def serve(self):
+        runner = web.AppRunner(self.build_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.host, self.port).start()
+        logger.info(f"Load agent listening on {self.host}:{self.port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+    
+    @web.middleware
+    async def _check_token(self, request: web.Request, handler):
+        if request.path != "/health" and not hmac.compare_digest(
+                request.headers.get(AGENT_TOKEN_HEADER, "").encode(), self.token.encode()):
+            return web.json_response({"error": "missing or invalid agent token"}, status=401)
+        return await handler(request)
+    
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"state": self.state})
+    
+    def _agent_config(self, values: Dict[str, Any]) -> LoadTestConfig:
+        """Build the run's config from a coordinator's, keeping file paths under output_dir"""
+        known = {f.name for f in fields(LoadTestConfig)}
+        output_name = os.path.basename(str(values.get("output_file") or "")) or "agent_results.json"
+        values = {key: value for key, value in values.items() if key in known and key not in self.LOCAL_PATH_FIELDS}
+        values.update(output_file=os.path.join(self.output_dir, output_name), metrics_port=0)
+        return LoadTestConfig(**values)
+    
+    async def handle_run(self, request: web.Request) -> web.Response:
+        if self.state in ("waiting", "running"):
+            return web.json_response({"error": "a run is already in progress"}, status=409)
+        
+        try:
+            body = await request.json()
+            config = self._agent_config(body["config"])
+            start_at, user_ids = float(body["start_at"]), range(int(body["user_start"]), int(body["user_end"]))
+        except (ValueError, KeyError, TypeError) as e:
+            return web.json_response({"error": f"invalid run request: {e}"}, status=400)
+        self.state = "waiting"
+        self.error = ""
+        self.snapshots = []
+        self.final = {}
+        self._run_task = asyncio.create_task(self._run(config, start_at, user_ids))
+        return web.json_response({"accepted": True}, status=202)
+    
+    async def handle_snapshots(self, request: web.Request) -> web.Response:
+        snapshots, self.snapshots = self.snapshots, []
+        return web.json_response({
+            "state": self.state,
+            "error": self.error,
+            "snapshots": snapshots,
+            "final": self.final
+        })
+    
+    def _take_snapshot(self, tester: "APIInfrastructureTester"):
+        """Swap in fresh stats and queue the finished interval as a snapshot"""
+        interval_stats, tester.stats = tester.stats, RunStatistics()
+        if interval_stats.totals["requests"]:
+            self.snapshots.append({
+                "interval_end": time.time(),
+                "endpoint_table": tester.endpoint_table.entries,
+                **interval_stats.snapshot()
+            })
+    
+    async def _snapshot_loop(self, tester: "APIInfrastructureTester", interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self._take_snapshot(tester)
+    
+    async def _run(self, config: LoadTestConfig, start_at: float, user_ids: range):
+        try:
+            async with APIInfrastructureTester(config) as tester:
+                await tester.warm_up()
+                if time.time() > start_at:
+                    logger.warning(f"Warm-up overran the synchronized start by {time.time() - start_at:.1f}s "
+                                   f"(raise agent_start_delay_seconds)")
+                await asyncio.sleep(max(0.0, start_at - time.time()))
+                self.state = "running"
+                logger.info(f"Agent run started: {config.scenario_name} ({len(user_ids)} users)")
+                
+                snapshot_task = asyncio.create_task(
+                    self._snapshot_loop(tester, config.agent_snapshot_interval_seconds))
+                try:
+                    await tester._start_result_stream()
+                    await tester.execute_load(user_ids)
+                    if tester.result_writer:
+                        await tester.result_writer.close()
+                finally:
+                    snapshot_task.cancel()
+                    self._take_snapshot(tester)
+                
+                self.final = {
+                    "open_model_stats": tester.open_model_stats,
+                    "connection_pool_stats": tester.connection_monitor.pool_stats,
+                    "results_stream_file": tester.results_stream_path,
+                    "client_saturated": tester.saturation_monitor.summary() if tester.saturation_monitor else {},
+                    "warmup": tester._warmup_export(),
+                    "pacing_stats": tester.pacing_stats,
+                    "pacing_drift": tester.pacing_drift.to_dict(),
+                    "transport": tester.transport.snapshot(),
+                    "retry_stats": tester.retry_stats,
+                    "breaker_stats": tester.breaker_stats
+                }
+            self.state = "done"
+            logger.info("Agent run finished")
+        except Exception as e:
+            logger.error(f"Agent run failed: {e}")
+            self.error = str(e)
+            self.state = "error"
+
+class _WorkerResultForwarder:
+    """Batch a worker's completed results and stream them to the coordinator"""
+    
+    def __init__(self, result_queue, worker_index: int, batch_size: int, flush_interval: float):
+        self.result_queue = result_queue
+        self.worker_index = worker_index
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batch: List[APITestResult] = []
+        self.last_flush = time.time()
+        self.endpoint_table: Optional[EndpointTable] = None
+        self._sent_endpoints = 0
+    
+    def __call__(self, result: APITestResult):
+        self.batch.append(result)
+        if len(self.batch) >= self.batch_size or time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        # Endpoints discovered at runtime (trace replay) must reach the coordinator before their results
+        if self.endpoint_table and len(self.endpoint_table) > self._sent_endpoints:
+            self.result_queue.put(("endpoints", self.worker_index, list(self.endpoint_table.entries)))
+            self._sent_endpoints = len(self.endpoint_table)
+        if self.batch:
+            self.result_queue.put(("results", self.worker_index, self.batch))
+            self.batch = []
+        self.last_flush = time.time()
+
+def _poll_queue(result_queue, timeout: float):
+    """Blocking queue read used from an executor thread; returns None on timeout"""
+    try:
+        return result_queue.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+async def _run_load_worker(config: LoadTestConfig, worker_index: int, worker_count: int,
+                           user_start: int, user_end: int, result_queue, start_event):
+    """Worker process body: own event loop, own ClientSession, results streamed back"""
+    worker_config = replace(
+        load_generator_config(config, worker_index, worker_count),
+        worker_processes=1,
+        collect_system_metrics=False,
+        real_time_dashboard=False,
+        metrics_port=0
+    )
+    forwarder = _WorkerResultForwarder(
+        result_queue, worker_index,
+        config.worker_batch_size, config.worker_flush_interval_seconds
+    )
+    
+    async with APIInfrastructureTester(worker_config) as tester:
+        tester.on_result = forwarder
+        forwarder.endpoint_table = tester.endpoint_table
+        tester.retain_results = False
+        await tester.warm_up()
+        result_queue.put(("ready", worker_index, None))
+        await asyncio.get_running_loop().run_in_executor(None, start_event.wait)
+        if config.load_model == "open":
+            await tester.run_open_model_load()
+        elif config.load_model == "trace":
+            await tester.run_trace_replay()
+        else:
+            await tester.run_users(range(user_start, user_end))
+    
+    forwarder.flush()
+    result_queue.put(("worker_stats", worker_index, tester._worker_stats()))
+
+def _load_worker_main(config: LoadTestConfig, worker_index: int, worker_count: int,
+                      user_start: int, user_end: int, result_queue, start_event):
+    """Entry point for a load generation worker process"""
+    try:
+        asyncio.run(_run_load_worker(config, worker_index, worker_count, user_start, user_end, result_queue,
+                                     start_event))
+        result_queue.put(("done", worker_index, None))
+    except Exception as e:
+        result_queue.put(("error", worker_index, str(e)))
+
+@dataclass
+class MockServerConfig:
+    """Behaviour of the bundled mock LLM API server"""
+    host: str = "127.0.0.1"
+    port: int = 8080
+    processes: int = 1  # >1 shares the port across processes (SO_REUSEPORT)
+    
+    # Latency is log-normal: median and shape (sigma of the underlying normal)
+    latency_median_ms: float = 50.0
+    latency_sigma: float = 0.5
+    max_concurrency: int = 0  # Requests beyond this wait in a queue (X-Queue-Time), 0 = unlimited
+    
+    # Streaming completions
+    stream_tokens: int = 50
+    tokens_per_second: float = 100.0
+    embedding_dimensions: int = 256
+    
+    # Fault injection and caching
+    rate_limit_percentage: float = 0.0
+    server_error_percentage: float = 0.0
+    cache_hit_percentage: float = 0.1  # Random hits when response_cache_entries is 0
+    response_cache_entries: int = 0  # >0: real LRU cache keyed on the request body
+    cache_hit_latency_factor: float = 0.1
+    server_count: int = 4  # Distinct X-Server-ID values, as if behind a load balancer
+
+class MockLLMServer:
+    """Local OpenAI-style API for self-benchmarking and reproducing load-test scenarios
+    
+    Serves /v1/chat/completions, /v1/completions, /v1/embeddings, /health and
+    /metrics with configurable latency, token streaming rate and 429/5xx
+    injection, and sets the timing/cache/server headers the tester parses.
+    """
+    
+    REQUIRED_FIELDS = {
+        "/v1/chat/completions": "messages",
+        "/v1/completions": "prompt",
+        "/v1/embeddings": "input"
+    }
+    
+    def __init__(self, config: MockServerConfig):
+        self.config = config
+        self.server_ids = [f"mock-{os.getpid()}-{i}" for i in range(max(1, config.server_count))]
+        self.semaphore = asyncio.Semaphore(config.max_concurrency) if config.max_concurrency > 0 else None
+        self.in_flight = 0
+        self.request_counts: Dict[Tuple[str, int], int] = defaultdict(int)
+        self.latency_histogram = LatencyHistogram()
+        self.response_cache: "OrderedDict[bytes, bool]" = OrderedDict()
+    
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        for path in self.REQUIRED_FIELDS:
+            app.router.add_post(path, self.handle_api)
+        app.router.add_route("*", "/health", self.handle_health)
+        app.router.add_route("*", "/metrics", self.handle_metrics)
+        return app
+    
+    async def serve(self):
+        runner = web.AppRunner(self.build_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.config.host, self.config.port,
+                          reuse_port=self.config.processes > 1).start()
+        logger.info(f"Mock LLM server listening on {self.config.host}:{self.config.port} (pid {os.getpid()})")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+    
+    def _sample_latency(self, cache_hit: bool) -> float:
+        if self.config.latency_median_ms <= 0:
+            return 0.0
+        latency = random.lognormvariate(math.log(self.config.latency_median_ms / 1000), self.config.latency_sigma)
+        return latency * self.config.cache_hit_latency_factor if cache_hit else latency
+    
+    def _headers(self, processing_time: float, queue_time: float, cache_hit: bool) -> Dict[str, str]:
+        return {
+            "X-Processing-Time": f"{processing_time:.6f}",
+            "X-Queue-Time": f"{queue_time:.6f}",
+            "X-Cache": "HIT" if cache_hit else "MISS",
+            "X-Server-ID": random.choice(self.server_ids),
+            "X-API-Version": "v1"
+        }
+    
+    def _cache_lookup(self, path: str, body: bytes) -> bool:
+        """Whether this request is a cache hit (LRU on the body digest, or random)"""
+        entries = self.config.response_cache_entries
+        if entries <= 0:
+            return random.random() < self.config.cache_hit_percentage
+        digest = hashlib.blake2b(path.encode() + body, digest_size=16).digest()
+        if digest in self.response_cache:
+            self.response_cache.move_to_end(digest)
+            return True
+        self.response_cache[digest] = True
+        if len(self.response_cache) > entries:
+            self.response_cache.popitem(last=False)
+        return False
+    
+    def _validation_error(self, path: str, payload: Any) -> str:
+        if not isinstance(payload, dict):
+            return "request body must be a JSON object"
+        if not isinstance(payload.get("model"), str):
+            return "'model' must be a string"
+        if self.REQUIRED_FIELDS[path] not in payload:
+            return f"missing required field '{self.REQUIRED_FIELDS[path]}'"
+        max_tokens = payload.get("max_tokens", 1)
+        if not isinstance(max_tokens, int) or max_tokens < 1:
+            return "'max_tokens' must be a positive integer"
+        return ""
+    
+    def _count(self, path: str, status: int, started: float):
+        self.request_counts[(path, status)] += 1
+        self.latency_histogram.record(time.perf_counter() - started)
+    
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "in_flight": self.in_flight})
+    
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        lines = [
+            "# TYPE mock_requests_total counter"
+        ]
+        for (path, status), count in sorted(self.request_counts.items()):
+            lines.append(f'mock_requests_total{{path="{path}",status="{status}"}} {count}')
+        lines.append("# TYPE mock_in_flight gauge")
+        lines.append(f"mock_in_flight {self.in_flight}")
+        lines.append("# TYPE mock_latency_seconds summary")
+        for key, quantile in (("p50", "0.5"), ("p90", "0.9"), ("p99", "0.99")):
+            value = self.latency_histogram.percentiles()[key]
+            lines.append(f'mock_latency_seconds{{quantile="{quantile}"}} {value:.6f}')
+        lines.append(f"mock_latency_seconds_count {self.latency_histogram.count}")
+        return web.Response(text="\n".join(lines) + "\n", content_type="text/plain")
+    
+    async def handle_api(self, request: web.Request) -> web.StreamResponse:
+        started = time.perf_counter()
+        path = request.path
+        self.in_flight += 1
+        try:
+            body = await request.read()
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            
+            error = self._validation_error(path, payload)
+            if error:
+                self._count(path, 400, started)
+                return web.json_response({"error": {"message": error, "type": "invalid_request_error"}}, status=400)
+            
+            rand = random.random()
+            if rand < self.config.rate_limit_percentage:
+                self._count(path, 429, started)
+                return web.json_response({"error": {"message": "rate limit exceeded", "type": "rate_limit_error"}},
+                                         status=429, headers={"Retry-After": "1"})
+            if rand < self.config.rate_limit_percentage + self.config.server_error_percentage:
+                status = random.choice((500, 502, 503))
+                self._count(path, status, started)
+                return web.json_response({"error": {"message": "injected server error", "type": "server_error"}},
+                                         status=status)
+            
+            cache_hit = self._cache_lookup(path, body)
+            queue_time = 0.0
+            if self.semaphore:
+                await self.semaphore.acquire()
+                queue_time = time.perf_counter() - started
+            try:
+                processing_time = self._sample_latency(cache_hit)
+                if processing_time > 0:
+                    await asyncio.sleep(processing_time)
+                headers = self._headers(processing_time, queue_time, cache_hit)
+                
+                if payload.get("stream") and "completions" in path:
+                    response = await self._stream_completion(request, path, headers)
+                else:
+                    response = web.json_response(self._completion_body(path, payload), headers=headers)
+            finally:
+                if self.semaphore:
+                    self.semaphore.release()
+            
+            self._count(path, response.status, started)
+            return response
+        finally:
+            self.in_flight -= 1
+    
+    def _completion_body(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response_id = uuid.uuid4().hex[:12]
+        if path == "/v1/embeddings":
+            return {
+                "object": "list",
+                "model": payload["model"],
+                "data": [{"object": "embedding", "index": 0,
+                          "embedding": [random.random() for _ in range(self.config.embedding_dimensions)]}]
+            }
+        
+        tokens = min(self.config.stream_tokens, payload.get("max_tokens", self.config.stream_tokens))
+        text = " ".join("token" for _ in range(tokens))
+        choice = ({"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+                  if path == "/v1/chat/completions" else {"index": 0, "text": text, "finish_reason": "stop"})
+        return {
+            "id": f"mock-{response_id}",
+            "model": payload["model"],
+            "choices": [choice],
+            "usage": {"completion_tokens": tokens}
+        }
+    
+    async def _stream_completion(self, request: web.Request, path: str,
+                                 headers: Dict[str, str]) -> web.StreamResponse:
+        """Emit one SSE event per token at the configured token rate"""
+        response = web.StreamResponse(headers={**headers, "Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        
+        interval = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+        choice = ({"index": 0, "delta": {"content": " token"}} if path == "/v1/chat/completions"
+                  else {"index": 0, "text": " token"})
+        event = f"data: {json.dumps({'choices': [choice]})}\n\n".encode()
+        for index in range(self.config.stream_tokens):
+            if index and interval:
+                await asyncio.sleep(interval)
+            await response.write(event)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+def _mock_server_main(config: MockServerConfig):
+    """Entry point for a mock server process"""
+    try:
+        asyncio.run(MockLLMServer(config).serve())
+    except KeyboardInterrupt:
+        pass
+
+async def run_mock_server(config: MockServerConfig):
+    """Serve the mock API, forking extra processes onto the same port when configured"""
+    processes = []
+    if config.processes > 1:
+        ctx = multiprocessing.get_context("spawn")
+        for _ in range(config.processes - 1):
+            process = ctx.Process(target=_mock_server_main, args=(config,), daemon=True)
+            process.start()
+            processes.append(process)
+    try:
+        await MockLLMServer(config).serve()
+    finally:
+        for process in processes:
+            process.terminate()
+
+async def compare_transports(config: LoadTestConfig) -> Dict[str, Any]:
+    """Run the same test over HTTP/1.1 keep-alive and HTTP/2, then compare them
+    
+    Both runs share one random seed, so they offer the same request sequence.
+    Each keeps its own report (<output>.http1.json, <output>.http2.json); the
+    comparison of connection counts, queueing for a connection or stream
+    (head-of-line wait) and latency goes to output_file.
+    """
+    seed = config.random_seed if config.random_seed is not None else random.randrange(2 ** 32)
+    base, ext = os.path.splitext(config.output_file)
+    runs = {}
+    for transport in TRANSPORTS:
+        run_config = replace(config, transport=transport, random_seed=seed, output_file=f"{base}.{transport}{ext}",
+                             results_stream_file="")
+        logger.info(f"Transport comparison: running over {transport}")
+        async with APIInfrastructureTester(run_config) as tester:
+            report = await tester.run_load_test()
+        if "error" in report:
+            raise RuntimeError(f"{transport} run failed: {report['error']}")
+        
+        connections = report["connection_analysis"]
+        latency = report["latency_analysis"]
+        queue_wait = connections["pool_wait_time"]
+        runs[transport] = {
+            "requests": report["test_metadata"]["total_requests_executed"],
+            "requests_per_second": report["performance_summary"]["requests_per_second"],
+            "error_rate": report["reliability_metrics"]["error_rate"],
+            "connections_opened": connections["connections_opened"],
+            "peak_open_connections": connections["peak_open_connections"],
+            "streams_per_connection": connections["streams_per_connection"],
+            "head_of_line_wait_ms": {key: value * 1000 for key, value in queue_wait.items()},
+            "p50_latency_ms": latency["median_latency"] * 1000,
+            "p95_latency_ms": latency["p95_latency"] * 1000,
+            "p99_latency_ms": latency["p99_latency"] * 1000,
+            "p95_first_byte_ms": latency["first_byte_time_percentiles"]["p95"] * 1000,
+            "latency_by_concurrent_streams": connections.get("latency_by_concurrent_streams", {})
+        }
+    
+    http1, http2 = runs["http1"], runs["http2"]
+    comparison = {
+        "transport_comparison": {
+            "scenario_name": config.scenario_name,
+            "target_url": config.base_url,
+            "load_model": config.load_model,
+            "random_seed": seed,
+            "transports": runs,
+            "http2_vs_http1": {
+                key: (http2[key] / http1[key] if http1[key] else None)
+                for key in ("connections_opened", "peak_open_connections", "p50_latency_ms",
+                            "p95_latency_ms", "p99_latency_ms", "requests_per_second")
+            }
+        }
+    }
+    with open(config.output_file, 'w') as f:
+        json.dump(comparison, f, indent=2)
+    logger.info(f"Transport comparison saved to {config.output_file}")
+    return comparison
+
+async def benchmark_self(step_seconds: float = 10.0, start_rps: float = 250.0, max_rps: float = 64000.0,
+                         mock_processes: int = 2, port: int = 18765) -> Dict[str, Any]:
+    """Measure the tester's own ceiling: max sustainable RPS and client CPU per request
+    
+    The mock server runs in separate processes with zero latency, so every
+    step's limit is the load generator itself. The arrival rate doubles until
+    the tester can no longer keep up (over 5% late sends, drops, or achieved RPS
+    below 95% of target).
+    """
+    mock_config = MockServerConfig(port=port, processes=mock_processes, latency_median_ms=0.0,
+                                   cache_hit_percentage=0.0)
+    ctx = multiprocessing.get_context("spawn")
+    mock_processes_started = [ctx.Process(target=_mock_server_main, args=(mock_config,), daemon=True)
+                              for _ in range(mock_processes)]
+    for process in mock_processes_started:
+        process.start()
+    
+    base_url = f"http://{mock_config.host}:{port}"
+    try:
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                try:
+                    async with session.get(f"{base_url}/health") as response:
+                        if response.status == 200:
+                            break
+                except aiohttp.ClientConnectionError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("mock server did not start")
+        
+        steps = []
+        rate = start_rps
+        while rate <= max_rps:
+            config = LoadTestConfig(
+                base_url=base_url,
+                api_key="benchmark",
+                load_model="open",
+                target_rps=rate,
+                test_duration_minutes=step_seconds / 60,
+                test_multiple_endpoints=False,
+                min_payload_kb=1,
+                max_payload_kb=1,
+                burst_testing=False,
+                test_malformed_requests=False,
+                simulate_client_failures=False,
+                collect_system_metrics=False,
+                real_time_dashboard=False,
+                results_stream_format="none",
+                connection_pool_size=1000,
+                max_connections_per_host=1000,
+                max_in_flight=10000
+            )
+            async with APIInfrastructureTester(config) as tester:
+                tester.retain_results = False
+                wall_started = time.perf_counter()
+                cpu_started = time.process_time()
+                await tester.run_open_model_load()
+                cpu_seconds = time.process_time() - cpu_started
+                wall_seconds = time.perf_counter() - wall_started
+            
+            totals = tester.stats.totals
+            sent = tester.open_model_stats["sent_requests"]
+            achieved = totals["requests"] / wall_seconds if wall_seconds else 0.0
+            late_ratio = tester.open_model_stats["late_requests"] / sent if sent else 0.0
+            latency = tester.stats.latency_histograms["total_latency"].percentiles()
+            sustained = (achieved >= rate * 0.95 and late_ratio <= 0.05 and
+                         tester.open_model_stats["dropped_requests"] == 0 and totals["errors"] == 0)
+            steps.append({
+                "target_rps": rate,
+                "achieved_rps": achieved,
+                "requests": totals["requests"],
+                "errors": totals["errors"],
+                "late_send_ratio": late_ratio,
+                "dropped_requests": tester.open_model_stats["dropped_requests"],
+                "max_send_lag_ms": tester.open_model_stats["max_send_lag_ms"],
+                "cpu_us_per_request": cpu_seconds / totals["requests"] * 1e6 if totals["requests"] else 0.0,
+                "client_cpu_utilization": cpu_seconds / wall_seconds if wall_seconds else 0.0,
+                "p50_latency_ms": latency["p50"] * 1000,
+                "p99_latency_ms": latency["p99"] * 1000,
+                "sustained": sustained
+            })
+            logger.info(f"Self-benchmark {rate:.0f} RPS target: {achieved:.0f} achieved, "
+                        f"{steps[-1]['cpu_us_per_request']:.0f}us CPU/request, late {late_ratio:.1%}")
+            if not sustained:
+                break
+            rate *= 2
+    finally:
+        for process in mock_processes_started:
+            process.terminate()
+            process.join(timeout=5)
+    
+    sustained_steps = [step for step in steps if step["sustained"]]
+    baseline = sustained_steps[0] if sustained_steps else (steps[0] if steps else {})
+    return {
+        "benchmark": "self",
+        "timestamp": datetime.now().isoformat(),
+        "python_version": platform.python_version(),
+        "aiohttp_version": aiohttp.__version__,
+        "cpu_count": os.cpu_count(),
+        "step_seconds": step_seconds,
+        "max_sustained_rps": max((step["achieved_rps"] for step in sustained_steps), default=0.0),
+        "peak_achieved_rps": max((step["achieved_rps"] for step in steps), default=0.0),
+        "cpu_us_per_request": baseline.get("cpu_us_per_request", 0.0),
+        "client_overhead_p50_ms": baseline.get("p50_latency_ms", 0.0),
+        "steps": steps
+    }
+
+async def analyze_result_stream(path: str) -> Dict[str, Any]:
+    """Rebuild the infrastructure report from a (possibly interrupted) results stream"""
+    header, results = read_result_stream(path)
+    config_fields = {f.name for f in fields(LoadTestConfig)}
+    config_values = {k: v for k, v in header.get("config", {}).items() if k in config_fields}
+    config = LoadTestConfig(**{"base_url": "", "api_key": "", **config_values})
+    config.collect_system_metrics = False
+    config.detect_client_saturation = False  # Loop-side signals are not in the stream
+    
+    tester = APIInfrastructureTester(config)
+    tester.retain_results = False
+    tester.results_stream_path = path
+    
+    first_start = None
+    last_end = 0.0
+    for result in results:
+        tester._merge_result(result)
+        first_start = result.timestamp if first_start is None else min(first_start, result.timestamp)
+        last_end = max(last_end, result.timestamp + result.total_latency)
+    
+    test_duration = last_end - first_start if first_start is not None else 0.0
+    return await tester._generate_infrastructure_report(test_duration)
+
+@dataclass
+class RegressionThresholds:
+    """When a candidate run counts as a regression against the baseline"""
+    percentiles: Tuple[float, ...] = (50, 95, 99)
+    max_increase_pct: float = 10.0  # Percentile latency increase allowed
+    min_delta_ms: float = 1.0  # Ignore increases smaller than this, however significant
+    max_error_rate_increase: float = 0.01  # Absolute error-rate increase allowed
+    alpha: float = 0.01  # Significance level for every test
+    min_samples: int = 30  # Per endpoint and run, below this nothing is judged
+
+ALL_ENDPOINTS = "*"
+_JSON_SEPARATORS = re.compile(r"[\s,]*")
+_RAW_RESULTS_KEY = re.compile(r'"raw_results(_file)?"\s*:\s*')
+
+def _iter_json_array(f, buffer: str, pos: int, chunk_size: int = 1 << 20):
+    """Yield the elements of a JSON array one at a time; buffer[pos] is just past its '['"""
+    decoder = json.JSONDecoder()
+    eof = False
+    while True:
+        pos = _JSON_SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            if pos == len(buffer):
+                raise ValueError("need more data")
+            element, pos = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if eof:
+                return  # Truncated file: keep what was read
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield element
+
+def _iter_result_rows(path: str):
+    """(endpoint, total_latency, status_code, error_type) for every result of a run, streamed
+    
+    Accepts a results stream in any format, or a saved report: its
+    raw_results_file is followed, or its embedded raw_results array is
+    decoded incrementally instead of loading the whole file.
+    """
+    with open(path, 'rb') as probe:
+        head = probe.read(256)
+    if not head.lstrip().startswith(b"{") or b'"infrastructure_report"' not in head:
+        _, results = read_result_stream(path, raw=True)
+        for result in results:
+            if isinstance(result, dict):
+                yield (result.get("endpoint") or ALL_ENDPOINTS, result["total_latency"],
+                       result["status_code"], result["error_type"])
+            else:
+                yield result.endpoint or ALL_ENDPOINTS, result.total_latency, result.status_code, result.error_type
+        return
+    
+    with open(path, 'r') as f:
+        buffer = ""
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                raise ValueError(f"{path} has neither raw_results nor raw_results_file")
+            # Keep a tail so a key split across chunks is still found
+            search_from = max(0, len(buffer) - 32)
+            buffer += chunk
+            match = _RAW_RESULTS_KEY.search(buffer, search_from)
+            if match and match.end() < len(buffer):
+                break
+        
+        pos = match.end()
+        if match.group(1):
+            stream_path = json.JSONDecoder().raw_decode(buffer + f.read(4096), pos)[0]
+            if not os.path.isabs(stream_path) and not os.path.exists(stream_path):
+                stream_path = os.path.join(os.path.dirname(path), os.path.basename(stream_path))
+            yield from _iter_result_rows(stream_path)
+            return
+        if buffer[pos] != "[":
+            raise ValueError(f"{path}: raw_results is not a list")
+        for row in _iter_json_array(f, buffer, pos + 1):
+            yield row.get("endpoint") or ALL_ENDPOINTS, row["total_latency"], row["status_code"], row["error_type"]
+
+def digest_run(path: str) -> Dict[str, Dict[str, Any]]:
+    """Per-endpoint latency histogram (successful requests) and error counts of one run
+    
+    Memory stays constant in the number of results; ALL_ENDPOINTS holds the
+    whole run.
+    """
+    histograms: Dict[str, LatencyHistogram] = {}
+    counts: Dict[str, List[int]] = {}  # endpoint -> [requests, errors]
+    for endpoint, latency, status_code, error_type in _iter_result_rows(path):
+        histogram = histograms.get(endpoint)
+        if histogram is None:
+            histogram = histograms[endpoint] = LatencyHistogram()
+            counts[endpoint] = [0, 0]
+        endpoint_counts = counts[endpoint]
+        endpoint_counts[0] += 1
+        if 200 <= status_code < 300:
+            histogram.record(latency)
+        elif error_type != "expected_validation_error":
+            endpoint_counts[1] += 1
+    
+    digest = {endpoint: {"histogram": histograms[endpoint], "requests": requests, "errors": errors}
+              for endpoint, (requests, errors) in counts.items()}
+    if list(digest) != [ALL_ENDPOINTS]:  # Rows without an endpoint are already the whole run
+        overall = {"histogram": LatencyHistogram(), "requests": 0, "errors": 0}
+        for entry in digest.values():
+            overall["histogram"].merge(entry["histogram"])
+            overall["requests"] += entry["requests"]
+            overall["errors"] += entry["errors"]
+        digest[ALL_ENDPOINTS] = overall
+    return digest
+
+def mann_whitney_histograms(baseline: LatencyHistogram, candidate: LatencyHistogram) -> Tuple[float, float]:
+    """Mann-Whitney U test over two histograms: (P(candidate > baseline), two-sided p-value)
+    
+    Samples sharing a bucket are ties and get the average rank, so the test
+    runs in O(buckets) whatever the sample counts (normal approximation with
+    tie correction).
+    """
+    n1, n2 = baseline.count, candidate.count
+    rank = 0
+    candidate_rank_sum = 0.0
+    tie_term = 0
+    for index in sorted(baseline.counts.keys() | candidate.counts.keys()):
+        in_candidate = candidate.counts.get(index, 0)
+        tied = baseline.counts.get(index, 0) + in_candidate
+        candidate_rank_sum += in_candidate * (rank + (tied + 1) / 2)
+        tie_term += tied ** 3 - tied
+        rank += tied
+    
+    u = candidate_rank_sum - n2 * (n2 + 1) / 2
+    total = n1 + n2
+    variance = n1 * n2 / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    z = (u - n1 * n2 / 2) / math.sqrt(variance) if variance > 0 else 0.0
+    return u / (n1 * n2), math.erfc(abs(z) / math.sqrt(2))
+
+def _two_proportion_p_value(k1: int, n1: int, k2: int, n2: int) -> float:
+    """Two-sided p-value that k1/n1 and k2/n2 differ (pooled z-test)"""
+    pooled = (k1 + k2) / (n1 + n2)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+    if se == 0:
+        return 1.0
+    return math.erfc(abs(k2 / n2 - k1 / n1) / se / math.sqrt(2))
+
+def _compare_endpoint(baseline: Dict[str, Any], candidate: Dict[str, Any],
+                      thresholds: RegressionThresholds) -> Dict[str, Any]:
+    base_histogram, cand_histogram = baseline["histogram"], candidate["histogram"]
+    n1, n2 = base_histogram.count, cand_histogram.count
+    comparison = {"baseline_requests": baseline["requests"], "candidate_requests": candidate["requests"]}
+    if min(n1, n2) < thresholds.min_samples:
+        comparison["status"] = "insufficient_data"
+        return comparison
+    
+    prob_slower, shift_p = mann_whitney_histograms(base_histogram, cand_histogram)
+    comparison["distribution_shift"] = {"prob_candidate_slower": prob_slower, "p_value": shift_p}
+    
+    regressions, improvements = [], []
+    percentiles = {}
+    for percent in thresholds.percentiles:
+        base_value = base_histogram.percentile(percent)
+        cand_value = cand_histogram.percentile(percent)
+        delta_ms = (cand_value - base_value) * 1000
+        delta_pct = (cand_value / base_value - 1) * 100 if base_value else 0.0
+        # Quantile test: does the share of requests slower than the baseline's
+        # percentile differ between runs?
+        p_value = _two_proportion_p_value(base_histogram.count_above(base_value), n1,
+                                          cand_histogram.count_above(base_value), n2)
+        key = f"p{percent:g}"
+        percentiles[key] = {"baseline_ms": base_value * 1000, "candidate_ms": cand_value * 1000,
+                            "delta_ms": delta_ms, "delta_pct": delta_pct, "p_value": p_value}
+        if p_value < thresholds.alpha and abs(delta_ms) > thresholds.min_delta_ms and \
+                abs(delta_pct) > thresholds.max_increase_pct:
+            (regressions if delta_ms > 0 else improvements).append(key)
+    comparison["percentiles"] = percentiles
+    
+    base_errors, cand_errors = baseline["errors"], candidate["errors"]
+    base_rate = base_errors / baseline["requests"]
+    cand_rate = cand_errors / candidate["requests"]
+    error_p = _two_proportion_p_value(base_errors, baseline["requests"], cand_errors, candidate["requests"])
+    comparison["error_rate"] = {"baseline": base_rate, "candidate": cand_rate, "p_value": error_p}
+    if error_p < thresholds.alpha and abs(cand_rate - base_rate) > thresholds.max_error_rate_increase:
+        (regressions if cand_rate > base_rate else improvements).append("error_rate")
+    
+    comparison["regressions"] = regressions
+    comparison["improvements"] = improvements
+    comparison["status"] = "regression" if regressions else "improved" if improvements else "ok"
+    return comparison
+
+def compare_runs(paths: List[str], thresholds: RegressionThresholds) -> Dict[str, Any]:
+    """Compare each candidate run against the first (baseline) run, per endpoint"""
+    digest_start = time.time()
+    baseline = digest_run(paths[0])
+    candidates = []
+    for path in paths[1:]:
+        digest = digest_run(path)
+        endpoints = {}
+        for endpoint in sorted(baseline.keys() | digest.keys()):
+            if endpoint not in digest:
+                endpoints[endpoint] = {"status": "missing"}
+            elif endpoint not in baseline:
+                endpoints[endpoint] = {"status": "new"}
+            else:
+                endpoints[endpoint] = _compare_endpoint(baseline[endpoint], digest[endpoint], thresholds)
+        regressed = [endpoint for endpoint, comparison in endpoints.items() if comparison["status"] == "regression"]
+        candidates.append({"file": path, "regressed_endpoints": regressed, "endpoints": endpoints})
+    
+    return {
+        "comparison": {
+            "baseline": paths[0],
+            "thresholds": asdict(thresholds),
+            "analysis_seconds": time.time() - digest_start,
+            "regression_detected": any(candidate["regressed_endpoints"] for candidate in candidates),
+            "candidates": candidates
+        }
+    }
+
+def benchmark_result_store(rows: int = 200_000) -> Dict[str, Any]:
+    """Compare memory per million results: List[APITestResult] vs ResultStore"""
+    error_types = ["", "", "", "", "rate_limited", "timeout", "http_503"]
+    server_ids = [f"api-{i}" for i in range(8)]
+    
+    def sample(index: int) -> APITestResult:
+        return APITestResult(
+            timestamp=time.time(),
+            request_id=f"{index % 1000}-{index}-{uuid.uuid4().hex[:8]}",
+            user_id=index % 1000,
+            total_latency=random.random(),
+            connection_time=random.random() / 10,
+            first_byte_time=random.random() / 2,
+            status_code=200,
+            request_size=random.randint(1000, 100000),
+            response_size=random.randint(100, 5000),
+            http_version="1.1",
+            error_type=random.choice(error_types),
+            server_id=random.choice(server_ids),
+            api_version="v1"
+        )
+    
+    def measure(container, add) -> Tuple[float, float]:
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        for index in range(rows):
+            add(container, sample(index))
+        elapsed = time.perf_counter() - started
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return current, elapsed
+    
+    list_bytes, list_seconds = measure([], list.append)
+    store_bytes, store_seconds = measure(ResultStore(), ResultStore.append)
+    
+    scale = 1_000_000 / rows
+    return {
+        "rows_measured": rows,
+        "list_mb_per_million": list_bytes * scale / 1024 / 1024,
+        "result_store_mb_per_million": store_bytes * scale / 1024 / 1024,
+        "memory_reduction_factor": list_bytes / store_bytes if store_bytes else 0,
+        "list_append_seconds": list_seconds,
+        "result_store_append_seconds": store_seconds
+    }
+
 async def main():
     parser = argparse.ArgumentParser(description="API Infrastructure Load Tester")
     
     # Basic configuration  
-    parser.add_argument("--base-url", required=True, help="Your API base URL")
-    parser.add_argument("--api-key", required=True, help="API authentication key")
+    parser.add_argument("--base-url", help="Your API base URL")
+    parser.add_argument("--api-key", help="API authentication key")
     parser.add_argument("--users", type=int, default=10, help="Concurrent users")
     parser.add_argument("--requests-per-user", type=int, default=10, help="Requests per user")
-    parser.add_argument("--duration", type=int, default=5, help="Test duration (minutes)")
+    parser.add_argument("--duration", type=float, default=5, help="Test duration (minutes)")
     parser.add_argument("--scenario-name", default="api_infrastructure_test", help="Test scenario name")
     
     # API-specific testing
     parser.add_argument("--endpoint", default="/v1/chat/completions", help="Primary endpoint to test")
     parser.add_argument("--test-multiple-endpoints", action="store_true", help="Test multiple endpoints")
     parser.add_argument("--endpoints", nargs="+", help="List of endpoints to test")
+    parser.add_argument("--endpoint-weights", nargs="+", metavar="PATH=WEIGHT",
+                        help="Weighted endpoint mix, e.g. /v1/chat/completions=70 /v1/embeddings=30")
+    parser.add_argument("--payload-size-weights", nargs="+", metavar="KB=WEIGHT",
+                        help="Weighted request body sizes, e.g. 1=60 8=30 64=10")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible traffic mix")
+    parser.add_argument("--tenants", metavar="FILE",
+                        help="JSON list of tenant profiles (name, api_key, weight, rate_limit_rps, burst, "
+                             "endpoint_weights); each gets its own key, client-side rate cap and endpoint mix")
+    
+    # Cache validation
+    parser.add_argument("--cache-validation", action="store_true",
+                        help="Draw prompts from a bounded Zipf key space to exercise response caches")
+    parser.add_argument("--cache-key-space", type=int, default=1000, help="Distinct cacheable prompts")
+    parser.add_argument("--cache-zipf-skew", type=float, default=1.0, help="Zipf exponent of key popularity")
+    parser.add_argument("--cache-repeat-ratio", type=float, default=0.8,
+                        help="Share of requests drawn from the key space (the rest are unique)")
     
-    # Infrastructure testing
\ No newline at end of file
+    # Infrastructure testing
+    parser.add_argument("--connection-pool-size", type=int, default=100, help="Total connection pool size")
+    parser.add_argument("--max-connections-per-host", type=int, default=50, help="Max connections per host")
+    parser.add_argument("--no-connection-reuse", action="store_true", help="Disable keep-alive connection reuse")
+    parser.add_argument("--warmup-requests", type=int, default=0,
+                        help="Requests sent before the measured phase to open and prime pooled connections; "
+                             "reported separately under 'warmup'")
+    parser.add_argument("--warmup-connections", type=int, default=0,
+                        help="Connections to pre-open during warm-up (0 = the transport's connection limit)")
+    parser.add_argument("--min-payload-kb", type=int, default=1, help="Minimum request payload size (KB)")
+    parser.add_argument("--max-payload-kb", type=int, default=100, help="Maximum request payload size (KB)")
+    
+    # Request patterns
+    parser.add_argument("--ramp-up", type=int, default=30, help="Ramp-up period (seconds)")
+    parser.add_argument("--no-burst-testing", action="store_true", help="Disable burst request patterns")
+    parser.add_argument("--burst-size", type=int, default=20, help="Requests per burst")
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS), default="http1",
+                        help="http1: aiohttp keep-alive pool; http2: multiplexed streams (needs httpx[http2])")
+    parser.add_argument("--http2-connections", type=int, default=10, help="Max HTTP/2 connections")
+    parser.add_argument("--http2-streams", type=int, default=100,
+                        help="Concurrent streams per HTTP/2 connection")
+    parser.add_argument("--compare-transports", action="store_true",
+                        help="Run the test over http1 and then http2 at the same offered load and compare")
+    parser.add_argument("--pacing", choices=["scheduler", "per_user"], default="scheduler",
+                        help="Closed-model pacing: one central timer heap + worker pool, or a coroutine per user")
+    parser.add_argument("--pacing-tick-ms", type=float, default=5.0,
+                        help="Pacing scheduler tick; due sends are released once per tick")
+    parser.add_argument("--pacing-workers", type=int, default=0,
+                        help="Worker coroutines for the pacing scheduler (0 = one per user plus one burst)")
+    
+    # Open-model load
+    parser.add_argument("--load-model", choices=["closed", "open", "trace"], default="closed",
+                        help="closed: per-user request loops, open: fixed arrival rate, trace: replay --trace-file")
+    parser.add_argument("--arrival-pattern", choices=list(ArrivalRateScheduler.PATTERNS), default="constant",
+                        help="Arrival rate pattern for the open model")
+    parser.add_argument("--target-rps", type=float, default=10.0, help="Target arrival rate (open model)")
+    parser.add_argument("--start-rps", type=float, default=1.0, help="Initial arrival rate for step/ramp patterns")
+    parser.add_argument("--step-rps", type=float, default=5.0, help="Arrival rate increase per step")
+    parser.add_argument("--step-seconds", type=int, default=30, help="Seconds per arrival rate step")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="In-flight cap before arrivals are dropped")
+    
+    # Trace replay
+    parser.add_argument("--trace-file", help="Replay an NDJSON or access-log trace (.gz ok); implies --load-model trace")
+    parser.add_argument("--trace-speed", type=float, default=1.0, help="Replay speed multiple (2 = twice real time)")
+    
+    # Capacity search
+    parser.add_argument("--capacity-search", choices=list(APIInfrastructureTester.CAPACITY_SEARCH_MODES),
+                        help="Search for the max RPS meeting the SLO (uses --start-rps, --step-rps, "
+                             "--step-seconds, with --target-rps as the upper bound)")
+    parser.add_argument("--slo-p99-ms", type=float, default=1000.0, help="Capacity search p99 latency SLO (ms)")
+    parser.add_argument("--slo-error-rate", type=float, default=0.01, help="Capacity search error rate SLO")
+    
+    # Client saturation
+    parser.add_argument("--no-saturation-detection", action="store_true",
+                        help="Do not flag windows where the load generator was the bottleneck")
+    parser.add_argument("--saturation-lag-ms", type=float, default=25.0,
+                        help="Event-loop lag that marks a window as client-saturated")
+    parser.add_argument("--saturation-dispatch-ms", type=float, default=50.0,
+                        help="Delay from a request's intended start to its send that marks a window as "
+                             "client-saturated")
+    parser.add_argument("--auto-throttle", action="store_true",
+                        help="Reduce offered load automatically while the client is saturated")
+    
+    # Retries / circuit breaker
+    parser.add_argument("--retry-policy", choices=["none", "exponential"], default="none",
+                        help="Client retries on 429/5xx/timeouts: exponential backoff with full jitter")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries per request")
+    parser.add_argument("--retry-base-delay-ms", type=float, default=500.0, help="First backoff ceiling")
+    parser.add_argument("--retry-max-delay-ms", type=float, default=8000.0, help="Backoff ceiling cap")
+    parser.add_argument("--ignore-retry-after", action="store_true", help="Do not honour Retry-After")
+    parser.add_argument("--retry-budget", type=float, default=10.0,
+                        help="Retry budget tokens (0 = unlimited); each success earns --retry-budget-ratio")
+    parser.add_argument("--retry-budget-ratio", type=float, default=0.1,
+                        help="Retry budget tokens earned per successful attempt")
+    parser.add_argument("--circuit-breaker", action="store_true",
+                        help="Fail fast client-side while the recent failure rate is too high")
+    parser.add_argument("--circuit-failure-threshold", type=float, default=0.5,
+                        help="Failure rate over the breaker window that opens it")
+    parser.add_argument("--circuit-open-seconds", type=float, default=5.0,
+                        help="How long the breaker stays open before a probe")
+    
+    parser.add_argument("--no-payload-corpus", action="store_true",
+                        help="Generate payloads per request instead of using the pre-encoded corpus")
+    parser.add_argument("--payload-cache-dir", default=".payload_cache", help="Payload corpus cache directory")
+    
+    # Streaming responses
+    parser.add_argument("--stream", action="store_true",
+                        help="Request streamed (SSE) completions and measure time-to-first-chunk and inter-chunk gaps")
+    parser.add_argument("--stall-threshold-ms", type=float, default=1000.0,
+                        help="Inter-chunk gap counted as a stream stall")
+    
+    # Scaling
+    parser.add_argument("--workers", type=int, nargs="?", const=0, default=1,
+                        help="Load generation processes (flag without a value = CPU count)")
+    
+    # Results stream
+    parser.add_argument("--results-format", choices=list(StreamingResultWriter.FORMATS) + ["none"], default="none",
+                        help="Stream raw results to disk while running in this format; --output then references "
+                             "the stream as raw_results_file instead of embedding raw_results (default: none, "
+                             "embed raw_results in --output)")
+    parser.add_argument("--results-compression", choices=list(StreamingResultWriter.COMPRESSIONS), default="none",
+                        help="Compression for the results stream")
+    parser.add_argument("--results-file", default="", help="Results stream path (default: derived from --output)")
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS",
+                        help="Compare runs (saved reports or result streams) against the first one; "
+                             "exits 1 on a regression, 2 on unreadable input")
+    parser.add_argument("--regression-percentiles", type=float, nargs="+", default=[50, 95, 99],
+                        help="Percentiles checked by --compare")
+    parser.add_argument("--regression-threshold-pct", type=float, default=10.0,
+                        help="Percentile latency increase (%%) that counts as a regression")
+    parser.add_argument("--regression-min-delta-ms", type=float, default=1.0,
+                        help="Ignore latency increases below this many milliseconds")
+    parser.add_argument("--regression-error-rate", type=float, default=0.01,
+                        help="Absolute error-rate increase that counts as a regression")
+    parser.add_argument("--significance-alpha", type=float, default=0.01,
+                        help="Significance level for the --compare tests")
+    parser.add_argument("--analyze-results", metavar="STREAM",
+                        help="Rebuild the report from a results stream instead of running a test")
+    
+    # Distributed mode
+    parser.add_argument("--agent", action="store_true", help="Run as a load agent waiting for a coordinator")
+    parser.add_argument("--agent-host", default="127.0.0.1",
+                        help="Agent listen address (use a routable address to accept remote coordinators)")
+    parser.add_argument("--agent-port", type=int, default=8089, help="Agent listen port")
+    parser.add_argument("--agent-token", default=os.environ.get("LOADTEST_AGENT_TOKEN", ""),
+                        help="Shared secret between coordinator and agents (default: $LOADTEST_AGENT_TOKEN)")
+    parser.add_argument("--agent-output-dir", default=".", help="Directory an agent writes its result streams to")
+    parser.add_argument("--agents", nargs="+", metavar="URL",
+                        help="Coordinate a distributed test across these agents (e.g. http://10.0.0.5:8089)")
+    parser.add_argument("--snapshot-interval", type=float, default=2.0, help="Agent stats snapshot interval (seconds)")
+    
+    # Mock server
+    parser.add_argument("--mock-server", action="store_true", help="Serve the bundled mock LLM API instead of testing")
+    parser.add_argument("--mock-host", default="127.0.0.1", help="Mock server listen address")
+    parser.add_argument("--mock-port", type=int, default=8080, help="Mock server listen port")
+    parser.add_argument("--mock-processes", type=int, default=1, help="Mock server processes sharing the port")
+    parser.add_argument("--mock-latency-ms", type=float, default=50.0, help="Median mock response latency (ms)")
+    parser.add_argument("--mock-latency-sigma", type=float, default=0.5, help="Log-normal shape of mock latency")
+    parser.add_argument("--mock-max-concurrency", type=int, default=0,
+                        help="Concurrent requests before the mock queues (0 = unlimited)")
+    parser.add_argument("--mock-stream-tokens", type=int, default=50, help="Tokens per mock completion")
+    parser.add_argument("--mock-tokens-per-second", type=float, default=100.0, help="Mock streaming token rate")
+    parser.add_argument("--mock-rate-limit-pct", type=float, default=0.0, help="Share of mock requests answered 429")
+    parser.add_argument("--mock-error-pct", type=float, default=0.0, help="Share of mock requests answered 5xx")
+    parser.add_argument("--mock-cache-hit-pct", type=float, default=0.1, help="Share of mock responses marked cache hits")
+    parser.add_argument("--mock-cache-entries", type=int, default=0,
+                        help="Run a real LRU response cache of this many entries instead of random hits")
+    
+    # Benchmarks
+    parser.add_argument("--benchmark", choices=["result-store", "self"], help="Run an internal benchmark instead of a load test")
+    parser.add_argument("--benchmark-rows", type=int, default=200_000, help="Rows to generate for --benchmark result-store")
+    parser.add_argument("--benchmark-step-seconds", type=float, default=10.0,
+                        help="Seconds per arrival rate step for --benchmark self")
+    parser.add_argument("--benchmark-start-rps", type=float, default=250.0, help="First step rate for --benchmark self")
+    
+    # Output
+    parser.add_argument("--output", default="api_load_test_results.json", help="Results output file")
+    parser.add_argument("--no-system-metrics", action="store_true", help="Disable system metrics collection")
+    parser.add_argument("--system-metrics-interval", type=float, default=1.0, help="System metrics sample interval (seconds)")
+    parser.add_argument("--no-dashboard", action="store_true", help="Disable real-time dashboard")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve live OpenMetrics for the running test on this port (0 = off)")
+    parser.add_argument("--metrics-host", default="127.0.0.1",
+                        help="Bind address for --metrics-port (use 0.0.0.0 for a remote scraper)")
+    
+    args = parser.parse_args()
+    
+    if args.benchmark == "result-store":
+        print(json.dumps(benchmark_result_store(args.benchmark_rows), indent=2))
+        return
+    
+    if args.benchmark == "self":
+        report = await benchmark_self(args.benchmark_step_seconds, args.benchmark_start_rps,
+                                      mock_processes=max(2, args.mock_processes))
+        print(json.dumps(report, indent=2))
+        return
+    
+    if args.mock_server:
+        await run_mock_server(MockServerConfig(
+            host=args.mock_host,
+            port=args.mock_port,
+            processes=max(1, args.mock_processes),
+            latency_median_ms=args.mock_latency_ms,
+            latency_sigma=args.mock_latency_sigma,
+            max_concurrency=args.mock_max_concurrency,
+            stream_tokens=args.mock_stream_tokens,
+            tokens_per_second=args.mock_tokens_per_second,
+            rate_limit_percentage=args.mock_rate_limit_pct,
+            server_error_percentage=args.mock_error_pct,
+            cache_hit_percentage=args.mock_cache_hit_pct,
+            response_cache_entries=args.mock_cache_entries
+        ))
+        return
+    
+    if args.agent:
+        if not args.agent_token:
+            parser.error("--agent requires --agent-token (or LOADTEST_AGENT_TOKEN)")
+        await LoadAgent(args.agent_host, args.agent_port, args.agent_token, args.agent_output_dir).serve()
+        return
+    
+    if args.analyze_results:
+        report = await analyze_result_stream(args.analyze_results)
+        print(json.dumps(report, indent=2))
+        return
+    
+    if args.compare:
+        if len(args.compare) < 2:
+            parser.error("--compare needs a baseline and at least one candidate")
+        thresholds = RegressionThresholds(
+            percentiles=tuple(args.regression_percentiles),
+            max_increase_pct=args.regression_threshold_pct,
+            min_delta_ms=args.regression_min_delta_ms,
+            max_error_rate_increase=args.regression_error_rate,
+            alpha=args.significance_alpha
+        )
+        try:
+            comparison = compare_runs(args.compare, thresholds)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot compare runs: {e}")
+            return 2
+        print(json.dumps(comparison, indent=2))
+        for candidate in comparison["comparison"]["candidates"]:
+            for endpoint in candidate["regressed_endpoints"]:
+                logger.error(f"Regression in {candidate['file']} on {endpoint}: "
+                             f"{', '.join(candidate['endpoints'][endpoint]['regressions'])}")
+        return 1 if comparison["comparison"]["regression_detected"] else 0
+    
+    if not args.base_url or not (args.api_key or args.tenants):
+        parser.error("--base-url and --api-key (or --tenants) are required for a load test")
+    if args.agents and not args.agent_token:
+        parser.error("--agents requires --agent-token (or LOADTEST_AGENT_TOKEN)")
+    
+    def parse_weights(values: Optional[List[str]], flag: str, key_type: Callable[[str], Any]) -> Dict[Any, float]:
+        weights = {}
+        for value in values or []:
+            key, sep, weight = value.rpartition("=")
+            try:
+                weights[key_type(key)] = float(weight)
+            except ValueError:
+                sep = ""
+            if not sep:
+                parser.error(f"{flag} expects KEY=WEIGHT pairs, got {value!r}")
+        return weights
+    
+    load_model = "trace" if args.trace_file else args.load_model
+    if load_model == "trace" and not args.trace_file:
+        parser.error("--load-model trace requires --trace-file")
+    
+    tenants = []
+    if args.tenants:
+        try:
+            with open(args.tenants) as f:
+                tenants = json.load(f)
+        except (OSError, ValueError) as e:
+            parser.error(f"--tenants: {e}")
+        if not isinstance(tenants, list) or not all(isinstance(tenant, dict) for tenant in tenants):
+            parser.error("--tenants expects a JSON list of objects")
+    
+    config = LoadTestConfig(
+        base_url=args.base_url,
+        api_key=args.api_key or "",
+        concurrent_users=args.users,
+        requests_per_user=args.requests_per_user,
+        test_duration_minutes=args.duration,
+        ramp_up_seconds=args.ramp_up,
+        endpoint_path=args.endpoint,
+        test_multiple_endpoints=args.test_multiple_endpoints or bool(args.endpoints),
+        connection_pool_size=args.connection_pool_size,
+        max_connections_per_host=args.max_connections_per_host,
+        test_connection_reuse=not args.no_connection_reuse,
+        warmup_requests=args.warmup_requests,
+        warmup_connections=args.warmup_connections,
+        burst_testing=not args.no_burst_testing,
+        burst_size=args.burst_size,
+        transport=args.transport,
+        http2_connections=args.http2_connections,
+        http2_streams_per_connection=args.http2_streams,
+        closed_model_pacing=args.pacing,
+        pacing_tick_ms=args.pacing_tick_ms,
+        pacing_workers=args.pacing_workers,
+        load_model=load_model,
+        trace_file=args.trace_file or "",
+        trace_speed=args.trace_speed,
+        endpoint_weights=parse_weights(args.endpoint_weights, "--endpoint-weights", str),
+        payload_size_weights=parse_weights(args.payload_size_weights, "--payload-size-weights", int),
+        random_seed=args.seed,
+        tenants=tenants,
+        cache_validation=args.cache_validation,
+        cache_key_space=args.cache_key_space,
+        cache_zipf_skew=args.cache_zipf_skew,
+        cache_repeat_ratio=args.cache_repeat_ratio,
+        arrival_pattern=args.arrival_pattern,
+        target_rps=args.target_rps,
+        arrival_start_rps=args.start_rps,
+        arrival_step_rps=args.step_rps,
+        arrival_step_seconds=args.step_seconds,
+        max_in_flight=args.max_in_flight,
+        retry_policy=args.retry_policy,
+        max_retries=args.max_retries,
+        retry_base_delay_ms=args.retry_base_delay_ms,
+        retry_max_delay_ms=args.retry_max_delay_ms,
+        respect_retry_after=not args.ignore_retry_after,
+        retry_budget_tokens=args.retry_budget,
+        retry_budget_ratio=args.retry_budget_ratio,
+        circuit_breaker=args.circuit_breaker,
+        circuit_failure_threshold=args.circuit_failure_threshold,
+        circuit_open_seconds=args.circuit_open_seconds,
+        detect_client_saturation=not args.no_saturation_detection,
+        saturation_loop_lag_ms=args.saturation_lag_ms,
+        saturation_dispatch_delay_ms=args.saturation_dispatch_ms,
+        auto_throttle=args.auto_throttle,
+        capacity_search=args.capacity_search or "",
+        slo_p99_ms=args.slo_p99_ms,
+        slo_error_rate=args.slo_error_rate,
+        min_payload_kb=args.min_payload_kb,
+        max_payload_kb=args.max_payload_kb,
+        use_payload_corpus=not args.no_payload_corpus,
+        payload_cache_dir=args.payload_cache_dir,
+        stream_responses=args.stream,
+        stream_stall_threshold_ms=args.stall_threshold_ms,
+        worker_processes=args.workers,
+        collect_system_metrics=not args.no_system_metrics,
+        system_metrics_interval_seconds=args.system_metrics_interval,
+        scenario_name=args.scenario_name,
+        output_file=args.output,
+        results_stream_format=args.results_format,
+        results_stream_compression=args.results_compression,
+        results_stream_file=args.results_file,
+        agent_snapshot_interval_seconds=args.snapshot_interval,
+        real_time_dashboard=not args.no_dashboard,
+        metrics_port=args.metrics_port,
+        metrics_host=args.metrics_host
+    )
+    if args.endpoints:
+        config.endpoints_to_test = args.endpoints
+    try:
+        tenant_profiles(config)
+    except (TypeError, ValueError) as e:
+        parser.error(f"--tenants: {e}")
+    
+    if args.compare_transports:
+        comparison = await compare_transports(config)
+        for transport, run in comparison["transport_comparison"]["transports"].items():
+            logger.info(f"[{transport}] RPS: {run['requests_per_second']:.1f} | "
+                        f"connections: {run['connections_opened']} opened, {run['peak_open_connections']} peak | "
+                        f"p99 queue wait: {run['head_of_line_wait_ms']['p99']:.1f}ms | "
+                        f"p50/p99: {run['p50_latency_ms']:.0f}/{run['p99_latency_ms']:.0f}ms")
+        return
+    
+    if args.capacity_search:
+        async with APIInfrastructureTester(config) as tester:
+            report = await tester.run_capacity_search()
+        search = report["capacity_search"]
+        logger.info(f"Max sustainable rate: {search['max_sustainable_rps']:.1f} RPS "
+                    f"(p99 <= {config.slo_p99_ms:.0f}ms, errors <= {config.slo_error_rate:.1%})")
+        return
+    
+    if args.agents:
+        async with APIInfrastructureTester(config) as tester:
+            report = await tester.run_distributed_load_test(args.agents, args.agent_token)
+    else:
+        async with APIInfrastructureTester(config) as tester:
+            report = await tester.run_load_test()
+    
+    if "error" in report:
+        logger.error(report["error"])
+        return
+    
+    summary = report["performance_summary"]
+    latency = report["latency_analysis"]
+    reliability = report["reliability_metrics"]
+    logger.info(f"Requests: {report['test_metadata']['total_requests_executed']} | "
+                f"RPS: {summary['requests_per_second']:.1f} | "
+                f"p95: {latency['p95_latency']:.3f}s | "
+                f"Success rate: {reliability['success_rate']:.1%}")
+    for name, tenant in report.get("tenant_performance", {}).items():
+        cap = f" (cap {tenant['rate_limit_rps']:g})" if tenant["rate_limit_rps"] else ""
+        logger.info(f"[{name}] RPS: {tenant['requests_per_second']:.1f}{cap} | "
+                    f"429s: {tenant['rate_limited_rate']:.1%} | p95: {tenant['p95_latency']:.3f}s")
+    
+    saturation = report.get("client_saturated", {})
+    if saturation.get("detected"):
+        logger.warning(f"Client saturated in {saturation['saturated_windows']} of {saturation['total_windows']} "
+                       f"windows ({saturation['saturated_request_fraction']:.1%} of requests): "
+                       f"{', '.join(sorted(saturation['reasons'])) or 'see load_generators'} - "
+                       f"latencies in those periods include client-side delay")
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+LOAD_TEST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "load-test.py")
+
+
+@pytest.fixture(scope="session")
+def lt():
+    """load-test.py imported as a module (its file name is not importable directly)"""
+    module = sys.modules.get("load_test")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("load_test", LOAD_TEST_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["load_test"] = module  # dataclasses resolve annotations through sys.modules
+        spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,24 @@
+def offsets(lt, **overrides):
+    config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k", load_model="open", **overrides)
+    return list(lt.ArrivalRateScheduler(config).arrival_offsets(3.0))
+
+
+def test_step_pattern_starting_at_zero_sends_nothing_first(lt):
+    sent = offsets(lt, arrival_pattern="step", target_rps=20.0, arrival_start_rps=0.0,
+                   arrival_step_rps=10.0, arrival_step_seconds=1)
+    assert sent and min(sent) >= 1.0
+    # Zero-rate time advances in 0.1 s ticks, so the first arrival may come a tick late
+    assert sent[0] <= 1.25
+    # ~10 arrivals in the 10 RPS step and ~20 in the 20 RPS one
+    assert sum(1 for offset in sent if offset < 2.0) in range(8, 11)
+    assert sum(1 for offset in sent if offset >= 2.0) in range(19, 22)
+
+
+def test_zero_rate_sends_nothing(lt):
+    assert offsets(lt, arrival_pattern="constant", target_rps=0.0) == []
+
+
+def test_constant_rate_is_evenly_spaced(lt):
+    sent = offsets(lt, arrival_pattern="constant", target_rps=10.0)
+    assert len(sent) == 29
+    assert all(abs(b - a - 0.1) < 1e-9 for a, b in zip(sent, sent[1:]))
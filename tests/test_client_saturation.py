@@ -0,0 +1,36 @@
+def remote_summary(lt, saturated_windows, windows, saturated_requests, requests, reasons):
+    config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k")
+    summary = lt.SaturationMonitor(config, lambda: 0).summary()
+    summary.update({"detected": bool(saturated_windows), "saturated_windows": saturated_windows,
+                    "total_windows": windows, "saturated_requests": saturated_requests,
+                    "total_requests": requests, "reasons": reasons, "peak_in_flight": requests // 10})
+    return summary
+
+
+def test_dispatch_threshold_is_separate_from_late_sends(lt):
+    config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k")
+    thresholds = lt.SaturationMonitor(config, lambda: 0).thresholds
+    assert thresholds["dispatch_delay_ms"] == config.saturation_dispatch_delay_ms > config.late_send_threshold_ms
+
+
+def test_remote_load_generators_are_aggregated(lt):
+    tester = lt.APIInfrastructureTester(lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k"))
+    tester.remote_saturation = [
+        remote_summary(lt, 2, 7, 30, 100, {"scheduling_delay": 2}),
+        remote_summary(lt, 0, 7, 0, 300, {}),
+    ]
+    summary = tester._client_saturation_summary()
+    assert summary["detected"]
+    assert (summary["saturated_windows"], summary["total_windows"]) == (2, 14)
+    assert (summary["saturated_requests"], summary["total_requests"]) == (30, 400)
+    assert summary["saturated_request_fraction"] == 30 / 400
+    assert summary["reasons"] == {"scheduling_delay": 2}
+    assert summary["peak_in_flight"] == 30
+    assert len(summary["load_generators"]) == 2
+
+
+def test_local_summary_without_remotes(lt):
+    tester = lt.APIInfrastructureTester(lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k"))
+    summary = tester._client_saturation_summary()
+    assert not summary["detected"] and summary["total_windows"] == 0
+    assert "load_generators" not in summary
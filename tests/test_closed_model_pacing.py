@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+
+class NoThinkRng:
+    def uniform(self, low, high):
+        return 0.0
+
+
+def sends(lt, pacing):
+    config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k", concurrent_users=3,
+                               requests_per_user=7, burst_testing=True, burst_size=3,
+                               burst_interval_seconds=0.0, ramp_up_seconds=0, closed_model_pacing=pacing,
+                               pacing_tick_ms=1.0)
+    tester = lt.APIInfrastructureTester(config)
+    sent = []
+
+    async def fake_request(user_id, request_num, *args):
+        sent.append((user_id, request_num))
+        return lt.APITestResult(timestamp=0, request_id="", user_id=user_id)
+
+    tester.make_api_request = fake_request
+    tester.rng_for = lambda key: NoThinkRng()
+    completed = asyncio.run(tester.run_users(range(3)))
+    return completed, sorted(sent)
+
+
+def test_scheduler_sends_the_same_requests_as_per_user_pacing(lt):
+    per_user = sends(lt, "per_user")
+    # Bursts at request 0, 3 and 6 (3 + 3 + 1 sends) plus the 4 requests in between
+    assert per_user[0] == 3 * 11
+    assert sends(lt, "scheduler") == per_user
+
+
+@pytest.mark.parametrize("users,burst_testing,expected", [(50, True, 59), (50, False, 50), (20000, True, 10000)])
+def test_pacing_pool_follows_user_count(lt, users, burst_testing, expected):
+    config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k", burst_testing=burst_testing,
+                               burst_size=10)
+    assert lt.APIInfrastructureTester(config)._pacing_worker_count(users) == expected
@@ -0,0 +1,75 @@
+import json
+import math
+import random
+
+import pytest
+
+
+def exact_percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
+
+
+def test_percentiles_within_relative_error_bound(lt):
+    rng = random.Random(7)
+    values = [rng.lognormvariate(math.log(0.05), 1.0) + 0.001 for _ in range(20000)]
+    for precision_bits in (6, 8, 10):
+        histogram = lt.LatencyHistogram(precision_bits)
+        for value in values:
+            histogram.record(value)
+        # Values are truncated to whole microseconds before bucketing
+        bound = 1 / 2 ** (precision_bits - 1)
+        for percent in (1, 10, 50, 90, 95, 99, 99.9):
+            expected = exact_percentile(values, percent)
+            assert abs(histogram.percentile(percent) - expected) <= expected * bound + 1e-6
+
+
+def test_small_values_are_exact(lt):
+    histogram = lt.LatencyHistogram(8)
+    values = [micros / 1_000_000 for micros in range(1, 256)]
+    for value in values:
+        histogram.record(value)
+    for percent in (10, 50, 90, 99):
+        assert histogram.percentile(percent) == exact_percentile(values, percent)
+    assert histogram.percentile(100) == histogram.max_value == values[-1]
+    assert histogram.min_value == values[0]
+
+
+def test_merge_matches_single_histogram(lt):
+    rng = random.Random(11)
+    values = [rng.expovariate(20) for _ in range(5000)]
+    whole, first, second = lt.LatencyHistogram(), lt.LatencyHistogram(), lt.LatencyHistogram()
+    for index, value in enumerate(values):
+        whole.record(value)
+        (first if index % 3 else second).record(value)
+    first.merge(second)
+    assert first.counts == whole.counts
+    assert first.count == whole.count
+    assert math.isclose(first.total, whole.total)
+    assert (first.min_value, first.max_value) == (whole.min_value, whole.max_value)
+    assert first.percentiles() == whole.percentiles()
+
+
+def test_merge_empty_and_precision_mismatch(lt):
+    histogram = lt.LatencyHistogram()
+    histogram.merge(lt.LatencyHistogram())
+    assert histogram.count == 0
+    other = lt.LatencyHistogram()
+    other.record(0.25)
+    histogram.merge(other)
+    assert (histogram.min_value, histogram.max_value) == (0.25, 0.25)
+    with pytest.raises(ValueError):
+        histogram.merge(lt.LatencyHistogram(6))
+
+
+def test_dict_round_trip_through_json(lt):
+    histogram = lt.LatencyHistogram(7)
+    for value in (0.0001, 0.002, 0.03, 0.4, 5.0, 5.0):
+        histogram.record(value)
+    restored = lt.LatencyHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+    assert restored.precision_bits == 7
+    assert restored.counts == histogram.counts
+    assert (restored.count, restored.total) == (histogram.count, histogram.total)
+    assert (restored.min_value, restored.max_value) == (histogram.min_value, histogram.max_value)
+    assert restored.percentiles() == histogram.percentiles()
+    assert restored.count_above(0.03) == histogram.count_above(0.03) == 3
@@ -0,0 +1,67 @@
+import asyncio
+import re
+
+import aiohttp
+import pytest
+
+
+def scrape(lt, results):
+    async def run():
+        tester = lt.APIInfrastructureTester(lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k"))
+        exporter = lt.OpenMetricsExporter(tester)
+        for result in results:
+            exporter.record(result)
+        await exporter.start("127.0.0.1", 0)
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+                    return response.status, response.headers["Content-Type"], await response.text()
+        finally:
+            await exporter.stop()
+
+    return asyncio.run(run())
+
+
+def sample_results(lt):
+    return [
+        lt.APITestResult(timestamp=0, request_id="a", user_id=0, endpoint_index=0, status_code=200,
+                         total_latency=0.03, request_size=100, response_size=500),
+        lt.APITestResult(timestamp=0, request_id="b", user_id=0, endpoint_index=0, status_code=200,
+                         total_latency=0.3, request_size=100, response_size=700),
+        lt.APITestResult(timestamp=0, request_id="c", user_id=1, endpoint_index=0, status_code=429,
+                         total_latency=0.002, error_type="http_429", rate_limited=True),
+    ]
+
+
+def test_scrape_returns_openmetrics_exposition(lt):
+    status, content_type, text = scrape(lt, sample_results(lt))
+    assert status == 200
+    assert content_type.startswith("application/openmetrics-text")
+    assert text.endswith("# EOF\n")
+    assert text.count("# EOF") == 1
+
+    assert "# TYPE loadtest_requests counter" in text
+    assert re.search(r'^loadtest_requests_total\{endpoint="[^"]+",status_class="2xx",error_type="none"\} 2$',
+                     text, re.M)
+    assert re.search(r'^loadtest_requests_total\{[^}]*status_class="4xx",error_type="http_429"\} 1$', text, re.M)
+
+    assert "# TYPE loadtest_request_duration_seconds histogram" in text
+    buckets = [int(value) for value in re.findall(
+        r'^loadtest_request_duration_seconds_bucket\{[^}]*status_class="2xx",le="[^"]+"\} (\d+)$', text, re.M)]
+    assert buckets == sorted(buckets) and buckets[-1] == 2
+    assert re.search(r'^loadtest_request_duration_seconds_bucket\{[^}]*status_class="2xx",le="0.05"\} 1$', text, re.M)
+    assert re.search(r'^loadtest_request_duration_seconds_count\{[^}]*status_class="2xx"\} 2$', text, re.M)
+    assert re.search(r'^loadtest_request_duration_seconds_sum\{[^}]*status_class="2xx"\} 0.330000$', text, re.M)
+
+    assert re.search(r'^loadtest_sent_bytes_total\{endpoint="[^"]+"\} 200$', text, re.M)
+    assert re.search(r'^loadtest_received_bytes_total\{endpoint="[^"]+"\} 1200$', text, re.M)
+    assert re.search(r"^loadtest_in_flight_requests 0$", text, re.M)
+
+
+def test_scrape_parses_with_prometheus_client(lt):
+    parser = pytest.importorskip("prometheus_client.openmetrics.parser")
+    _, _, text = scrape(lt, sample_results(lt))
+    families = {family.name: family for family in parser.text_string_to_metric_families(text)}
+    assert families["loadtest_requests"].type == "counter"
+    assert families["loadtest_request_duration_seconds"].type == "histogram"
+    assert sum(sample.value for sample in families["loadtest_requests"].samples) == 3
@@ -0,0 +1,41 @@
+import json
+
+
+def corpus(lt, tmp_path, generator=None):
+    config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k", payload_cache_dir=str(tmp_path),
+                               min_payload_kb=1, max_payload_kb=4, payload_size_buckets=3,
+                               payload_variants_per_bucket=2)
+    return lt.PayloadCorpus(config, generator or lt.PayloadGenerator())
+
+
+def test_cache_round_trip(lt, tmp_path):
+    built = corpus(lt, tmp_path).load_or_build()
+    path = built.cache_path()
+    with open(path) as f:
+        json.load(f)
+
+    loaded = corpus(lt, tmp_path, lt.PayloadGenerator())
+    loaded.load_or_build()
+    assert loaded.bodies == built.bodies
+    assert loaded.malformed_bodies == built.malformed_bodies
+    assert all(isinstance(body, bytes) for buckets in loaded.bodies.values() for bucket in buckets
+               for body in bucket)
+
+
+def test_cache_key_ignores_earlier_generation(lt, tmp_path):
+    generator = lt.PayloadGenerator()
+    key = corpus(lt, tmp_path, generator).cache_key()
+    generator.generate_payload("/v1/chat/completions", 2)
+    assert corpus(lt, tmp_path, generator).cache_key() == key
+
+
+def test_unreadable_or_mismatched_cache_is_rebuilt(lt, tmp_path):
+    first = corpus(lt, tmp_path)
+    path = first.cache_path()
+    for content in (b"\x80\x04\x95 not json", json.dumps({"bodies": {}, "malformed_bodies": ["{}"]}).encode()):
+        with open(path, "wb") as f:
+            f.write(content)
+        rebuilt = corpus(lt, tmp_path).load_or_build()
+        assert sorted(rebuilt.bodies) == rebuilt.endpoints
+        with open(path) as f:
+            assert sorted(json.load(f)["bodies"]) == rebuilt.endpoints
@@ -0,0 +1,83 @@
+import math
+import random
+
+
+def histogram(lt, values):
+    result = lt.LatencyHistogram()
+    for value in values:
+        result.record(value)
+    return result
+
+
+def reference_mann_whitney(baseline, candidate):
+    """Brute-force U (ties count half) and the tie-corrected normal approximation"""
+    n1, n2 = len(baseline), len(candidate)
+    u = sum(1.0 if c > b else 0.5 if c == b else 0.0 for c in candidate for b in baseline)
+    counts = {}
+    for value in baseline + candidate:
+        counts[value] = counts.get(value, 0) + 1
+    total = n1 + n2
+    tie_term = sum(t ** 3 - t for t in counts.values())
+    variance = n1 * n2 / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return u / (n1 * n2), math.erfc(abs(z) / math.sqrt(2))
+
+
+def test_mann_whitney_matches_brute_force(lt):
+    rng = random.Random(3)
+    # Whole microseconds below 256 are stored exactly, so bucket ties are value ties
+    baseline = [rng.randint(1, 200) / 1_000_000 for _ in range(120)]
+    candidate = [rng.randint(20, 255) / 1_000_000 for _ in range(90)]
+    prob, p_value = lt.mann_whitney_histograms(histogram(lt, baseline), histogram(lt, candidate))
+    expected_prob, expected_p = reference_mann_whitney(baseline, candidate)
+    assert math.isclose(prob, expected_prob, rel_tol=1e-12)
+    assert math.isclose(p_value, expected_p, rel_tol=1e-9)
+    assert prob > 0.5 and p_value < 0.05
+
+
+def test_mann_whitney_identical_and_shifted_runs(lt):
+    rng = random.Random(5)
+    values = [rng.lognormvariate(math.log(0.1), 0.4) for _ in range(2000)]
+    prob, p_value = lt.mann_whitney_histograms(histogram(lt, values), histogram(lt, values))
+    assert math.isclose(prob, 0.5) and math.isclose(p_value, 1.0)
+
+    slower = [value * 1.2 for value in values]
+    prob, p_value = lt.mann_whitney_histograms(histogram(lt, values), histogram(lt, slower))
+    assert prob > 0.6 and p_value < 1e-10
+    prob, p_value = lt.mann_whitney_histograms(histogram(lt, slower), histogram(lt, values))
+    assert prob < 0.4 and p_value < 1e-10
+
+
+def test_two_proportion_p_value(lt):
+    # Pooled rate 0.6, se = sqrt(0.24 * 0.02), z = 0.2 / se = 2.887
+    assert math.isclose(lt._two_proportion_p_value(50, 100, 70, 100), 0.003892, rel_tol=1e-3)
+    assert lt._two_proportion_p_value(70, 100, 50, 100) == lt._two_proportion_p_value(50, 100, 70, 100)
+    assert math.isclose(lt._two_proportion_p_value(30, 1000, 30, 1000), 1.0)
+    assert lt._two_proportion_p_value(0, 500, 0, 800) == 1.0  # No variance: nothing to detect
+
+
+def digest(lt, values, errors=0):
+    return {"histogram": histogram(lt, values), "requests": len(values) + errors, "errors": errors}
+
+
+def test_compare_endpoint_flags_latency_and_error_regressions(lt):
+    rng = random.Random(9)
+    thresholds = lt.RegressionThresholds()
+    values = [rng.lognormvariate(math.log(0.1), 0.3) for _ in range(3000)]
+    other = [rng.lognormvariate(math.log(0.1), 0.3) for _ in range(3000)]
+
+    same = lt._compare_endpoint(digest(lt, values, 30), digest(lt, other, 33), thresholds)
+    assert same["status"] == "ok" and not same["regressions"]
+
+    slower = lt._compare_endpoint(digest(lt, values), digest(lt, [v * 1.3 for v in other]), thresholds)
+    assert slower["status"] == "regression"
+    assert {"p50", "p95", "p99"} <= set(slower["regressions"])
+
+    failing = lt._compare_endpoint(digest(lt, values, 30), digest(lt, other, 300), thresholds)
+    assert failing["regressions"] == ["error_rate"]
+
+    faster = lt._compare_endpoint(digest(lt, values), digest(lt, [v * 0.7 for v in other]), thresholds)
+    assert faster["status"] == "improved"
+
+    small = lt._compare_endpoint(digest(lt, values[:10]), digest(lt, other[:10]), thresholds)
+    assert small["status"] == "insufficient_data"
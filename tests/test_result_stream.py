@@ -0,0 +1,73 @@
+import asyncio
+import io
+from dataclasses import asdict
+
+
+def sample_results(lt, count=5):
+    return [
+        lt.APITestResult(
+            timestamp=1_700_000_000.123456 + index,
+            request_id=f"{index}-0-abcdef{index:02d}",
+            user_id=index,
+            endpoint="/v1/embeddings" if index % 2 else "/v1/chat/completions",
+            endpoint_index=index % 2,
+            total_latency=0.0125 * (index + 1),
+            status_code=429 if index == 3 else 200,
+            request_size=1024 * index,
+            error_type="rate_limit" if index == 3 else "",
+            error_message='quoted "message" é' if index == 3 else "",
+            connection_reused=bool(index % 2),
+            rate_limited=index == 3,
+            tenant="pro" if index % 2 else "",
+        )
+        for index in range(count)
+    ]
+
+
+def test_binary_codec_round_trip(lt):
+    results = sample_results(lt)
+    codec = lt._BinaryResultCodec
+    data = (codec.encode_header({"config": {"scenario_name": "t"}}) +
+            codec.encode_batch(results[:3]) + codec.encode_batch(results[3:]))
+    header, rows = codec.read(io.BytesIO(data))
+    assert header == {"config": {"scenario_name": "t"}}
+    assert [asdict(row) for row in rows] == [asdict(result) for result in results]
+
+
+def test_binary_codec_ignores_truncated_frame(lt):
+    results = sample_results(lt)
+    codec = lt._BinaryResultCodec
+    data = codec.encode_header({}) + codec.encode_batch(results[:2]) + codec.encode_batch(results[2:])[:-5]
+    _, rows = codec.read(io.BytesIO(data))
+    assert [row.request_id for row in rows] == [result.request_id for result in results[:2]]
+
+
+def test_streaming_writer_round_trip(lt, tmp_path):
+    results = sample_results(lt, 25)
+
+    for fmt in ("ndjson", "binary"):
+        for compression in ("none", "gzip"):
+            path = str(tmp_path / f"results-{fmt}-{compression}")
+
+            async def write():
+                writer = lt.StreamingResultWriter(path, fmt, compression, batch_size=10)
+                await writer.start({"config": {"scenario_name": "t"}})
+                for result in results:
+                    writer.submit(result)
+                await writer.close()
+                return writer.written
+
+            assert asyncio.run(write()) == len(results)
+            header, rows = lt.read_result_stream(path)
+            assert header["config"] == {"scenario_name": "t"}
+            assert [asdict(row) for row in rows] == [asdict(result) for result in results]
+
+
+def test_stream_header_config_is_redacted(lt):
+    config = lt.LoadTestConfig(base_url="http://localhost", api_key="secret",
+                               tenants=[{"name": "a", "api_key": "tenant-secret"}])
+    values = lt.redacted_config(config)
+    assert values["api_key"] == lt.REDACTED
+    assert values["tenants"] == [{"name": "a", "api_key": lt.REDACTED}]
+    assert config.api_key == "secret"  # The live config keeps its credentials
+    assert "secret" not in repr(values)
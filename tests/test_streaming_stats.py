@@ -0,0 +1,49 @@
+import asyncio
+
+
+class FakeClock:
+    def __init__(self, ticks):
+        self.ticks = iter(ticks)
+
+    def time(self):
+        return next(self.ticks)
+
+
+class FakeResponse:
+    def __init__(self, chunks):
+        self.content = self
+        self.chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def test_stall_among_short_gaps_reaches_p99(lt, monkeypatch):
+    # 60 gaps: 59 of 10 ms and a single 3 s stall
+    ticks, now = [], 100.0
+    for index in range(61):
+        ticks.append(now)
+        now += 3.0 if index == 30 else 0.01
+    tester = lt.APIInfrastructureTester(lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k"))
+    monkeypatch.setattr(lt, "time", FakeClock(ticks))
+    result = lt.APITestResult(timestamp=0, request_id="a", user_id=0, status_code=200, total_latency=3.6)
+    received = asyncio.run(tester._consume_stream(FakeResponse([b"data: x\n\n"] * 61), result, 99.9))
+    assert received == 61 * 9 and result.stream_chunks == 61
+
+    stats = lt.RunStatistics()
+    stats.record(result)
+    gaps = stats.stream_histograms["inter_chunk_gap"]
+    assert gaps.count == 60
+    assert abs(gaps.percentile(50) - 0.01) < 0.001
+    assert abs(gaps.percentile(99) - 3.0) < 0.03
+    assert abs(gaps.max_value - 3.0) < 1e-6
+
+
+def test_gap_histogram_is_not_stored_or_streamed(lt):
+    result = lt.APITestResult(timestamp=0, request_id="a", user_id=0, stream_chunks=2,
+                              chunk_gaps=lt.LatencyHistogram())
+    store = lt.ResultStore()
+    store.append(result)
+    assert store[0].chunk_gaps is None
+    assert b"chunk_gaps" not in lt._NdjsonResultCodec.encode_batch([result])
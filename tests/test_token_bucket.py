@@ -0,0 +1,33 @@
+import pytest
+
+
+def test_reserve_queues_callers_behind_the_burst(lt):
+    bucket = lt.TokenBucket(rate=10.0, capacity=2.0)
+    now = bucket.updated
+    assert bucket.reserve(now) == 0.0
+    assert bucket.reserve(now) == 0.0
+    assert bucket.reserve(now) == pytest.approx(0.1)
+    assert bucket.reserve(now) == pytest.approx(0.2)
+
+
+def test_reserve_over_max_wait_takes_no_token(lt):
+    bucket = lt.TokenBucket(rate=10.0, capacity=1.0)
+    now = bucket.updated
+    assert bucket.reserve(now, max_wait=0.0) == 0.0
+    assert bucket.reserve(now, max_wait=0.05) is None
+    assert bucket.reserve(now, max_wait=0.05) is None
+    # The refused reservations left the balance untouched
+    assert bucket.reserve(now + 0.1, max_wait=0.0) == 0.0
+
+
+def test_open_model_arrival_past_its_deadline_is_refused(lt):
+    config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k", load_model="open",
+                               tenants=[{"name": "a", "api_key": "ka", "rate_limit_rps": 1.0, "burst": 1.0}])
+    tester = lt.APIInfrastructureTester(config)
+    deadline = lt.time.time() + 0.01
+    tenant, wait = tester._admit_arrival(deadline)
+    assert tenant.profile.name == "a" and wait == 0.0
+    assert tester._admit_arrival(deadline) is None
+    # A later deadline leaves room to wait for the next token
+    tenant, wait = tester._admit_arrival(deadline + 2.0)
+    assert 0.9 < wait <= 1.0
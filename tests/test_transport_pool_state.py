@@ -0,0 +1,66 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+
+def pool_state(lt, hide_pools=False):
+    async def run():
+        config = lt.LoadTestConfig(base_url="http://127.0.0.1:1", api_key="k")
+        transport = lt.AiohttpTransport(config, {}, aiohttp.ClientTimeout(total=1))
+        connector = transport.session.connector
+        pools = connector._conns, connector._acquired
+        try:
+            if hide_pools:
+                connector._conns = connector._acquired = None
+            return transport.pool_state()
+        finally:
+            connector._conns, connector._acquired = pools
+            await transport.session.close()
+
+    return asyncio.run(run())
+
+
+def test_pool_state_counts_connections(lt):
+    state = pool_state(lt)
+    assert state["open_connections"] == state["idle_connections"] + state["active_connections"] == 0
+
+
+def test_pool_state_without_private_pools_is_unknown(lt):
+    state = pool_state(lt, hide_pools=True)
+    assert state["open_connections"] == state["idle_connections"] == state["active_connections"] == "unknown"
+    assert state["max_connections"] > 0
+
+
+def test_peak_open_connections_counts_concurrent_requests(lt):
+    async def run():
+        async def slow(request):
+            await asyncio.sleep(0.2)
+            return web.Response(text="ok")
+
+        app = web.Application()
+        app.router.add_get("/", slow)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/"
+
+        config = lt.LoadTestConfig(base_url=url, api_key="k")
+        transport = lt.AiohttpTransport(config, {}, aiohttp.ClientTimeout(total=5))
+
+        async def get():
+            async with transport.request("GET", url, b"") as response:
+                await response.text()
+
+        try:
+            await asyncio.gather(*(get() for _ in range(3)))
+            await get()  # Reuses a pooled connection
+            return transport.peak_open_connections, transport.snapshot()
+        finally:
+            await transport.close()
+            await runner.cleanup()
+
+    peak, snapshot = asyncio.run(run())
+    assert peak == 3
+    assert snapshot == {"peak_open_connections": 3}